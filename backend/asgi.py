@@ -0,0 +1,313 @@
+"""
+Ponto de entrada ASGI da API da Revista.
+
+Serve as mesmas rotas do main.py sob um servidor asyncio:
+
+    cd backend && flask --app main migrar && uvicorn asgi:app --host 0.0.0.0 --port 8000
+
+ou pelo gunicorn com SERVIDOR_MODO=asgi (ver gunicorn.conf.py).
+
+O corpo da requisição é recebido de forma assíncrona, então clientes lentos ou
+uploads demorados não ocupam nenhuma thread. Corpos acima do MAX_CONTENT_LENGTH
+do Flask são recusados com 413 aqui mesmo: pelo Content-Length, antes de ler
+qualquer byte, ou assim que o total recebido passa do limite. Só com o corpo completo a
+aplicação Flask é executada, num pool de threads limitado (ASGI_THREADS), onde
+também ficam as chamadas ao SQLite. Arquivos (como /uploads) são lidos em
+blocos grandes no pool e enviados sem bloquear o loop de eventos.
+
+O stream ao vivo (/resultados/stream) é atendido direto aqui: cada cliente só
+ocupa uma fila no canal do main.py e uma corrotina à espera de eventos, sem
+nenhuma thread do pool enquanto a conexão está ociosa.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+import main
+from main import app as flask_app
+
+ASGI_THREADS = int(os.environ.get('ASGI_THREADS', 16))
+ASGI_CORPO_EM_MEMORIA = 1024 * 1024  # corpos maiores vão para arquivo temporário
+ASGI_BLOCO_ARQUIVO = 256 * 1024
+
+_executor = ThreadPoolExecutor(max_workers=ASGI_THREADS, thread_name_prefix='asgi')
+
+
+class ArquivoWSGI:
+    """
+    wsgi.file_wrapper: guarda o arquivo para que este módulo o envie em blocos
+    lidos no pool, em vez de iterar o arquivo de 8KB em 8KB.
+    """
+
+    def __init__(self, arquivo, buffer_size=8192):
+        self.arquivo = arquivo
+        self.buffer_size = buffer_size
+
+    # Interface usada pelo _RangeWrapper do Werkzeug nas respostas 206
+    def seekable(self):
+        return hasattr(self.arquivo, 'seekable') and self.arquivo.seekable()
+
+    def seek(self, *args):
+        self.arquivo.seek(*args)
+
+    def tell(self):
+        return self.arquivo.tell()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        dados = self.arquivo.read(self.buffer_size)
+        if dados:
+            return dados
+        raise StopIteration()
+
+    def close(self):
+        self.arquivo.close()
+
+
+def _montar_environ(scope, corpo, tamanho):
+    servidor = scope.get('server') or ('localhost', 80)
+    cliente = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': servidor[0],
+        'SERVER_PORT': str(servidor[1]),
+        'REMOTE_ADDR': cliente[0],
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'CONTENT_LENGTH': str(tamanho),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': corpo,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+        'wsgi.file_wrapper': ArquivoWSGI,
+    }
+    for nome, valor in scope.get('headers', []):
+        nome = nome.decode('latin-1').upper().replace('-', '_')
+        valor = valor.decode('latin-1')
+        if nome == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = valor
+        elif nome == 'CONTENT_LENGTH':
+            continue  # Usa o tamanho do corpo realmente recebido
+        else:
+            chave = f"HTTP_{nome}"
+            environ[chave] = f"{environ[chave]},{valor}" if chave in environ else valor
+    return environ
+
+
+class CorpoMuitoGrande(Exception):
+    pass
+
+
+def _tamanho_declarado(scope):
+    """Content-Length da requisição, ou None se ausente ou inválido"""
+    for nome, valor in scope.get('headers', []):
+        if nome == b'content-length':
+            return int(valor) if valor.isdigit() else None
+    return None
+
+
+async def _receber_corpo(receive, loop, limite):
+    """
+    Recebe o corpo inteiro sem ocupar threads. Retorna (arquivo, tamanho), ou
+    (None, 0) se o cliente desconectar antes de terminar o envio. Levanta
+    CorpoMuitoGrande assim que o total recebido passa do limite (None: sem limite).
+    """
+    corpo = tempfile.SpooledTemporaryFile(max_size=ASGI_CORPO_EM_MEMORIA)
+    tamanho = 0
+    while True:
+        mensagem = await receive()
+        if mensagem['type'] == 'http.disconnect':
+            corpo.close()
+            return None, 0
+        dados = mensagem.get('body', b'')
+        if dados:
+            tamanho += len(dados)
+            if limite is not None and tamanho > limite:
+                corpo.close()
+                raise CorpoMuitoGrande()
+            if tamanho > ASGI_CORPO_EM_MEMORIA:
+                # Já está (ou vai para) o disco: escreve no pool
+                await loop.run_in_executor(_executor, corpo.write, dados)
+            else:
+                corpo.write(dados)
+        if not mensagem.get('more_body', False):
+            corpo.seek(0)
+            return corpo, tamanho
+
+
+class AssinanteAsyncio(main.AssinanteAoVivo):
+    """Assinante do canal ao vivo acordado pelo loop de eventos em vez de uma thread"""
+
+    def __init__(self, loop):
+        super().__init__()
+        self.loop = loop
+        self.sinal = asyncio.Event()
+
+    def _avisar(self):
+        try:
+            self.loop.call_soon_threadsafe(self.sinal.set)
+        except RuntimeError:
+            pass  # Loop já encerrado
+
+    async def proximo(self, espera):
+        while True:
+            if self.encerrado:
+                return None
+            if self.eventos:
+                return self.eventos.popleft()
+            self.sinal.clear()
+            if self.eventos or self.encerrado:
+                continue
+            try:
+                await asyncio.wait_for(self.sinal.wait(), espera)
+            except asyncio.TimeoutError:
+                return main.SSE_HEARTBEAT_EVENTO
+
+
+async def _esperar_desconexao(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+def _cabecalhos(tipo, extras):
+    # Mesmos cabeçalhos de CORS que o flask-cors põe nas outras rotas
+    cabecalhos = {'Content-Type': tipo, 'Access-Control-Allow-Origin': '*', **extras}
+    return [(nome.lower().encode('latin-1'), valor.encode('latin-1')) for nome, valor in cabecalhos.items()]
+
+
+async def _erro(send, status, mensagem, extras=None):
+    """Resposta de erro no formato das rotas ({"error": ...}) enviada sem passar pelo Flask"""
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': _cabecalhos('application/json', extras or {})})
+    await send({'type': 'http.response.body', 'body': flask_app.json.serializar({"error": mensagem})})
+
+
+async def _stream_ao_vivo(scope, receive, send, loop):
+    """
+    GET /resultados/stream sem passar pelo Flask. Retorna False quando a
+    requisição deve seguir para a rota normal (parâmetros inválidos → 400).
+    """
+    cabecalhos = dict(scope.get('headers', []))
+    ultimo = cabecalhos.get(b'last-event-id', b'').decode('latin-1')
+    if not ultimo:
+        ultimo = parse_qs(scope['query_string'].decode('latin-1')).get('desde', [''])[0]
+    try:
+        ultimo_id = main.ler_ultimo_evento(ultimo)
+    except ValueError:
+        return False
+
+    assinante = AssinanteAsyncio(loop)
+    inicio = await loop.run_in_executor(_executor, main.canal_ao_vivo.assinar, assinante, ultimo_id)
+    if inicio is None:
+        await _erro(send, 503, "Muitas conexões ao vivo, tente novamente",
+                    {'Retry-After': str(main.SSE_RETRY_MS // 1000)})
+        return True
+
+    desconexao = asyncio.ensure_future(_esperar_desconexao(receive))
+    try:
+        await send({'type': 'http.response.start', 'status': 200, 'headers': _cabecalhos(
+            'text/event-stream; charset=utf-8', main.CABECALHOS_SSE)})
+        await send({'type': 'http.response.body', 'body': inicio, 'more_body': True})
+        while True:
+            proximo = asyncio.ensure_future(assinante.proximo(main.SSE_HEARTBEAT))
+            await asyncio.wait({proximo, desconexao}, return_when=asyncio.FIRST_COMPLETED)
+            if desconexao.done():
+                proximo.cancel()
+                return True
+            evento = proximo.result()
+            if evento is None:
+                break  # Cliente lento desligado: reconecta com Last-Event-ID
+            await send({'type': 'http.response.body', 'body': evento, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+    except OSError:
+        pass  # Conexão caiu durante o envio
+    finally:
+        desconexao.cancel()
+        main.canal_ao_vivo.cancelar(assinante)
+    return True
+
+
+def _proximo(iterador):
+    return next(iterador, None)
+
+
+async def _lifespan(receive, send):
+    while True:
+        mensagem = await receive()
+        if mensagem['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif mensagem['type'] == 'lifespan.shutdown':
+            _executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    loop = asyncio.get_running_loop()
+    if scope['method'] == 'GET' and scope['path'] == '/resultados/stream':
+        if await _stream_ao_vivo(scope, receive, send, loop):
+            return
+
+    # O Flask só aplicaria o MAX_CONTENT_LENGTH depois do corpo inteiro recebido
+    limite = flask_app.config['MAX_CONTENT_LENGTH']
+    declarado = _tamanho_declarado(scope)
+    try:
+        if limite is not None and declarado is not None and declarado > limite:
+            raise CorpoMuitoGrande()
+        corpo, tamanho = await _receber_corpo(receive, loop, limite)
+    except CorpoMuitoGrande:
+        await _erro(send, 413, f"Corpo da requisição maior que o limite de {limite} bytes")
+        return
+    if corpo is None:
+        return
+
+    environ = _montar_environ(scope, corpo, tamanho)
+    inicio = {}
+
+    def start_response(status, headers, exc_info=None):
+        inicio['status'] = int(status.split(' ', 1)[0])
+        inicio['headers'] = [(nome.lower().encode('latin-1'), valor.encode('latin-1')) for nome, valor in headers]
+        return lambda dados: None  # write() legado não é usado pelo Flask
+
+    iteravel = await loop.run_in_executor(_executor, flask_app, environ, start_response)
+    try:
+        await send({'type': 'http.response.start', 'status': inicio['status'], 'headers': inicio['headers']})
+        if isinstance(iteravel, ArquivoWSGI):
+            # Arquivo inteiro: blocos grandes lidos no pool
+            ler = iteravel.arquivo.read
+            while True:
+                dados = await loop.run_in_executor(_executor, ler, ASGI_BLOCO_ARQUIVO)
+                if not dados:
+                    break
+                await send({'type': 'http.response.body', 'body': dados, 'more_body': True})
+        else:
+            # Iterável genérico (JSON, respostas 206, streams): cada bloco é
+            # produzido no pool, então geradores bloqueantes não travam o loop
+            iterador = iter(iteravel)
+            while True:
+                dados = await loop.run_in_executor(_executor, _proximo, iterador)
+                if dados is None:
+                    break
+                if dados:
+                    await send({'type': 'http.response.body', 'body': dados, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        if hasattr(iteravel, 'close'):
+            await loop.run_in_executor(_executor, iteravel.close)
+        corpo.close()
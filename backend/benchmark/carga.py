@@ -0,0 +1,572 @@
+"""
+Teste de carga HTTP reprodutível contra o app real, servido pelo gunicorn.
+
+    cd backend && python benchmark/carga.py [--cenario leitura|misto|escrita] [--tamanho pequeno|medio|grande]
+                                            [--duracao 30] [--clientes 8] [--workers 4]
+                                            [--salvar | --comparar [--tolerancia 0.25]]
+
+Gera (ou reaproveita, em benchmark/.dados/) um banco do tamanho pedido com o
+benchmark/dados.py, copia para um diretório temporário e sobe o gunicorn com o
+gunicorn.conf.py do projeto. Cada cliente é um processo que faz uma requisição
+por vez (laço fechado), sorteando operações com os pesos do cenário entre todas
+as rotas da API, exceto o stream ao vivo. Os clientes mandam Accept-Encoding e
+If-None-Match como o app, então compressão e 304 entram na medição.
+
+O relatório traz a vazão e as latências p50/p95/p99 por rota. Com --salvar o
+resultado vira a linha de base em benchmark/baselines/<cenario>-<tamanho>.json
+(versionada); com --comparar a execução é comparada com ela e o processo sai
+com código 1 se a vazão cair ou o p95 de alguma rota subir além da tolerância.
+"""
+import argparse
+import hashlib
+import http.client
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import signal
+import socket
+import sqlite3
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from collections import Counter
+from urllib.parse import quote
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BACKEND, 'benchmark'))
+
+import dados  # noqa: E402
+
+PASTA_DADOS = os.path.join(BACKEND, 'benchmark', '.dados')
+PASTA_BASELINES = os.path.join(BACKEND, 'benchmark', 'baselines')
+ESPERA_SERVIDOR = 60  # segundos até o gunicorn responder
+REGRESSAO_MIN_MS = 2.0  # diferenças de p95 menores que isso são ruído, não regressão
+ACCEPT_ENCODING = 'br, gzip' if brotli is not None else 'gzip'
+
+# Pesos por operação; o cenário define a fração de escritas
+PESOS_LEITURA = {
+    'raiz': 1, 'artigos': 20, 'artigo': 15, 'busca': 10, 'equipes': 10, 'resultados': 12,
+    'bootstrap': 8, 'sync': 8, 'usuario': 4, 'usuarios': 1, 'upload_get': 6, 'cache_stats': 1, 'metricas': 1,
+}
+PESOS_ESCRITA = {
+    'artigo_criar': 10, 'artigo_editar': 8, 'artigo_remover': 4, 'equipe_criar': 2, 'equipe_editar': 2,
+    'equipe_remover': 1, 'resultado_criar': 8, 'resultado_editar': 6, 'resultado_remover': 3,
+    'importar': 2, 'upload': 3, 'registro': 2, 'login': 2, 'perfil': 3, 'logout': 2,
+}
+CENARIOS = {'leitura': 0.0, 'misto': 0.1, 'escrita': 0.9}
+TERMOS_BUSCA = ('golo', 'ferrov', 'Maputo', 'taça final', 'treinador', 'mambas', 'dérbi', 'penálti')
+
+
+def png(cor, tamanho=64):
+    """PNG sólido válido (para o /upload), sem depender do Pillow no cliente"""
+    def bloco(tipo, conteudo):
+        return struct.pack('>I', len(conteudo)) + tipo + conteudo + struct.pack('>I', zlib.crc32(tipo + conteudo))
+    linha = b'\x00' + bytes(cor) * tamanho
+    return (b'\x89PNG\r\n\x1a\n' + bloco(b'IHDR', struct.pack('>IIBBBBB', tamanho, tamanho, 8, 2, 0, 0, 0))
+            + bloco(b'IDAT', zlib.compress(linha * tamanho)) + bloco(b'IEND', b''))
+
+
+def multipart(nome_arquivo, conteudo, tipo):
+    fronteira = 'revistabenchmark'
+    corpo = (f'--{fronteira}\r\nContent-Disposition: form-data; name="file"; filename="{nome_arquivo}"\r\n'
+             f'Content-Type: {tipo}\r\n\r\n').encode() + conteudo + f'\r\n--{fronteira}--\r\n'.encode()
+    return corpo, f'multipart/form-data; boundary={fronteira}'
+
+
+class Cliente:
+    """
+    Estado de um cliente de carga: sorteia a próxima operação e monta a
+    requisição (rota, método, caminho, corpo, cabeçalhos, callback da resposta).
+    """
+
+    def __init__(self, indice, contexto, fracao_escrita, semente):
+        self.indice = indice
+        self.ctx = contexto
+        self.fracao_escrita = fracao_escrita
+        self.rng = random.Random(semente * 1000 + indice)
+        self.contador = 0
+        self.etags = {}
+        self.cursor_artigos = None
+        self.versao_sync = None
+        self.criados = {'artigos': [], 'equipes': [], 'resultados': []}
+        self.tokens = []  # tokens de logins deste cliente, revogados pelo logout
+        self.leitura = (list(PESOS_LEITURA), list(PESOS_LEITURA.values()))
+        self.escrita = (list(PESOS_ESCRITA), list(PESOS_ESCRITA.values()))
+
+    def proxima(self):
+        nomes, pesos = self.escrita if self.rng.random() < self.fracao_escrita else self.leitura
+        self.contador += 1
+        return getattr(self, f"op_{self.rng.choices(nomes, pesos)[0]}")()
+
+    # Auxiliares
+
+    def _unico(self):
+        return f"{self.indice}-{self.contador}"
+
+    def _admin(self):
+        return {'Authorization': f"Bearer {self.ctx['token']}"}
+
+    def _json(self, rota, metodo, caminho, corpo, cabecalhos=None, ao_responder=None):
+        cabecalhos = dict(self._admin() if cabecalhos is None else cabecalhos, **{'Content-Type': 'application/json'})
+        return rota, metodo, caminho, json.dumps(corpo).encode(), cabecalhos, ao_responder
+
+    def _get(self, rota, caminho, ao_responder=None):
+        cabecalhos = {}
+        if caminho in self.etags:
+            cabecalhos['If-None-Match'] = self.etags[caminho]
+
+        def guardar_etag(status, resposta, corpo):
+            if resposta.getheader('ETag'):
+                self.etags[caminho] = resposta.getheader('ETag')
+            if ao_responder:
+                ao_responder(status, resposta, corpo)
+        return rota, 'GET', caminho, None, cabecalhos, guardar_etag
+
+    def _id_criado(self, tipo, status, corpo):
+        if status in (200, 201):
+            self.criados[tipo].append(json.loads(corpo)['id'])
+
+    def _equipe(self):
+        return self.rng.choice(self.ctx['equipes'])
+
+    # Leituras
+
+    def op_raiz(self):
+        return self._get('GET /', '/')
+
+    def op_artigos(self):
+        if self.cursor_artigos and self.rng.random() < 0.5:
+            caminho = f"/artigos?modo=resumo&limit=20&cursor={quote(self.cursor_artigos)}"
+        else:
+            caminho = "/artigos?modo=resumo&limit=20"
+
+        def proximo_cursor(status, resposta, corpo):
+            self.cursor_artigos = resposta.getheader('X-Next-Cursor')
+        return self._get('GET /artigos', caminho, proximo_cursor)
+
+    def op_artigo(self):
+        return self._get('GET /artigos/<id>', f"/artigos/{self.rng.randint(1, self.ctx['artigos'])}")
+
+    def op_busca(self):
+        termo = quote(self.rng.choice(TERMOS_BUSCA))
+        return self._get('GET /artigos/busca', f"/artigos/busca?q={termo}&limit=20")
+
+    def op_equipes(self):
+        return self._get('GET /equipes', '/equipes')
+
+    def op_resultados(self):
+        caminho = self.rng.choice(("/resultados", "/resultados?formato=compacto",
+                                   f"/resultados?formato=compacto&equipe_id={self._equipe()[0]}"))
+        return self._get('GET /resultados', caminho)
+
+    def op_bootstrap(self):
+        return self._get('GET /bootstrap', '/bootstrap')
+
+    def op_sync(self):
+        # Como o app: a primeira sincronização é completa, as seguintes pedem o
+        # delta desde a versão recebida; de vez em quando uma instalação nova
+        if self.versao_sync is None or self.rng.random() < 0.1:
+            self.versao_sync = 0
+
+        def guardar_versao(status, resposta, corpo):
+            if status == 200:
+                self.versao_sync = json.loads(corpo)['versao']
+        return self._get('GET /sync', f"/sync?desde={self.versao_sync}", guardar_versao)
+
+    def op_usuario(self):
+        return self._get('GET /usuarios/<id>', f"/usuarios/{self.rng.randint(1, self.ctx['usuarios'])}")
+
+    def op_usuarios(self):
+        return self._get('GET /usuarios', '/usuarios')
+
+    def op_upload_get(self):
+        return self._get('GET /uploads/<arquivo>', self.rng.choice(self.ctx['uploads']))
+
+    def op_cache_stats(self):
+        return self._get('GET /cache/stats', '/cache/stats')
+
+    def op_metricas(self):
+        return self._get('GET /metrics', '/metrics')
+
+    # Escritas
+
+    def op_artigo_criar(self):
+        conteudo = " ".join(self.rng.choice(dados.PALAVRAS) for _ in range(300))
+        return self._json('POST /artigos', 'POST', '/artigos',
+                          {'titulo': f"Artigo {self._unico()}", 'conteudo': conteudo, 'autor': 'Benchmark'},
+                          ao_responder=lambda status, resposta, corpo: self._id_criado('artigos', status, corpo))
+
+    def op_artigo_editar(self):
+        artigo_id = self.rng.randint(1, self.ctx['artigos'])
+        return self._json('PUT /artigos/<id>', 'PUT', f"/artigos/{artigo_id}",
+                          {'titulo': f"Artigo editado {self._unico()}", 'conteudo': f"Conteúdo {self._unico()}",
+                           'autor': 'Benchmark'})
+
+    def op_artigo_remover(self):
+        if not self.criados['artigos']:
+            return self.op_artigo_criar()
+        return 'DELETE /artigos/<id>', 'DELETE', f"/artigos/{self.criados['artigos'].pop()}", None, self._admin(), None
+
+    def _dados_equipe(self):
+        return {'nome': f"Equipe Benchmark {self._unico()}", 'jogos': 0, 'vitorias': 0, 'empates': 0,
+                'derrotas': 0, 'gols_pro': 0, 'gols_contra': 0}
+
+    def op_equipe_criar(self):
+        return self._json('POST /equipes', 'POST', '/equipes', self._dados_equipe(),
+                          ao_responder=lambda status, resposta, corpo: self._id_criado('equipes', status, corpo))
+
+    def op_equipe_editar(self):
+        # Só as equipes deste cliente: editar as da carga desfaria a classificação calculada
+        if not self.criados['equipes']:
+            return self.op_equipe_criar()
+        equipe_id = self.rng.choice(self.criados['equipes'])
+        return self._json('PUT /equipes/<id>', 'PUT', f"/equipes/{equipe_id}", self._dados_equipe())
+
+    def op_equipe_remover(self):
+        if not self.criados['equipes']:
+            return self.op_equipe_criar()
+        return 'DELETE /equipes/<id>', 'DELETE', f"/equipes/{self.criados['equipes'].pop()}", None, self._admin(), None
+
+    def _jogo(self):
+        casa, fora = self.rng.sample(self.ctx['equipes'], 2)
+        return {'ronda': self.rng.randint(1, 30), 'time_casa': casa[1], 'time_fora': fora[1],
+                'gols_casa': self.rng.randint(0, 4), 'gols_fora': self.rng.randint(0, 4), 'data_jogo': '2030-01-01'}
+
+    def op_resultado_criar(self):
+        return self._json('POST /resultados', 'POST', '/resultados', self._jogo(),
+                          ao_responder=lambda status, resposta, corpo: self._id_criado('resultados', status, corpo))
+
+    def op_resultado_editar(self):
+        resultado_id = self.rng.randint(1, self.ctx['resultados'])
+        return self._json('PUT /resultados/<id>', 'PUT', f"/resultados/{resultado_id}",
+                          {'gols_casa': self.rng.randint(0, 4), 'gols_fora': self.rng.randint(0, 4)})
+
+    def op_resultado_remover(self):
+        if not self.criados['resultados']:
+            return self.op_resultado_criar()
+        caminho = f"/resultados/{self.criados['resultados'].pop()}"
+        return 'DELETE /resultados/<id>', 'DELETE', caminho, None, self._admin(), None
+
+    def op_importar(self):
+        linhas = ["ronda,time_casa,time_fora,gols_casa,gols_fora,data_jogo"]
+        for _ in range(20):
+            jogo = self._jogo()
+            linhas.append(",".join(str(jogo[campo]) for campo in
+                                   ('ronda', 'time_casa', 'time_fora', 'gols_casa', 'gols_fora', 'data_jogo')))
+        corpo = ("\n".join(linhas) + "\n").encode()
+        return ('POST /resultados/importar', 'POST', '/resultados/importar', corpo,
+                dict(self._admin(), **{'Content-Type': 'text/csv'}), None)
+
+    def op_upload(self):
+        corpo, tipo = multipart(f"foto-{self._unico()}.png", png(self.rng.randbytes(3)), 'image/png')
+        return 'POST /upload', 'POST', '/upload', corpo, dict(self._admin(), **{'Content-Type': tipo}), None
+
+    def op_registro(self):
+        semente = self.ctx['semente']
+        return self._json('POST /auth/register', 'POST', '/auth/register',
+                          {'email': f"novo-{semente}-{self._unico()}@benchmark.local", 'password': dados.SENHA,
+                           'name': 'Novo usuário'}, cabecalhos={})
+
+    def op_login(self):
+        email = f"usuario{self.rng.randint(1, self.ctx['usuarios'] - 1)}@benchmark.local"
+
+        def guardar_token(status, resposta, corpo):
+            if status == 200:
+                self.tokens.append(json.loads(corpo)['token'])
+        return self._json('POST /auth/login', 'POST', '/auth/login', {'email': email, 'password': dados.SENHA},
+                          cabecalhos={}, ao_responder=guardar_token)
+
+    def op_perfil(self):
+        usuario = self.rng.randint(1, self.ctx['usuarios'] - 1)
+        return self._json('PUT /auth/profile', 'PUT', '/auth/profile',
+                          {'id': usuario + 1, 'name': f"Usuário {self._unico()}",
+                           'email': f"usuario{usuario}@benchmark.local", 'phone': '+258 84 000 0000'})
+
+    def op_logout(self):
+        if not self.tokens:
+            return self.op_login()
+        return ('POST /auth/logout', 'POST', '/auth/logout', None,
+                {'Authorization': f"Bearer {self.tokens.pop()}"}, None)
+
+
+def descomprimir(resposta, conteudo):
+    codificacao = resposta.getheader('Content-Encoding')
+    if codificacao == 'gzip':
+        return zlib.decompress(conteudo, 16 + zlib.MAX_WBITS)
+    if codificacao == 'br':
+        return brotli.decompress(conteudo)
+    return conteudo
+
+
+def rodar_cliente(indice, contexto, fracao_escrita, semente, inicio_medicao, fim, fila):
+    """Laço fechado de um cliente; entrega {rota: {latencias, status}} pela fila"""
+    cliente = Cliente(indice, contexto, fracao_escrita, semente)
+    conexao = http.client.HTTPConnection('127.0.0.1', contexto['porta'], timeout=60)
+    medidas = {}
+    try:
+        while time.time() < fim:
+            rota, metodo, caminho, corpo, cabecalhos, ao_responder = cliente.proxima()
+            cabecalhos = dict(cabecalhos, **{'Accept-Encoding': ACCEPT_ENCODING})
+            antes = time.perf_counter()
+            try:
+                conexao.request(metodo, caminho, body=corpo, headers=cabecalhos)
+                resposta = conexao.getresponse()
+                conteudo = resposta.read()
+                status = resposta.status
+            except (OSError, http.client.HTTPException):
+                conexao.close()
+                resposta, conteudo, status = None, b'', 'falha'
+            depois = time.perf_counter()
+            if resposta is not None and ao_responder is not None:
+                ao_responder(status, resposta, descomprimir(resposta, conteudo))
+            if time.time() >= inicio_medicao:
+                medida = medidas.setdefault(rota, {'latencias': [], 'status': Counter()})
+                medida['latencias'].append((depois - antes) * 1000)
+                medida['status'][str(status)] += 1
+    finally:
+        conexao.close()
+        fila.put(medidas)  # mesmo se o cliente falhar, o processo principal não fica esperando
+
+
+def percentil(ordenados, fracao):
+    """Percentil pelo método nearest-rank"""
+    return ordenados[max(0, min(len(ordenados) - 1, int(round(fracao * len(ordenados) + 0.5)) - 1))]
+
+
+def resumir(medidas, duracao):
+    rotas = {}
+    total = 0
+    for rota, medida in sorted(medidas.items()):
+        latencias = sorted(medida['latencias'])
+        erros = sum(quantidade for status, quantidade in medida['status'].items()
+                    if not status.isdigit() or int(status) >= 400)
+        total += len(latencias)
+        rotas[rota] = {
+            'requisicoes': len(latencias),
+            'vazao': round(len(latencias) / duracao, 2),
+            'p50_ms': round(percentil(latencias, 0.50), 2),
+            'p95_ms': round(percentil(latencias, 0.95), 2),
+            'p99_ms': round(percentil(latencias, 0.99), 2),
+            'erros': erros,
+            'status': dict(sorted(medida['status'].items())),
+        }
+    return {'requisicoes': total, 'vazao': round(total / duracao, 2), 'rotas': rotas}
+
+
+def banco_de_dados(tamanho, semente):
+    """Caminho do banco gerado para (tamanho, semente), gerando-o se preciso"""
+    with open(dados.__file__, 'rb') as arquivo:
+        versao = hashlib.sha256(arquivo.read()).hexdigest()[:8]  # muda o gerador → gera de novo
+    caminho = os.path.join(PASTA_DADOS, f"{tamanho}-{semente}-{versao}.db")
+    if not os.path.exists(caminho):
+        os.makedirs(PASTA_DADOS, exist_ok=True)
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        subprocess.run([sys.executable, dados.__file__, temporario, '--tamanho', tamanho, '--semente', str(semente)],
+                       check=True)
+        os.replace(temporario, caminho)
+    return caminho
+
+
+def porta_livre():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def requisitar(porta, metodo, caminho, corpo=None, cabecalhos=None):
+    conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=60)
+    try:
+        conexao.request(metodo, caminho, body=corpo, headers=cabecalhos or {})
+        resposta = conexao.getresponse()
+        return resposta.status, resposta.read()
+    finally:
+        conexao.close()
+
+
+def subir_servidor(pasta, porta, workers, modo):
+    ambiente = dict(os.environ, PYTHONPATH=BACKEND, DATABASE_URL=os.path.join(pasta, 'revista.db'),
+                    SECRET_KEY='benchmark', SERVIDOR_MODO=modo)
+    log = open(os.path.join(pasta, 'gunicorn.log'), 'w')
+    processo = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', os.path.join(BACKEND, 'gunicorn.conf.py'),
+         '--bind', f"127.0.0.1:{porta}", '--workers', str(workers)],
+        cwd=pasta, env=ambiente, stdout=log, stderr=subprocess.STDOUT)
+    limite = time.time() + ESPERA_SERVIDOR
+    while time.time() < limite:
+        if processo.poll() is not None:
+            break
+        try:
+            if requisitar(porta, 'GET', '/')[0] == 200:
+                return processo
+        except OSError:
+            time.sleep(0.2)
+    processo.kill()
+    with open(log.name) as arquivo:
+        sys.exit(f"O gunicorn não respondeu em {ESPERA_SERVIDOR}s:\n{arquivo.read()[-4000:]}")
+
+
+def preparar_contexto(pasta, porta, semente):
+    """Login do administrador, contagens do banco e uma imagem para GET /uploads"""
+    status, corpo = requisitar(porta, 'POST', '/auth/login', json.dumps(
+        {'email': dados.ADMIN_EMAIL, 'password': dados.SENHA}).encode(), {'Content-Type': 'application/json'})
+    if status != 200:
+        sys.exit(f"Login do administrador falhou ({status}): {corpo[:200]!r}")
+    token = json.loads(corpo)['token']
+
+    conn = sqlite3.connect(os.path.join(pasta, 'revista.db'))
+    contexto = {
+        'porta': porta,
+        'semente': semente,
+        'token': token,
+        'artigos': conn.execute("SELECT MAX(id) FROM artigos").fetchone()[0],
+        'resultados': conn.execute("SELECT MAX(id) FROM resultados").fetchone()[0],
+        'usuarios': conn.execute("SELECT MAX(id) FROM usuarios").fetchone()[0],
+        'equipes': conn.execute("SELECT id, nome FROM equipes ORDER BY id").fetchall(),
+    }
+    conn.close()
+
+    corpo, tipo = multipart('capa.png', png((200, 30, 30), 256), 'image/png')
+    status, resposta = requisitar(porta, 'POST', '/upload', corpo,
+                                  {'Authorization': f"Bearer {token}", 'Content-Type': tipo})
+    caminho = '/uploads/' + json.loads(resposta)['image_url'].rsplit('/uploads/', 1)[1]
+    contexto['uploads'] = [caminho, f"{caminho}?tamanho=thumb", f"{caminho}?tamanho=card"]
+    return contexto
+
+
+def ambiente_execucao():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    try:
+        import gunicorn
+        versao_gunicorn = gunicorn.__version__
+    except ImportError:
+        versao_gunicorn = None
+    return {'commit': commit, 'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version,
+            'gunicorn': versao_gunicorn, 'sistema': platform.platform(), 'cpus': os.cpu_count()}
+
+
+def imprimir(resultado, base=None):
+    rotas_base = (base or {}).get('rotas', {})
+    print(f"\n{'rota':<28} {'req':>7} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'erros':>6}"
+          + (f" {'p95 base':>9}" if base else ""))
+    for rota, medida in resultado['rotas'].items():
+        linha = (f"{rota:<28} {medida['requisicoes']:>7} {medida['vazao']:>8.1f} {medida['p50_ms']:>6.1f}ms "
+                 f"{medida['p95_ms']:>6.1f}ms {medida['p99_ms']:>6.1f}ms {medida['erros']:>6}")
+        if rota in rotas_base:
+            linha += f" {rotas_base[rota]['p95_ms']:>7.1f}ms"
+        print(linha)
+    print(f"\nTotal: {resultado['requisicoes']} requisições, {resultado['vazao']:.1f} req/s"
+          + (f" (base: {base['vazao']:.1f} req/s)" if base else ""))
+
+
+def regressoes(resultado, base, tolerancia):
+    encontradas = []
+    if resultado['vazao'] < base['vazao'] * (1 - tolerancia):
+        encontradas.append(f"vazão total {resultado['vazao']:.1f} req/s < base {base['vazao']:.1f} req/s")
+    for rota, anterior in base['rotas'].items():
+        atual = resultado['rotas'].get(rota)
+        if atual is None:
+            continue
+        limite = max(anterior['p95_ms'] * (1 + tolerancia), anterior['p95_ms'] + REGRESSAO_MIN_MS)
+        if atual['p95_ms'] > limite:
+            encontradas.append(f"{rota}: p95 {atual['p95_ms']:.1f}ms > base {anterior['p95_ms']:.1f}ms")
+        if atual['erros'] > anterior['erros'] * (1 + tolerancia) + 1:
+            encontradas.append(f"{rota}: {atual['erros']} erros > base {anterior['erros']}")
+    return encontradas
+
+
+def main_benchmark(argumentos):
+    parser = argparse.ArgumentParser(description="Teste de carga da API sob o gunicorn")
+    parser.add_argument('--cenario', choices=CENARIOS, default='misto')
+    parser.add_argument('--tamanho', choices=dados.TAMANHOS, default='pequeno')
+    parser.add_argument('--semente', type=int, default=1)
+    parser.add_argument('--duracao', type=float, default=30.0, help="segundos medidos")
+    parser.add_argument('--aquecimento', type=float, default=5.0, help="segundos descartados no início")
+    parser.add_argument('--clientes', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--modo', choices=('wsgi', 'asgi'), default='wsgi', help="SERVIDOR_MODO do gunicorn")
+    acao = parser.add_mutually_exclusive_group()
+    acao.add_argument('--salvar', action='store_true', help="grava o resultado como linha de base")
+    acao.add_argument('--comparar', action='store_true', help="compara com a linha de base")
+    parser.add_argument('--tolerancia', type=float, default=0.25)
+    opcoes = parser.parse_args(argumentos)
+
+    arquivo_base = os.path.join(PASTA_BASELINES, f"{opcoes.cenario}-{opcoes.tamanho}.json")
+    base = None
+    if opcoes.comparar:
+        if not os.path.exists(arquivo_base):
+            parser.error(f"{arquivo_base} não existe; gere com --salvar")
+        with open(arquivo_base) as arquivo:
+            base = json.load(arquivo)
+        diferentes = [campo for campo in ('semente', 'duracao', 'clientes', 'workers', 'modo')
+                      if base['parametros'].get(campo) != getattr(opcoes, campo)]
+        if diferentes:
+            print(f"Aviso: parâmetros diferentes da linha de base: {', '.join(diferentes)}")
+
+    origem = banco_de_dados(opcoes.tamanho, opcoes.semente)
+    pasta = tempfile.mkdtemp(prefix='revista-carga-')
+    shutil.copy(origem, os.path.join(pasta, 'revista.db'))  # as escritas não alteram o banco guardado
+    porta = porta_livre()
+    servidor = subir_servidor(pasta, porta, opcoes.workers, opcoes.modo)
+    try:
+        contexto = preparar_contexto(pasta, porta, opcoes.semente)
+        print(f"{opcoes.cenario}/{opcoes.tamanho}: {opcoes.clientes} clientes, {opcoes.workers} workers, "
+              f"{opcoes.aquecimento:.0f}s de aquecimento + {opcoes.duracao:.0f}s medidos")
+        inicio_medicao = time.time() + opcoes.aquecimento
+        fim = inicio_medicao + opcoes.duracao
+        fila = multiprocessing.Queue()
+        clientes = [multiprocessing.Process(target=rodar_cliente, args=(
+            indice, contexto, CENARIOS[opcoes.cenario], opcoes.semente, inicio_medicao, fim, fila))
+            for indice in range(opcoes.clientes)]
+        for cliente in clientes:
+            cliente.start()
+        medidas = {}
+        for _ in clientes:
+            for rota, medida in fila.get().items():
+                acumulado = medidas.setdefault(rota, {'latencias': [], 'status': Counter()})
+                acumulado['latencias'].extend(medida['latencias'])
+                acumulado['status'].update(medida['status'])
+        for cliente in clientes:
+            cliente.join()
+    finally:
+        servidor.send_signal(signal.SIGTERM)
+        servidor.wait(timeout=30)
+        shutil.rmtree(pasta, ignore_errors=True)
+
+    resultado = resumir(medidas, opcoes.duracao)
+    imprimir(resultado, base)
+    if opcoes.salvar:
+        os.makedirs(PASTA_BASELINES, exist_ok=True)
+        parametros = {campo: getattr(opcoes, campo) for campo in
+                      ('cenario', 'tamanho', 'semente', 'duracao', 'aquecimento', 'clientes', 'workers', 'modo')}
+        with open(arquivo_base, 'w') as arquivo:
+            json.dump(dict(parametros=parametros, ambiente=ambiente_execucao(), **resultado), arquivo,
+                      indent=2, ensure_ascii=False)
+            arquivo.write("\n")
+        print(f"Linha de base salva em {os.path.relpath(arquivo_base, BACKEND)}")
+    elif base is not None:
+        encontradas = regressoes(resultado, base, opcoes.tolerancia)
+        if encontradas:
+            print(f"\nRegressões (tolerância {opcoes.tolerancia:.0%}):")
+            for regressao in encontradas:
+                print(f"  - {regressao}")
+            sys.exit(1)
+        print(f"\nSem regressões (tolerância {opcoes.tolerancia:.0%})")
+
+
+if __name__ == "__main__":
+    main_benchmark(sys.argv[1:])
@@ -0,0 +1,164 @@
+"""
+Gera bancos sintéticos e reprodutíveis para os benchmarks.
+
+    cd backend && python benchmark/dados.py destino.db [--tamanho pequeno|medio|grande] [--semente 1]
+
+Os tamanhos estão em TAMANHOS; cada quantidade também pode ser passada à parte
+(--artigos, --temporadas, --equipes, --usuarios). O esquema vem das migrações
+do main.py e a mesma semente gera sempre o mesmo banco. A classificação é
+calculada a partir dos resultados gerados, como o motor de classificação faria.
+
+Todos os usuários têm a senha SENHA; o primeiro é o administrador ADMIN_EMAIL.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TAMANHOS = {
+    'pequeno': {'artigos': 10_000, 'temporadas': 3, 'equipes': 16, 'usuarios': 10_000},
+    'medio': {'artigos': 100_000, 'temporadas': 10, 'equipes': 16, 'usuarios': 100_000},
+    'grande': {'artigos': 100_000, 'temporadas': 20, 'equipes': 20, 'usuarios': 1_000_000},
+}
+SENHA = 'benchmark'
+ADMIN_EMAIL = 'admin@benchmark.local'
+INICIO = datetime(2015, 1, 1)  # datas fixas: o banco não depende do dia em que é gerado
+LOTE = 10_000
+
+PALAVRAS = (
+    "golo equipa treinador jogador campeonato moçambola ronda vitória empate derrota "
+    "estádio adeptos seleção mambas avançado defesa guarda-redes médio capitão árbitro "
+    "penálti livre canto remate baliza contrato transferência lesão regresso época "
+    "classificação liderança pontos jornada clássico dérbi final taça troféu título "
+    "Maputo Beira Nampula Chimoio Quelimane Tete Lichinga Pemba Xai-Xai Inhambane "
+    "ferroviário desportivo costa sol liga muçulmana black bulls songo chibuto maxaquene "
+    "treino convocatória tática pressão contra-ataque posse bola minuto intervalo prolongamento"
+).split()
+CIDADES = ("Maputo", "Beira", "Nampula", "Chimoio", "Quelimane", "Tete", "Lichinga", "Pemba",
+           "Xai-Xai", "Inhambane", "Matola", "Nacala", "Songo", "Chibuto", "Vilankulo", "Montepuez")
+PREFIXOS = ("Ferroviário", "Desportivo", "Atlético", "Clube", "União", "Estrela", "Académica", "Sporting")
+AUTORES = ("Redação", "Ana Machava", "Carlos Sitoe", "Helena Cossa", "João Mabunda", "Marta Nhantumbo")
+
+def _frase(rng, minimo, maximo):
+    return " ".join(rng.choice(PALAVRAS) for _ in range(rng.randint(minimo, maximo)))
+
+def _nomes_equipes(quantidade):
+    return [f"{PREFIXOS[i % len(PREFIXOS)]} {CIDADES[i % len(CIDADES)]}" + (f" {i // 64 + 2}" if i >= 64 else "")
+            for i in range(quantidade)]
+
+def _gerar_artigos(main, rng, quantidade):
+    for artigo_id in range(1, quantidade + 1):
+        paragrafos = [_frase(rng, 40, 120).capitalize() + "." for _ in range(rng.randint(2, 5))]
+        conteudo = "\n\n".join(paragrafos)
+        data = INICIO + timedelta(minutes=artigo_id * 37)
+        yield (artigo_id, _frase(rng, 4, 9).capitalize(), conteudo, main.gerar_resumo(conteudo),
+               rng.choice(AUTORES), data.strftime("%Y-%m-%d %H:%M:%S"))
+
+def _gerar_resultados(rng, equipes, temporadas):
+    """Ida e volta (todas contra todas) por temporada, rondas semanais"""
+    ids = list(range(1, equipes + 1))
+    for temporada in range(temporadas):
+        inicio = INICIO + timedelta(days=365 * temporada)
+        rodizio = ids[:]
+        rondas_ida = []
+        for _ in range(equipes - 1):  # método do círculo
+            rondas_ida.append([(rodizio[i], rodizio[-1 - i]) for i in range(equipes // 2)])
+            rodizio = [rodizio[0], rodizio[-1]] + rodizio[1:-1]
+        rondas = rondas_ida + [[(fora, casa) for casa, fora in jogos] for jogos in rondas_ida]
+        for numero, jogos in enumerate(rondas, start=1):
+            data = (inicio + timedelta(days=7 * numero)).strftime("%Y-%m-%d")
+            for casa, fora in jogos:
+                yield numero, casa, fora, rng.choice((0, 0, 1, 1, 1, 2, 2, 3, 4)), rng.choice((0, 0, 1, 1, 2, 2, 3)), data
+
+def gerar_banco(caminho, artigos, temporadas, equipes, usuarios, semente=1):
+    """Cria o banco em caminho (que não deve existir) e retorna as quantidades geradas"""
+    sys.path.insert(0, BACKEND)
+    import main
+
+    rng = random.Random(semente)
+    conn = sqlite3.connect(caminho)
+    main.migrar(conn)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")  # só durante a carga
+    cursor = conn.cursor()
+
+    nomes = _nomes_equipes(equipes)
+    cursor.executemany("""
+        INSERT INTO equipes (id, posicao, nome, chave_nome, jogos, vitorias, empates, derrotas,
+                             gols_pro, gols_contra, diferenca_gols, pontos)
+        VALUES (?, ?, ?, ?, 0, 0, 0, 0, 0, 0, 0, 0)
+    """, [(i + 1, i + 1, nome, main.normalizar_nome(nome)) for i, nome in enumerate(nomes)])
+
+    totais = {equipe_id: [0] * 6 for equipe_id in range(1, equipes + 1)}
+    linhas = []
+    for ronda, casa, fora, gols_casa, gols_fora, data in _gerar_resultados(rng, equipes, temporadas):
+        linhas.append((ronda, nomes[casa - 1], nomes[fora - 1], gols_casa, gols_fora, data, casa, fora))
+        for equipe_id, pro, contra in ((casa, gols_casa, gols_fora), (fora, gols_fora, gols_casa)):
+            totais[equipe_id] = [a + b for a, b in zip(totais[equipe_id], main.totais_do_jogo(pro, contra))]
+    cursor.executemany("""
+        INSERT INTO resultados (ronda, time_casa, time_fora, gols_casa, gols_fora, data_jogo,
+                                equipe_casa_id, equipe_fora_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, linhas)
+    cursor.executemany("""
+        UPDATE equipes SET jogos = ?, vitorias = ?, empates = ?, derrotas = ?, gols_pro = ?, gols_contra = ?,
+                           diferenca_gols = ? - ?, pontos = ? * 3 + ?
+        WHERE id = ?
+    """, [(j, v, e, d, gp, gc, gp, gc, v, e, equipe_id) for equipe_id, (j, v, e, d, gp, gc) in totais.items()])
+    main.recalcular_posicoes(cursor)
+
+    artigos_gerados = _gerar_artigos(main, rng, artigos)
+    while True:
+        lote = [artigo for _, artigo in zip(range(LOTE), artigos_gerados)]
+        if not lote:
+            break
+        cursor.executemany("""
+            INSERT INTO artigos (id, titulo, conteudo, resumo, autor, data_criacao) VALUES (?, ?, ?, ?, ?, ?)
+        """, lote)
+
+    # Um único hash para todos: calcular um scrypt por usuário levaria horas
+    senha_hash = main.gerar_hash_senha(SENHA, main._scrypt_local)
+    for inicio in range(0, usuarios, LOTE):
+        cursor.executemany("""
+            INSERT INTO usuarios (email, senha, nome, telefone, tipo_usuario) VALUES (?, ?, ?, ?, ?)
+        """, [(ADMIN_EMAIL if i == 0 else f"usuario{i}@benchmark.local", senha_hash, f"Usuário {i}",
+               f"+258 84 {i % 1000:03d} {i // 1000 % 10000:04d}", 'admin' if i == 0 else 'user')
+              for i in range(inicio, min(inicio + LOTE, usuarios))])
+
+    # Como em produção, o log de alterações fica só com as mais recentes
+    cursor.execute("DELETE FROM alteracoes WHERE versao <= (SELECT MAX(versao) FROM alteracoes) - ?",
+                   (main.ALTERACOES_MANTIDAS,))
+    conn.commit()
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.close()
+    return {"artigos": artigos, "resultados": len(linhas), "equipes": equipes, "usuarios": usuarios}
+
+def main_dados(argumentos):
+    parser = argparse.ArgumentParser(description="Gera um banco sintético para os benchmarks")
+    parser.add_argument('destino')
+    parser.add_argument('--tamanho', choices=TAMANHOS, default='pequeno')
+    parser.add_argument('--semente', type=int, default=1)
+    for campo in TAMANHOS['pequeno']:
+        parser.add_argument(f'--{campo}', type=int)
+    opcoes = parser.parse_args(argumentos)
+
+    quantidades = dict(TAMANHOS[opcoes.tamanho])
+    quantidades.update({campo: getattr(opcoes, campo) for campo in quantidades if getattr(opcoes, campo) is not None})
+    destino = os.path.abspath(opcoes.destino)
+    if os.path.exists(destino):
+        parser.error(f"{destino} já existe")
+
+    # O import do main.py cria uploads/ e .secret_key no diretório atual
+    os.chdir(tempfile.mkdtemp(prefix='revista-dados-'))
+    inicio = time.perf_counter()
+    gerados = gerar_banco(destino, semente=opcoes.semente, **quantidades)
+    print(f"{destino}: {gerados} em {time.perf_counter() - inicio:.1f}s")
+
+if __name__ == "__main__":
+    main_dados(sys.argv[1:])
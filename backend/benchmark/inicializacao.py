@@ -0,0 +1,55 @@
+"""
+Mede o custo de inicialização de um worker em cada DOCS_MODO.
+
+Para cada modo, importa o main.py em processos novos (como um worker do
+gunicorn sem --preload) e mede o tempo do import, a memória residente máxima
+e a primeira requisição a /apispec.json:
+
+    cd backend && python benchmark/inicializacao.py [repeticoes]
+
+Roda num diretório temporário (banco e apispec.json próprios), sem mexer no
+revista.db do projeto.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODOS = ('dinamico', 'estatico', 'desligado')
+
+MEDICAO = """
+import resource, time
+inicio = time.perf_counter()
+import main
+importado = time.perf_counter()
+status = main.app.test_client().get('/apispec.json').status_code
+fim = time.perf_counter()
+print((importado - inicio) * 1000, (fim - importado) * 1000, status,
+      resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+"""
+
+def rodar(pasta, modo, codigo):
+    ambiente = dict(os.environ, DOCS_MODO=modo, PYTHONPATH=BACKEND)
+    return subprocess.run([sys.executable, '-c', codigo], cwd=pasta, env=ambiente,
+                          capture_output=True, text=True, check=True).stdout
+
+def main_benchmark(repeticoes):
+    pasta = tempfile.mkdtemp(prefix='revista-bench-')
+    # Passos de build/deploy: cria o banco e gera o apispec.json uma vez
+    ambiente = dict(os.environ, PYTHONPATH=BACKEND)
+    for comando in ('seed', 'gerar-apispec'):
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'main', comando],
+                       cwd=pasta, env=ambiente, check=True, capture_output=True)
+
+    print(f"{'DOCS_MODO':<10} {'import':>10} {'1º /apispec.json':>18} {'RSS máx':>10}")
+    for modo in MODOS:
+        medidas = [rodar(pasta, modo, MEDICAO).split() for _ in range(repeticoes)]
+        importacao = statistics.median(float(medida[0]) for medida in medidas)
+        primeira = statistics.median(float(medida[1]) for medida in medidas)
+        memoria = statistics.median(float(medida[3]) for medida in medidas)
+        print(f"{modo:<10} {importacao:8.0f} ms {primeira:12.1f} ms ({medidas[0][2]}) {memoria:7.1f} MB")
+
+if __name__ == "__main__":
+    main_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,109 @@
+"""
+Benchmark da serialização das listagens (GET /resultados e afins).
+
+Compara, com N linhas num banco em memória, o caminho antigo (dict montado à
+mão por índice + jsonify padrão do Flask) com o atual (linhas_como_dicts +
+JSONProviderRapido, com json e com orjson). Mede separadamente a montagem das
+linhas (consulta incluída) e a geração do corpo da resposta:
+
+    cd backend && python benchmark/serializacao.py [linhas ...]
+
+O main.py é importado dentro de um diretório temporário, para não mexer no
+revista.db nem em uploads/ do projeto.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+os.chdir(tempfile.mkdtemp(prefix='revista-bench-'))
+
+import main  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+REPETICOES = 5
+# Sem ORDER BY: a ordenação é igual para todas as variantes e só esconderia a diferença
+SELECT = """
+    SELECT id, ronda, time_casa, time_fora, gols_casa, gols_fora, data_jogo, logo_casa, logo_fora
+    FROM resultados
+"""
+
+def criar_banco(linhas):
+    conn = sqlite3.connect(':memory:')
+    conn.execute("""
+        CREATE TABLE resultados (
+            id INTEGER PRIMARY KEY, ronda INTEGER, time_casa TEXT, time_fora TEXT,
+            gols_casa INTEGER, gols_fora INTEGER, data_jogo DATE, logo_casa TEXT, logo_fora TEXT
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO resultados VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [(i, i % 30 + 1, f"Equipe Casa {i % 16}", f"Equipe Fora {i % 15}", i % 5, i % 3,
+          f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}", f"/uploads/logo_{i % 16}.png", None)
+         for i in range(1, linhas + 1)]
+    )
+    return conn
+
+def mapear_antigo(conn):
+    resultados_list = []
+    for resultado in conn.execute(SELECT).fetchall():
+        resultados_list.append({
+            "id": resultado[0],
+            "ronda": resultado[1],
+            "time_casa": resultado[2],
+            "time_fora": resultado[3],
+            "gols_casa": resultado[4],
+            "gols_fora": resultado[5],
+            "data_jogo": resultado[6],
+            "logo_casa": resultado[7],
+            "logo_fora": resultado[8]
+        })
+    return resultados_list
+
+def mapear_atual(conn):
+    return main.linhas_como_dicts(conn.execute(SELECT))
+
+def medir(mapear, conn, provider):
+    """Melhores tempos (ms) de montagem e de serialização, e o tamanho do corpo"""
+    melhor_mapa = melhor_json = float('inf')
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        linhas = mapear(conn)
+        meio = time.perf_counter()
+        corpo = provider.response(linhas).get_data()
+        fim = time.perf_counter()
+        melhor_mapa = min(melhor_mapa, meio - inicio)
+        melhor_json = min(melhor_json, fim - meio)
+    return melhor_mapa * 1000, melhor_json * 1000, len(corpo)
+
+def main_benchmark(tamanhos):
+    padrao = DefaultJSONProvider(main.app)
+    rapido_json = main.JSONProviderRapido(main.app)
+    rapido_json.usar_orjson = False
+    variantes = [("antigo (índices + jsonify)", mapear_antigo, padrao),
+                 ("linhas_como_dicts + json", mapear_atual, rapido_json)]
+    if main.orjson is not None:
+        rapido_orjson = main.JSONProviderRapido(main.app)
+        rapido_orjson.usar_orjson = True
+        variantes.append(("linhas_como_dicts + orjson", mapear_atual, rapido_orjson))
+    else:
+        print("orjson não instalado: variante orjson ignorada")
+
+    with main.app.app_context():
+        for linhas in tamanhos:
+            conn = criar_banco(linhas)
+            print(f"\n{linhas} linhas          montagem      json     total  corpo     ganho")
+            base = None
+            for nome, mapear, provider in variantes:
+                ms_mapa, ms_json, tamanho = medir(mapear, conn, provider)
+                total = ms_mapa + ms_json
+                base = base or total
+                print(f"  {nome:<28} {ms_mapa:7.1f} ms {ms_json:6.1f} ms {total:6.1f} ms "
+                      f"{tamanho / 1024:6.0f} KB {base / total:5.1f}x")
+            conn.close()
+
+if __name__ == "__main__":
+    main_benchmark([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000])
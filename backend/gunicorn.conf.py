@@ -0,0 +1,70 @@
+"""
+Configuração do gunicorn (carregada automaticamente a partir de backend/).
+
+SERVIDOR_MODO escolhe como os workers atendem as requisições:
+  - wsgi (padrão): workers síncronos servindo main:app
+  - asgi: workers uvicorn (asyncio) servindo asgi:app, que mantêm milhares de
+    conexões lentas ou ociosas abertas num único processo
+
+Antes de criar os workers, o master aplica as migrações do banco (e insere os
+dados de exemplo com SEED_EXEMPLOS=1), para que nenhum worker mexa no esquema.
+Em produção a documentação é servida pré-gerada (DOCS_MODO=estatico): o
+apispec.json também é gerado uma vez nesse momento.
+
+Com prometheus_client instalado, cada worker grava suas métricas em arquivos
+de PROMETHEUS_MULTIPROC_DIR e o /metrics de qualquer worker soma todos. A pasta
+é limpa quando o master inicia e os valores instantâneos (requisições em
+andamento, clientes ao vivo) de um worker que sai são descartados.
+"""
+import importlib.util
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+os.environ.setdefault('DOCS_MODO', 'estatico')
+
+if os.environ.get('SERVIDOR_MODO', 'wsgi').lower() == 'asgi':
+    wsgi_app = 'asgi:app'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'main:app'
+
+METRICAS = importlib.util.find_spec('prometheus_client') is not None
+METRICAS_PASTA_TEMPORARIA = METRICAS and not os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+if METRICAS_PASTA_TEMPORARIA:
+    # Definida antes de qualquer worker importar o prometheus_client
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = os.path.join(tempfile.gettempdir(), f'revista-metricas-{os.getpid()}')
+if METRICAS:
+    from prometheus_client import multiprocess  # no master só para limpar os arquivos dos workers
+
+
+def flask_cli(*argumentos, check=True):
+    # Processo separado: o master não carrega o main.py nem o flasgger.
+    # Sem métricas: os comandos não atendem requisições
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'main', *argumentos],
+                   env=dict(os.environ, METRICAS='0'), check=check)
+
+
+def on_starting(server):
+    if METRICAS:
+        # Arquivos de uma execução anterior não entram na soma
+        pasta = os.environ['PROMETHEUS_MULTIPROC_DIR']
+        shutil.rmtree(pasta, ignore_errors=True)
+        os.makedirs(pasta)
+    flask_cli('migrar')
+    if os.environ.get('SEED_EXEMPLOS') == '1':
+        flask_cli('seed')
+    if os.environ['DOCS_MODO'] == 'estatico':
+        flask_cli('gerar-apispec', check=False)
+
+
+def child_exit(server, worker):
+    if METRICAS:
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    if METRICAS_PASTA_TEMPORARIA:
+        shutil.rmtree(os.environ['PROMETHEUS_MULTIPROC_DIR'], ignore_errors=True)
@@ -1,14 +1,86 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, make_response, g, has_request_context
 from flask_cors import CORS
-from flasgger import Swagger
 import sqlite3
 import os
 import sys
-from datetime import datetime
-import uuid
+import time
+import threading
+import functools
+import itertools
+import unicodedata
+from collections import Counter, OrderedDict, deque
+from datetime import datetime, timedelta, timezone, date
+import shutil
+import tempfile
+import base64
+import hashlib
+import gzip
+import re
+import csv
+import io
+import json
+import cProfile
+import marshal
 from werkzeug.utils import secure_filename
+from werkzeug.security import safe_join
+import mimetypes
+import hmac
+import importlib.util
+import secrets
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Sem Pillow as imagens são servidas apenas no tamanho original
+    Image = None
+
+try:
+    import orjson
+except ImportError:  # Sem orjson as respostas usam o json da biblioteca padrão
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # Sem brotli as respostas são comprimidas só com gzip
+    brotli = None
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess as prometheus_multiprocess
+except ImportError:  # Sem prometheus_client não há instrumentação nem /metrics
+    prometheus_client = None
+
+# Serializador das respostas JSON: orjson (padrão quando instalado) ou json
+JSON_SERIALIZADOR = os.environ.get('JSON_SERIALIZADOR', 'orjson').lower()
+
+class JSONProviderRapido(DefaultJSONProvider):
+    """
+    Provider JSON que gera os bytes da resposta direto (sem str intermediária),
+    com orjson quando disponível. Tipos que o serializador não conhece (date,
+    datetime, Decimal...) passam pelo default do Flask, como no jsonify padrão.
+    """
+    
+    usar_orjson = orjson is not None and JSON_SERIALIZADOR == 'orjson'
+    
+    def serializar(self, obj):
+        if self.usar_orjson:
+            return orjson.dumps(obj, default=self.default,
+                                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+        return json.dumps(obj, default=self.default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.serializar(obj).decode('utf-8')
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.serializar(obj), mimetype=self.mimetype)
 
 app = Flask(__name__)
+app.json = JSONProviderRapido(app)
 
 # Configurar Swagger UI
 swagger_config = {
@@ -39,6 +111,14 @@ swagger_template = {
     "host": None,  # Será preenchido automaticamente
     "basePath": "/",
     "schemes": ["http", "https"],
+    "securityDefinitions": {
+        "Bearer": {
+            "type": "apiKey",
+            "name": "Authorization",
+            "in": "header",
+            "description": "Token de /auth/login no formato: Bearer <token>"
+        }
+    },
     "tags": [
         {
             "name": "Artigos",
@@ -67,13 +147,28 @@ swagger_template = {
     ]
 }
 
-swagger = Swagger(app, config=swagger_config, template=swagger_template)
+# Documentação da API (DOCS_MODO):
+#   - dinamico (padrão): o flasgger lê as docstrings YAML das rotas em cada worker
+#   - estatico: serve o apispec.json gerado por `flask --app main gerar-apispec`,
+#     lido do disco só na primeira requisição; o flasgger nem é importado
+#   - desligado: sem /docs nem /apispec.json
+DOCS_MODO = os.environ.get('DOCS_MODO', 'dinamico').lower()
+APISPEC_ARQUIVO = 'apispec.json'
+
+def criar_swagger():
+    from flasgger import Swagger
+    return Swagger(app, config=swagger_config, template=swagger_template)
+
+if DOCS_MODO == 'dinamico':
+    swagger = criar_swagger()
+
 # Configurar CORS para permitir todas as origens (desenvolvimento e produção)
 CORS(app, resources={
     r"/*": {
         "origins": "*",
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"]
+        "allow_headers": ["Content-Type", "Authorization"],
+        "expose_headers": ["X-Next-Cursor", "ETag"]
     }
 })
 
@@ -82,28 +177,865 @@ PORT = int(os.environ.get('PORT', 8000))
 BASE_URL = os.environ.get('BASE_URL', '')
 
 # Configuração do banco de dados
-DATABASE_URL = "revista.db"
+DATABASE_URL = os.environ.get('DATABASE_URL', 'revista.db')  # caminho do arquivo SQLite
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL').upper()  # OFF, NORMAL, FULL ou EXTRA
+SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 64 * 1024 * 1024))  # 64MB
+
+# Tabelas com contador de versão mantido por triggers (invalidação entre workers)
+TABELAS_VERSIONADAS = ('artigos', 'equipes', 'resultados', 'usuarios', 'tokens_revogados')
+
+# Configuração do cache de respostas
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 256))
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024))  # 32MB
+
+# Compressão das respostas negociada pelo Accept-Encoding. Corpos do cache de
+# respostas são comprimidos uma vez por versão dos dados (com nível mais alto)
+# e guardados junto da entrada; os demais a cada requisição, com nível rápido.
+COMPRESSAO_MIN_BYTES = int(os.environ.get('COMPRESSAO_MIN_BYTES', 1024))
+COMPRESSAO_CODIFICACOES = ('br', 'gzip') if brotli is not None else ('gzip',)  # preferência do servidor
+COMPRESSAO_NIVEIS = {  # (por requisição, guardado no cache)
+    'gzip': (6, 9),
+    'br': (4, 9),
+}
+# Acima deste tamanho o corpo do cache também usa o nível rápido: o nível alto
+# custa segundos de CPU num snapshot completo do /sync (MBs de JSON), que as
+# escritas invalidam antes de ele ser reaproveitado
+COMPRESSAO_NIVEL_ALTO_MAX_BYTES = int(os.environ.get('COMPRESSAO_NIVEL_ALTO_MAX_BYTES', 256 * 1024))
+# Formatos já comprimidos (imagens de /uploads etc.) ou que não podem ser acumulados
+COMPRESSAO_TIPOS_IGNORADOS = ('image/', 'video/', 'audio/', 'font/woff', 'application/zip',
+                              'application/gzip', 'application/octet-stream', 'text/event-stream')
+
+# Métricas no formato do Prometheus em /metrics (precisa de prometheus_client).
+# Sob o gunicorn os workers gravam em PROMETHEUS_MULTIPROC_DIR (ver
+# gunicorn.conf.py) e qualquer worker responde com a soma de todos.
+METRICAS_ATIVAS = prometheus_client is not None and os.environ.get('METRICAS', '1') != '0'
+METRICAS_BUCKETS_SQL = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+METRICAS_BUCKETS_LINHAS = (0, 1, 5, 10, 20, 50, 100, 500, 1000, 5000, 10000, 100000)
+METRICAS_BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+METRICAS_MAX_CONSULTAS = 500  # rótulos de SQL distintos por processo; os seguintes viram "outras"
+
+# Log de SQL lenta: comandos que passam de SQL_LENTA_MS (0 desliga) vão para o
+# log com o formato dos parâmetros (tipos e tamanhos, sem valores) e o plano
+SQL_LENTA_MS = float(os.environ.get('SQL_LENTA_MS', 0))
+
+# Perfil sob demanda: uma requisição com X-Perfil e token de administrador roda
+# sob o cProfile (pstats) ou um amostrador de pilhas (pilhas, formato collapsed
+# dos flamegraphs) e o resultado é gravado em PERFIL_PASTA
+PERFIL_PASTA = os.environ.get('PERFIL_PASTA', 'perfis')
+PERFIL_MODOS = ('pstats', 'pilhas')
+PERFIL_INTERVALO = float(os.environ.get('PERFIL_INTERVALO', 0.001))  # segundos entre amostras de pilhas
+
+# Critérios da classificação, em ordem. Os critérios de coluna antes de
+# confronto_direto formam o índice da tabela; confronto_direto e os critérios
+# seguintes só desempatam equipes iguais nesses critérios.
+CRITERIOS_COLUNA = ('pontos', 'diferenca_gols', 'gols_pro', 'vitorias')
+CLASSIFICACAO_CRITERIOS = [
+    criterio.strip()
+    for criterio in os.environ.get('CLASSIFICACAO_CRITERIOS', 'pontos,diferenca_gols,gols_pro,confronto_direto').split(',')
+    if criterio.strip()
+]
+for _criterio in CLASSIFICACAO_CRITERIOS:
+    if _criterio not in CRITERIOS_COLUNA + ('confronto_direto',):
+        raise ValueError(f"Critério de classificação desconhecido: {_criterio}")
+_inicio_desempate = (CLASSIFICACAO_CRITERIOS.index('confronto_direto')
+                     if 'confronto_direto' in CLASSIFICACAO_CRITERIOS else len(CLASSIFICACAO_CRITERIOS))
+CRITERIOS_INDICE = CLASSIFICACAO_CRITERIOS[:_inicio_desempate]
+CRITERIOS_DESEMPATE = CLASSIFICACAO_CRITERIOS[_inicio_desempate:]
+if not CRITERIOS_INDICE:
+    raise ValueError("CLASSIFICACAO_CRITERIOS deve começar por um critério de coluna")
 
 # Configuração para upload de imagens
-UPLOAD_FOLDER = 'uploads'
+# Absoluto: o send_from_directory resolve caminhos relativos a partir da pasta do
+# main.py, não do diretório de trabalho onde os arquivos são salvos
+UPLOAD_FOLDER = os.path.abspath('uploads')
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB
 
+# Variantes redimensionadas geradas em segundo plano após o upload (largura máxima)
+VARIANTES_FOLDER = os.path.join(UPLOAD_FOLDER, 'variantes')
+VARIANTES_IMAGEM = {'thumb': 320, 'card': 800, 'full': 1600}
+IMAGEM_WORKERS = int(os.environ.get('IMAGEM_WORKERS', 2))
+
+# Entrega de /uploads: os nomes nunca mudam de conteúdo, então o cache é imutável.
+# UPLOADS_OFFLOAD=x-accel (nginx) ou x-sendfile (Apache/lighttpd) entrega o
+# arquivo pelo proxy; o worker Python só devolve os cabeçalhos.
+UPLOADS_CACHE_MAX_AGE = 365 * 24 * 60 * 60  # 1 ano
+UPLOADS_FALLBACK_MAX_AGE = 60  # original servido no lugar de uma variante ainda não gerada
+UPLOADS_OFFLOAD = os.environ.get('UPLOADS_OFFLOAD', '').lower()
+UPLOADS_ACCEL_PREFIX = os.environ.get('UPLOADS_ACCEL_PREFIX', '/_uploads_internos').rstrip('/')
+
 # Criar pasta de uploads se não existir
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
+os.makedirs(VARIANTES_FOLDER, exist_ok=True)
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
+app.use_x_sendfile = UPLOADS_OFFLOAD == 'x-sendfile'
+
+# Configuração da importação em lote de resultados
+IMPORTACAO_MAX_ERROS = 1000  # erros detalhados na resposta (os demais só são contados)
+
+# Configuração da paginação de artigos
+ARTIGOS_POR_PAGINA = 20
+ARTIGOS_POR_PAGINA_MAX = 100
+# A ronda recomeça a cada temporada: no /bootstrap só entram os jogos da ronda
+# atual disputados até esta quantidade de dias antes do jogo mais recente
+RONDA_ATUAL_JANELA_DIAS = 90
+
+# Log de alterações para GET /sync. Guarda as últimas ALTERACOES_MANTIDAS
+# alterações; um cliente mais atrasado que isso, ou que SYNC_MAX_ALTERACOES,
+# recebe os dados completos em vez do delta.
+TABELAS_SINCRONIZADAS = ('artigos', 'equipes', 'resultados')
+ALTERACOES_MANTIDAS = int(os.environ.get('ALTERACOES_MANTIDAS', 10000))
+ALTERACOES_PODA_INTERVALO = float(os.environ.get('ALTERACOES_PODA_INTERVALO', 60.0))  # segundos
+SYNC_MAX_ALTERACOES = int(os.environ.get('SYNC_MAX_ALTERACOES', 500))
+
+# Stream ao vivo (GET /resultados/stream). Cada worker tem uma thread que lê o
+# log de alterações a cada SSE_INTERVALO segundos, só quando PRAGMA data_version
+# indica um commit, e repassa o evento já serializado a todos os seus clientes.
+SSE_INTERVALO = float(os.environ.get('SSE_INTERVALO', 0.5))  # segundos
+SSE_HEARTBEAT = float(os.environ.get('SSE_HEARTBEAT', 15.0))  # segundos sem eventos até um comentário de keep-alive
+SSE_FILA_MAX = int(os.environ.get('SSE_FILA_MAX', 64))  # eventos pendentes por cliente antes de desligá-lo
+SSE_MAX_CLIENTES = int(os.environ.get('SSE_MAX_CLIENTES', 1000))  # por worker
+SSE_RETRY_MS = 3000  # espera sugerida ao EventSource antes de reconectar
+SSE_SEM_SUPORTE_RETRY = 300  # Retry-After (s) do 503 em servidores sem suporte ao stream
+
+# Busca full-text (FTS5): peso de titulo, conteudo e autor no BM25
+BUSCA_PESOS = (10.0, 1.0, 2.0)
+BUSCA_MARCA_INICIO = '<mark>'
+BUSCA_MARCA_FIM = '</mark>'
+RESUMO_MAX_CARACTERES = 200
+
+# Hash de senhas (scrypt). O custo pode ser aumentado a qualquer momento: hashes
+# com parâmetros antigos são refeitos no próximo login. O cálculo roda num pool
+# de processos por worker, com no máximo SENHA_MAX_PENDENTES cálculos em
+# andamento; acima disso o login responde 503 em vez de tomar a CPU das leituras.
+SENHA_SCRYPT_N = int(os.environ.get('SENHA_SCRYPT_N', 2 ** 14))
+SENHA_SCRYPT_R = int(os.environ.get('SENHA_SCRYPT_R', 8))
+SENHA_SCRYPT_P = int(os.environ.get('SENHA_SCRYPT_P', 1))
+SENHA_WORKERS = int(os.environ.get('SENHA_WORKERS', 1))
+SENHA_MAX_PENDENTES = int(os.environ.get('SENHA_MAX_PENDENTES', 4))
+SENHA_ESPERA_MAX = float(os.environ.get('SENHA_ESPERA_MAX', 2.0))  # segundos na fila antes do 503
+SENHA_PRIORIDADE = int(os.environ.get('SENHA_PRIORIDADE', 5))  # nice dos processos do pool
+
+# Tokens de sessão assinados (HMAC-SHA256). A verificação não consulta o banco:
+# o token carrega o id e o tipo do usuário, e a lista de tokens revogados fica
+# em memória, relida no máximo a cada TOKEN_REVOGACAO_INTERVALO segundos quando
+# a versão da tabela tokens_revogados muda.
+SECRET_KEY_FILE = '.secret_key'
+TOKEN_VALIDADE = int(os.environ.get('TOKEN_VALIDADE', 24 * 60 * 60))  # segundos
+TOKEN_REVOGACAO_INTERVALO = float(os.environ.get('TOKEN_REVOGACAO_INTERVALO', 1.0))
+
+def carregar_chave_secreta():
+    """
+    SECRET_KEY do ambiente ou, sem ela, uma chave gerada uma vez e guardada em
+    SECRET_KEY_FILE, compartilhada por todos os workers e reinícios.
+    """
+    chave = os.environ.get('SECRET_KEY')
+    if chave:
+        return chave.encode('utf-8')
+    if not os.path.exists(SECRET_KEY_FILE):
+        temporario = f"{SECRET_KEY_FILE}.{os.getpid()}.tmp"
+        with open(temporario, 'w') as arquivo:
+            arquivo.write(secrets.token_hex(32))
+        os.chmod(temporario, 0o600)
+        try:
+            # link falha se outro worker já criou a chave: fica valendo a dele
+            os.link(temporario, SECRET_KEY_FILE)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(temporario)
+    with open(SECRET_KEY_FILE) as arquivo:
+        return arquivo.read().strip().encode('utf-8')
+
+CHAVE_SECRETA = carregar_chave_secreta()
+app.config['SECRET_KEY'] = CHAVE_SECRETA
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def init_db():
-    """Inicializa o banco de dados SQLite"""
-    conn = sqlite3.connect(DATABASE_URL)
-    cursor = conn.cursor()
+def gerar_resumo(conteudo):
+    """Gera o resumo armazenado do artigo, cortado no último espaço antes do limite"""
+    texto = " ".join(conteudo.split())
+    if len(texto) <= RESUMO_MAX_CARACTERES:
+        return texto
+    corte = texto.rfind(" ", 0, RESUMO_MAX_CARACTERES)
+    if corte <= 0:
+        corte = RESUMO_MAX_CARACTERES
+    return texto[:corte].rstrip(" ,.;:") + "…"
+
+def codificar_cursor(data_criacao, artigo_id):
+    """Cursor opaco da paginação por chave (data_criacao, id)"""
+    return base64.urlsafe_b64encode(f"{data_criacao}|{artigo_id}".encode()).decode().rstrip("=")
+
+def decodificar_cursor(cursor_param):
+    """Retorna (data_criacao, id) do cursor ou None se ele for inválido"""
+    try:
+        bruto = base64.urlsafe_b64decode(cursor_param + "=" * (-len(cursor_param) % 4)).decode()
+        data_criacao, artigo_id = bruto.rsplit("|", 1)
+        return data_criacao, int(artigo_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+# Conexões SQLite reutilizadas: uma por thread de cada worker, aberta na primeira
+# requisição e mantida durante toda a vida do processo
+_conexoes = threading.local()
+_rastreador_sql = {"callback": None}  # usado pela auditoria de planos de consulta
+
+def _abrir_conexao():
+    """Abre uma conexão SQLite com WAL e os PRAGMAs de desempenho configurados"""
+    conn = sqlite3.connect(DATABASE_URL, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+                           factory=ConexaoInstrumentada if metricas is not None or SQL_LENTA_MS else sqlite3.Connection)
+    if _rastreador_sql["callback"] is not None:
+        conn.set_trace_callback(_rastreador_sql["callback"])
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+    conn.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+    return conn
+
+def get_db():
+    """Retorna a conexão do worker atual, abrindo-a apenas na primeira vez"""
+    conn = getattr(_conexoes, 'conn', None)
+    # Após um fork (gunicorn) a conexão herdada do processo pai não pode ser usada
+    if conn is None or _conexoes.pid != os.getpid():
+        conn = _abrir_conexao()
+        versao = conn.execute("PRAGMA user_version").fetchone()[0]
+        if versao < ESQUEMA_VERSAO:
+            conn.close()
+            raise RuntimeError(
+                f"Banco na versão {versao} do esquema (esperada {ESQUEMA_VERSAO}): rode flask --app main migrar"
+            )
+        _conexoes.conn = conn
+        _conexoes.pid = os.getpid()
+        _conexoes.marca_versoes = None
+    return conn
+
+class MetricasPrometheus:
+    """Métricas exportadas em /metrics: requisições HTTP, SQL, stream ao vivo e compressão"""
+    
+    def __init__(self):
+        Counter, Gauge, Histogram = prometheus_client.Counter, prometheus_client.Gauge, prometheus_client.Histogram
+        self.duracao = Histogram('revista_http_requisicao_duracao_segundos',
+                                 'Duração das requisições até a resposta', ('rota', 'metodo', 'status'))
+        self.em_andamento = Gauge('revista_http_requisicoes_em_andamento', 'Requisições sendo atendidas',
+                                  ('rota', 'metodo'), multiprocess_mode='livesum')
+        self.bytes_requisicao = Histogram('revista_http_requisicao_bytes', 'Tamanho do corpo das requisições',
+                                          ('rota', 'metodo'), buckets=METRICAS_BUCKETS_BYTES)
+        self.bytes_resposta = Histogram('revista_http_resposta_bytes', 'Tamanho do corpo das respostas (já comprimido)',
+                                        ('rota', 'metodo'), buckets=METRICAS_BUCKETS_BYTES)
+        self.sql_duracao = Histogram('revista_sql_duracao_segundos', 'Tempo de cada comando SQL (execução e leitura)',
+                                     ('consulta',), buckets=METRICAS_BUCKETS_SQL)
+        self.sql_linhas = Histogram('revista_sql_linhas', 'Linhas lidas ou alteradas por comando SQL',
+                                    ('consulta',), buckets=METRICAS_BUCKETS_LINHAS)
+        self.sse_clientes = Gauge('revista_sse_clientes', 'Clientes conectados ao stream ao vivo',
+                                  multiprocess_mode='livesum')
+        self.compressao_bytes = Counter('revista_compressao_bytes', 'Bytes antes (entrada) e depois (saida) da compressão',
+                                        ('codificacao', 'etapa'))
+        self.compressao_cpu = Counter('revista_compressao_cpu_segundos', 'CPU gasta comprimindo respostas',
+                                      ('codificacao',))
+    
+    def registrar_sql(self, sql, duracao, linhas):
+        consulta = rotulo_consulta(sql)
+        self.sql_duracao.labels(consulta).observe(duracao)
+        self.sql_linhas.labels(consulta).observe(linhas)
+
+metricas = MetricasPrometheus() if METRICAS_ATIVAS else None
+
+_rotulos_consultas = set()
+
+@functools.lru_cache(maxsize=1024)
+def rotulo_consulta(sql):
+    """
+    SQL normalizado para o rótulo da métrica: sem literais, com listas IN (?, ...)
+    de qualquer tamanho iguais e sem a lista de colunas do SELECT, que pode vir
+    do cliente (/bootstrap?campos=). Cada rótulo vira uma série que fica no
+    /metrics e nos arquivos do multiprocess, então o total é limitado.
+    """
+    rotulo = re.sub(r"\?(?:, \?)+", "?, ...", _normalizar_sql(sql))
+    rotulo = re.sub(r"^SELECT (?:\w+, )*\w+ FROM ", "SELECT ... FROM ", rotulo)[:300]
+    if rotulo not in _rotulos_consultas:
+        if len(_rotulos_consultas) >= METRICAS_MAX_CONSULTAS:
+            return "outras"
+        _rotulos_consultas.add(rotulo)
+    return rotulo
+
+def forma_parametros(parametros):
+    """Tipos dos parâmetros (com o tamanho de textos e blobs), sem os valores"""
+    def forma(valor):
+        if isinstance(valor, (str, bytes)):
+            return f"{type(valor).__name__}[{len(valor)}]"
+        return type(valor).__name__
+    if isinstance(parametros, dict):
+        return {chave: forma(valor) for chave, valor in parametros.items()}
+    return [forma(valor) for valor in parametros]
+
+def plano_consulta(conn, sql, parametros):
+    """Detalhes do EXPLAIN QUERY PLAN, ou None se o comando não tiver plano"""
+    try:
+        # Cursor comum: o EXPLAIN não é medido nem registrado
+        cursor = sqlite3.Cursor(conn)
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", parametros)
+        return [linha[3] for linha in cursor.fetchall()]
+    except sqlite3.Error:
+        return None
+
+def registrar_sql_lenta(conn, sql, parametros, duracao, linhas, lote):
+    registro = {
+        "ms": round(duracao * 1000, 2),
+        "linhas": linhas,
+        "rota": request.url_rule.rule if has_request_context() and request.url_rule is not None else None,
+        "sql": " ".join(sql.split()),
+    }
+    if not lote:
+        registro["parametros"] = forma_parametros(parametros)
+        registro["plano"] = plano_consulta(conn, sql, parametros)
+    elif isinstance(parametros, (list, tuple)) and parametros:
+        # executemany: o tamanho do lote e a forma (e o plano) da primeira linha
+        registro["parametros"] = {"lote": len(parametros), "forma": forma_parametros(parametros[0])}
+        registro["plano"] = plano_consulta(conn, sql, parametros[0])
+    app.logger.warning("SQL lenta: %s", json.dumps(registro, ensure_ascii=False))
+
+def registrar_comando(conn, sql, parametros, duracao, linhas, lote=False):
+    """Destino de cada medição do CursorInstrumentado: /metrics e log de SQL lenta"""
+    if metricas is not None:
+        metricas.registrar_sql(sql, duracao, linhas)
+    if SQL_LENTA_MS and duracao * 1000 >= SQL_LENTA_MS:
+        registrar_sql_lenta(conn, sql, parametros, duracao, linhas, lote)
+
+class CursorInstrumentado(sqlite3.Cursor):
+    """
+    Cursor que mede cada comando SQL: o tempo do execute somado ao das leituras
+    das linhas, registrado quando o resultado acaba (ou no próximo execute, no
+    close ou quando o cursor é descartado sem ler tudo).
+    """
+    
+    _medicao = None  # [sql, parametros, segundos, linhas] do SELECT em andamento
+    
+    def _registrar(self):
+        medicao = self._medicao
+        if medicao is not None:
+            self._medicao = None
+            registrar_comando(self.connection, *medicao)
+    
+    def _leu(self, inicio, linhas, terminou):
+        medicao = self._medicao
+        if medicao is not None:
+            medicao[2] += time.perf_counter() - inicio
+            medicao[3] += linhas
+            if terminou:
+                self._registrar()
+    
+    def execute(self, sql, parametros=()):
+        self._registrar()
+        inicio = time.perf_counter()
+        super().execute(sql, parametros)
+        duracao = time.perf_counter() - inicio
+        if self.description is None:
+            # Escrita ou DDL: o comando termina no execute
+            registrar_comando(self.connection, sql, parametros, duracao, max(self.rowcount, 0))
+        else:
+            self._medicao = [sql, parametros, duracao, 0]
+        return self
+    
+    def executemany(self, sql, parametros):
+        self._registrar()
+        inicio = time.perf_counter()
+        super().executemany(sql, parametros)
+        registrar_comando(self.connection, sql, parametros, time.perf_counter() - inicio,
+                          max(self.rowcount, 0), lote=True)
+        return self
+    
+    def fetchone(self):
+        inicio = time.perf_counter()
+        linha = super().fetchone()
+        self._leu(inicio, linha is not None, linha is None)
+        return linha
+    
+    def fetchmany(self, size=None):
+        inicio = time.perf_counter()
+        linhas = super().fetchmany(self.arraysize if size is None else size)
+        self._leu(inicio, len(linhas), not linhas)
+        return linhas
+    
+    def fetchall(self):
+        inicio = time.perf_counter()
+        linhas = super().fetchall()
+        self._leu(inicio, len(linhas), True)
+        return linhas
+    
+    def __next__(self):
+        linha = self.fetchone()
+        if linha is None:
+            raise StopIteration
+        return linha
+    
+    def close(self):
+        self._registrar()
+        super().close()
+    
+    def __del__(self):
+        try:
+            self._registrar()
+        except sqlite3.Error:
+            pass  # Conexão já fechada: a medição se perde
+
+class ConexaoInstrumentada(sqlite3.Connection):
+    """Conexão cujos cursores (inclusive os de conn.execute) são CursorInstrumentado"""
+    
+    def cursor(self, factory=CursorInstrumentado):
+        return super().cursor(factory)
+    
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+    
+    def executemany(self, sql, parametros):
+        return self.cursor().executemany(sql, parametros)
+
+def _rotulos_requisicao():
+    # O padrão da rota (/artigos/<int:artigo_id>), não o caminho: um rótulo por rota
+    return (request.url_rule.rule if request.url_rule is not None else 'desconhecida', request.method)
+
+@app.before_request
+def iniciar_metricas():
+    if metricas is not None:
+        g.metricas_rotulos = _rotulos_requisicao()
+        g.metricas_inicio = time.perf_counter()
+        metricas.em_andamento.labels(*g.metricas_rotulos).inc()
+
+@app.after_request
+def registrar_metricas(response):
+    """
+    Registrado antes da compressão e dos demais hooks, roda depois deles: mede
+    a resposta como ela sai. Respostas em stream contam só até os cabeçalhos.
+    """
+    if metricas is not None and 'metricas_inicio' in g:
+        rota, metodo = g.metricas_rotulos
+        metricas.duracao.labels(rota, metodo, str(response.status_code)).observe(time.perf_counter() - g.metricas_inicio)
+        metricas.bytes_requisicao.labels(rota, metodo).observe(request.content_length or 0)
+        if response.content_length is not None:
+            metricas.bytes_resposta.labels(rota, metodo).observe(response.content_length)
+    return response
+
+@app.teardown_request
+def finalizar_metricas(exception):
+    if metricas is not None and 'metricas_rotulos' in g:
+        metricas.em_andamento.labels(*g.metricas_rotulos).dec()
+
+class AmostradorPilhas:
+    """
+    Amostra a pilha de uma thread a cada PERFIL_INTERVALO, numa thread própria,
+    e conta as pilhas no formato collapsed (raiz;...;folha quantidade) aceito
+    pelo flamegraph.pl e pelo speedscope.
+    """
+    
+    def __init__(self, thread_id):
+        self.thread_id = thread_id
+        self.contagens = Counter()
+        self.parar = threading.Event()
+        self.thread = threading.Thread(target=self._amostrar, name='perfil-pilhas', daemon=True)
+        self.thread.start()
+    
+    def _amostrar(self):
+        while not self.parar.wait(PERFIL_INTERVALO):
+            frame = sys._current_frames().get(self.thread_id)
+            pilha = []
+            while frame is not None:
+                pilha.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+                frame = frame.f_back
+            if pilha:
+                self.contagens[";".join(reversed(pilha))] += 1
+    
+    def encerrar(self):
+        self.parar.set()
+        self.thread.join()
+        return "".join(f"{pilha} {quantidade}\n" for pilha, quantidade in self.contagens.most_common())
+
+@app.before_request
+def iniciar_perfil():
+    """
+    X-Perfil: pstats|pilhas roda esta requisição sob o perfilador (só com token
+    de administrador). Registrado antes da compressão, o perfil a inclui.
+    """
+    modo = request.headers.get('X-Perfil')
+    if modo is None:
+        return None
+    if modo not in PERFIL_MODOS:
+        return jsonify({"error": f"X-Perfil deve ser {' ou '.join(PERFIL_MODOS)}"}), 400
+    carga = token_da_requisicao()
+    if carga is None or carga["tipo"] != 'admin':
+        return jsonify({"error": "X-Perfil exige token de administrador"}), 403
+    if modo == 'pstats':
+        perfilador = cProfile.Profile()
+        perfilador.enable()
+    else:
+        perfilador = AmostradorPilhas(threading.get_ident())
+    g.perfil = (modo, perfilador)
+
+def _encerrar_perfil(modo, perfilador):
+    """Para o perfilador e retorna (nome do arquivo, conteúdo)"""
+    nome = f"{request.endpoint or 'desconhecida'}-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{secrets.token_hex(2)}"
+    if modo == 'pstats':
+        perfilador.disable()
+        perfilador.create_stats()
+        return f"{nome}.pstats", marshal.dumps(perfilador.stats)
+    return f"{nome}.txt", perfilador.encerrar().encode()
+
+@app.after_request
+def gravar_perfil(response):
+    perfil = g.pop('perfil', None)
+    if perfil is not None:
+        arquivo, conteudo = _encerrar_perfil(*perfil)
+        os.makedirs(PERFIL_PASTA, exist_ok=True)
+        with open(os.path.join(PERFIL_PASTA, arquivo), 'wb') as destino:
+            destino.write(conteudo)
+        response.headers['X-Perfil-Arquivo'] = arquivo
+    return response
+
+@app.teardown_request
+def descartar_perfil(exception):
+    # Requisição que terminou sem passar pelo after_request: só desliga o perfilador
+    perfil = g.pop('perfil', None)
+    if perfil is not None:
+        _encerrar_perfil(*perfil)
+
+# Motor de classificação: cada resultado soma (ou desfaz) seus números nas
+# linhas das duas equipes e só a faixa de posições afetada é reordenada
+_CAMPOS_CLASSIFICACAO = ('id', 'nome', 'posicao') + CRITERIOS_COLUNA
+_SELECT_CLASSIFICACAO = f"SELECT {', '.join(_CAMPOS_CLASSIFICACAO)} FROM equipes"
+_ORDEM_CLASSIFICACAO = ", ".join(f"{criterio} DESC" for criterio in CRITERIOS_INDICE) + ", nome, id"
+_TUPLA_INDICE = f"({', '.join(CRITERIOS_INDICE)})"
+_MARCADORES_INDICE = f"({', '.join('?' * len(CRITERIOS_INDICE))})"
+INDICE_CLASSIFICACAO = "idx_equipes_classificacao_" + "_".join(CRITERIOS_INDICE)
+
+def linhas_como_dicts(cursor):
+    """Linhas do cursor como dicts {coluna: valor}, com os nomes de cursor.description"""
+    colunas = tuple(descricao[0] for descricao in cursor.description)
+    # map(dict, map(zip, ...)) monta os dicts em C, sem um laço Python por linha
+    return list(map(dict, map(zip, itertools.repeat(colunas), cursor.fetchall())))
+
+def linha_como_dict(cursor):
+    """Próxima linha do cursor como dict, ou None"""
+    linha = cursor.fetchone()
+    if linha is None:
+        return None
+    return dict(zip((descricao[0] for descricao in cursor.description), linha))
+
+def normalizar_nome(nome):
+    """Chave de comparação de nomes de equipe: sem acentos, caixa e espaços extras"""
+    sem_acentos = "".join(
+        caractere for caractere in unicodedata.normalize('NFKD', nome)
+        if not unicodedata.combining(caractere)
+    )
+    return " ".join(sem_acentos.casefold().split())
+
+def equipe_por_nome(cursor, nome):
+    """Retorna o id da equipe com esse nome (ignorando acentos) ou None"""
+    cursor.execute("SELECT id FROM equipes WHERE chave_nome = ? LIMIT 1", (normalizar_nome(nome),))
+    linha = cursor.fetchone()
+    return linha[0] if linha else None
+
+def aplicar_resultado(cursor, casa_id, fora_id, gols_casa, gols_fora, sinal, posicoes_antigas):
+    """
+    Soma (sinal=1) ou desfaz (sinal=-1) um resultado nas linhas das duas equipes.
     
+    posicoes_antigas recebe a posição de cada equipe antes da primeira alteração,
+    usada depois por atualizar_classificacao.
+    """
+    for equipe_id, pro, contra in ((casa_id, gols_casa, gols_fora), (fora_id, gols_fora, gols_casa)):
+        if equipe_id is not None:
+            totais = [sinal * valor for valor in totais_do_jogo(pro, contra)]
+            somar_na_equipe(cursor, equipe_id, totais, posicoes_antigas)
+
+def totais_do_jogo(pro, contra):
+    """[jogos, vitorias, empates, derrotas, gols_pro, gols_contra] de um jogo para uma equipe"""
+    return [1, int(pro > contra), int(pro == contra), int(pro < contra), pro, contra]
+
+def somar_na_equipe(cursor, equipe_id, totais, posicoes_antigas):
+    """Soma os totais (no formato de totais_do_jogo) na linha da equipe"""
+    if equipe_id not in posicoes_antigas:
+        cursor.execute("SELECT posicao FROM equipes WHERE id = ?", (equipe_id,))
+        linha = cursor.fetchone()
+        if linha is None:
+            return  # Equipe removida depois do resultado
+        posicoes_antigas[equipe_id] = linha[0]
+    
+    jogos, vitorias, empates, derrotas, gols_pro, gols_contra = totais
+    cursor.execute("""
+        UPDATE equipes
+        SET jogos = jogos + ?, vitorias = vitorias + ?, empates = empates + ?, derrotas = derrotas + ?,
+            gols_pro = gols_pro + ?, gols_contra = gols_contra + ?,
+            diferenca_gols = diferenca_gols + ?, pontos = pontos + ?
+        WHERE id = ?
+    """, (
+        jogos,
+        vitorias,
+        empates,
+        derrotas,
+        gols_pro,
+        gols_contra,
+        gols_pro - gols_contra,
+        3 * vitorias + empates,
+        equipe_id
+    ))
+
+def _chave_indice(equipe):
+    return tuple(equipe[criterio] for criterio in CRITERIOS_INDICE)
+
+def _chave_na_posicao(cursor, posicao):
+    """Chave de ordenação da equipe na posição informada (percorrendo o índice)"""
+    cursor.execute(
+        f"SELECT {', '.join(CRITERIOS_INDICE)} FROM equipes ORDER BY {_ORDEM_CLASSIFICACAO} LIMIT 1 OFFSET ?",
+        (posicao - 1,)
+    )
+    return cursor.fetchone()
+
+def _desempatar(cursor, grupo):
+    """Ordena equipes empatadas nos critérios de coluna pelos critérios de desempate"""
+    ids = [equipe['id'] for equipe in grupo]
+    confronto = {equipe_id: [0, 0, 0] for equipe_id in ids}  # pontos, saldo e gols entre si
+    
+    if 'confronto_direto' in CRITERIOS_DESEMPATE:
+        marcadores = ", ".join("?" * len(ids))
+        cursor.execute(f"""
+            SELECT equipe_casa_id, equipe_fora_id, gols_casa, gols_fora
+            FROM resultados
+            WHERE equipe_casa_id IN ({marcadores}) AND equipe_fora_id IN ({marcadores})
+        """, ids + ids)
+        for casa_id, fora_id, gols_casa, gols_fora in cursor.fetchall():
+            for equipe_id, pro, contra in ((casa_id, gols_casa, gols_fora), (fora_id, gols_fora, gols_casa)):
+                confronto[equipe_id][0] += 3 if pro > contra else (1 if pro == contra else 0)
+                confronto[equipe_id][1] += pro - contra
+                confronto[equipe_id][2] += pro
+    
+    def chave(equipe):
+        partes = []
+        for criterio in CRITERIOS_DESEMPATE:
+            if criterio == 'confronto_direto':
+                partes.extend(-valor for valor in confronto[equipe['id']])
+            else:
+                partes.append(-equipe[criterio])
+        return partes + [equipe['nome'], equipe['id']]
+    
+    return sorted(grupo, key=chave)
+
+def _ordenar_faixa(cursor, inicio, fim):
+    """Regrava posicao das equipes classificadas entre inicio e fim (inclusive)"""
+    cursor.execute(
+        f"{_SELECT_CLASSIFICACAO} ORDER BY {_ORDEM_CLASSIFICACAO} LIMIT ? OFFSET ?",
+        (fim - inicio + 1, inicio - 1)
+    )
+    equipes = [dict(zip(_CAMPOS_CLASSIFICACAO, linha)) for linha in cursor.fetchall()]
+    
+    ordenadas = []
+    for _, grupo in itertools.groupby(equipes, key=_chave_indice):
+        grupo = list(grupo)
+        if len(grupo) > 1 and CRITERIOS_DESEMPATE:
+            grupo = _desempatar(cursor, grupo)
+        ordenadas.extend(grupo)
+    
+    for posicao, equipe in enumerate(ordenadas, start=inicio):
+        if equipe['posicao'] != posicao:
+            cursor.execute("UPDATE equipes SET posicao = ? WHERE id = ?", (posicao, equipe['id']))
+
+def atualizar_classificacao(cursor, posicoes_antigas):
+    """
+    Reordena apenas a faixa da tabela entre as posições antigas e novas das
+    equipes alteradas, estendida para conter grupos de empate inteiros. A nova
+    posição de cada equipe vem de contagens no índice da classificação.
+    """
+    limites = []
+    for equipe_id, posicao_antiga in posicoes_antigas.items():
+        cursor.execute(f"SELECT {', '.join(CRITERIOS_INDICE)} FROM equipes WHERE id = ?", (equipe_id,))
+        chave = cursor.fetchone()
+        if chave is None:
+            continue
+        cursor.execute(f"SELECT COUNT(*) FROM equipes WHERE {_TUPLA_INDICE} > {_MARCADORES_INDICE}", chave)
+        acima = cursor.fetchone()[0]
+        cursor.execute(f"SELECT COUNT(*) FROM equipes WHERE {_TUPLA_INDICE} = {_MARCADORES_INDICE}", chave)
+        empatadas = cursor.fetchone()[0]
+        limites.extend([posicao_antiga, acima + 1, acima + empatadas])
+    
+    if not limites:
+        return
+    
+    inicio, fim = min(limites), max(limites)
+    while inicio > 1 and _chave_na_posicao(cursor, inicio - 1) == _chave_na_posicao(cursor, inicio):
+        inicio -= 1
+    while True:
+        seguinte = _chave_na_posicao(cursor, fim + 1)
+        if seguinte is None or seguinte != _chave_na_posicao(cursor, fim):
+            break
+        fim += 1
+    
+    _ordenar_faixa(cursor, inicio, fim)
+
+def recalcular_posicoes(cursor):
+    """Reordena a tabela inteira (usado apenas quando os critérios mudam)"""
+    cursor.execute("SELECT COUNT(*) FROM equipes")
+    total = cursor.fetchone()[0]
+    if total:
+        _ordenar_faixa(cursor, 1, total)
+
+_poda_alteracoes = {"feita_em": float('-inf')}
+
+@app.after_request
+def podar_alteracoes(response):
+    """
+    Depois de uma escrita bem-sucedida, apaga as alterações mais antigas que as
+    ALTERACOES_MANTIDAS últimas (no máximo a cada ALTERACOES_PODA_INTERVALO segundos por worker)
+    """
+    if request.method in ('POST', 'PUT', 'DELETE') and response.status_code < 400:
+        agora = time.monotonic()
+        if agora - _poda_alteracoes["feita_em"] >= ALTERACOES_PODA_INTERVALO:
+            _poda_alteracoes["feita_em"] = agora
+            conn = get_db()
+            try:
+                conn.execute(
+                    "DELETE FROM alteracoes WHERE versao <= (SELECT MAX(versao) FROM alteracoes) - ?",
+                    (ALTERACOES_MANTIDAS,)
+                )
+                conn.commit()
+            except sqlite3.OperationalError as erro:
+                # Banco ocupado: a poda fica para o próximo intervalo
+                conn.rollback()
+                app.logger.warning("Poda do log de alterações adiada: %s", erro)
+    return response
+
+@app.teardown_appcontext
+def liberar_db(exception):
+    """Desfaz transações deixadas abertas pela requisição, sem fechar a conexão"""
+    conn = getattr(_conexoes, 'conn', None)
+    if conn is not None and _conexoes.pid == os.getpid() and conn.in_transaction:
+        conn.rollback()
+
+def hash_arquivo(stream):
+    """SHA-256 do conteúdo lido em blocos, sem carregar o arquivo inteiro na memória"""
+    digest = hashlib.sha256()
+    for bloco in iter(lambda: stream.read(64 * 1024), b''):
+        digest.update(bloco)
+    return digest.hexdigest()
+
+class HashSenhaOcupado(Exception):
+    """Todas as vagas do pool de hash de senhas estão ocupadas"""
+
+_pool_senhas = {"pid": None, "executor": None, "vagas": None, "lock": threading.Lock()}
+
+def _iniciar_processo_senhas(prioridade):
+    """Baixa a prioridade dos processos do pool para não competir com as requisições"""
+    if hasattr(os, 'nice'):
+        os.nice(prioridade)
+
+def derivar_chave(senha, sal, n, r, p):
+    """
+    scrypt da senha no pool de processos. Espera até SENHA_ESPERA_MAX por uma
+    vaga e levanta HashSenhaOcupado se não houver.
+    """
+    with _pool_senhas["lock"]:
+        # O pool não sobrevive ao fork dos workers do gunicorn
+        if _pool_senhas["pid"] != os.getpid():
+            _pool_senhas["executor"] = ProcessPoolExecutor(
+                max_workers=SENHA_WORKERS,
+                initializer=_iniciar_processo_senhas,
+                initargs=(SENHA_PRIORIDADE,)
+            )
+            _pool_senhas["vagas"] = threading.BoundedSemaphore(SENHA_MAX_PENDENTES)
+            _pool_senhas["pid"] = os.getpid()
+        executor, vagas = _pool_senhas["executor"], _pool_senhas["vagas"]
+    if not vagas.acquire(timeout=SENHA_ESPERA_MAX):
+        raise HashSenhaOcupado()
+    try:
+        return executor.submit(
+            hashlib.scrypt, senha.encode('utf-8'), salt=sal, n=n, r=r, p=p,
+            maxmem=256 * n * r * (p + 1), dklen=32
+        ).result()
+    finally:
+        vagas.release()
+
+def gerar_hash_senha(senha, derivar=derivar_chave):
+    """Hash no formato scrypt$n$r$p$sal$chave (sal e chave em base64)"""
+    n, r, p = SENHA_SCRYPT_N, SENHA_SCRYPT_R, SENHA_SCRYPT_P
+    sal = secrets.token_bytes(16)
+    chave = derivar(senha, sal, n, r, p)
+    return "$".join(['scrypt', str(n), str(r), str(p),
+                     base64.b64encode(sal).decode(), base64.b64encode(chave).decode()])
+
+def verificar_senha(senha, armazenado):
+    """
+    Retorna (valida, novo_hash). novo_hash só vem preenchido quando a senha é
+    válida mas está em texto puro ou com parâmetros de custo antigos.
+    """
+    partes = armazenado.split('$')
+    if len(partes) != 6 or partes[0] != 'scrypt':
+        # Senha em texto puro (usuários criados antes do hash)
+        if hmac.compare_digest(senha.encode('utf-8'), armazenado.encode('utf-8')):
+            return True, gerar_hash_senha(senha)
+        return False, None
+    n, r, p = int(partes[1]), int(partes[2]), int(partes[3])
+    chave = derivar_chave(senha, base64.b64decode(partes[4]), n, r, p)
+    if not hmac.compare_digest(chave, base64.b64decode(partes[5])):
+        return False, None
+    if (n, r, p) != (SENHA_SCRYPT_N, SENHA_SCRYPT_R, SENHA_SCRYPT_P):
+        return True, gerar_hash_senha(senha)
+    return True, None
+
+# Hash com os parâmetros atuais que não corresponde a nenhuma senha
+HASH_SENHA_FICTICIO = "$".join(['scrypt', str(SENHA_SCRYPT_N), str(SENHA_SCRYPT_R), str(SENHA_SCRYPT_P),
+                                base64.b64encode(secrets.token_bytes(16)).decode(),
+                                base64.b64encode(secrets.token_bytes(32)).decode()])
+
+def _scrypt_local(senha, sal, n, r, p):
+    """scrypt no próprio processo (dados de exemplo, fora das requisições)"""
+    return hashlib.scrypt(senha.encode('utf-8'), salt=sal, n=n, r=r, p=p,
+                          maxmem=256 * n * r * (p + 1), dklen=32)
+
+def indexar_uploads_existentes(cursor):
+    """Registra na tabela uploads os arquivos antigos (nomes uuid) ainda não indexados"""
+    cursor.execute("SELECT filename FROM uploads")
+    indexados = {linha[0] for linha in cursor.fetchall()}
+    for filename in os.listdir(UPLOAD_FOLDER):
+        caminho = os.path.join(UPLOAD_FOLDER, filename)
+        if filename in indexados or not allowed_file(filename) or not os.path.isfile(caminho):
+            continue
+        with open(caminho, 'rb') as arquivo:
+            conteudo_hash = hash_arquivo(arquivo)
+        # O primeiro arquivo com um conteúdo fica como o canônico
+        cursor.execute(
+            "INSERT OR IGNORE INTO uploads (hash, filename, tamanho) VALUES (?, ?, ?)",
+            (conteudo_hash, filename, os.path.getsize(caminho))
+        )
+
+# Migrações do esquema, em ordem. O número do último passo aplicado fica em
+# PRAGMA user_version e só os passos seguintes rodam. Os passos também são
+# idempotentes (IF NOT EXISTS, checagem de colunas): bancos criados antes das
+# migrações já têm parte do esquema e começam com user_version 0.
+# Rodam uma vez antes dos workers (flask --app main migrar, chamado pelo
+# gunicorn.conf.py); o import do main.py não mexe no esquema.
+MIGRACOES = []
+
+def migracao(passo):
+    MIGRACOES.append(passo)
+    return passo
+
+def criar_triggers_versao(cursor, tabela):
+    """Triggers que incrementam a versão da tabela em versoes_tabelas a cada escrita"""
+    cursor.execute("INSERT OR IGNORE INTO versoes_tabelas (tabela) VALUES (?)", (tabela,))
+    for evento in ('INSERT', 'UPDATE', 'DELETE'):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{tabela}_versao_{evento.lower()}
+            AFTER {evento} ON {tabela}
+            BEGIN
+                UPDATE versoes_tabelas
+                SET versao = versao + 1, atualizado_em = CURRENT_TIMESTAMP
+                WHERE tabela = '{tabela}';
+            END
+        """)
+
+@migracao
+def migracao_tabelas_iniciais(cursor):
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS artigos (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -157,12 +1089,253 @@ def init_db():
             data_criacao DATETIME DEFAULT CURRENT_TIMESTAMP
         )
     """)
+
+@migracao
+def migracao_resumo_artigos(cursor):
+    # Resumo armazenado para a listagem leve
+    cursor.execute("PRAGMA table_info(artigos)")
+    if 'resumo' not in [coluna[1] for coluna in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE artigos ADD COLUMN resumo TEXT")
+        cursor.execute("SELECT id, conteudo FROM artigos")
+        cursor.executemany(
+            "UPDATE artigos SET resumo = ? WHERE id = ?",
+            [(gerar_resumo(conteudo), artigo_id) for artigo_id, conteudo in cursor.fetchall()]
+        )
     
-    # Inserir dados de exemplo se a tabela estiver vazia
-    cursor.execute("SELECT COUNT(*) FROM equipes")
-    count = cursor.fetchone()[0]
+    # Índice da ordenação/paginação por chave de GET /artigos
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_artigos_data_criacao ON artigos (data_criacao DESC, id DESC)")
+
+@migracao
+def migracao_versoes_tabelas(cursor):
+    # Versão de cada tabela, incrementada por triggers a cada escrita. Como fica
+    # no próprio banco, todos os workers do gunicorn enxergam o mesmo valor.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS versoes_tabelas (
+            tabela TEXT PRIMARY KEY,
+            versao INTEGER NOT NULL DEFAULT 0,
+            atualizado_em DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    for tabela in ('artigos', 'equipes', 'resultados', 'usuarios'):
+        criar_triggers_versao(cursor, tabela)
+
+@migracao
+def migracao_motor_classificacao(cursor):
+    # Colunas do motor de classificação
+    cursor.execute("PRAGMA table_info(equipes)")
+    if 'chave_nome' not in [coluna[1] for coluna in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE equipes ADD COLUMN chave_nome TEXT")
+        cursor.execute("SELECT id, nome FROM equipes")
+        cursor.executemany(
+            "UPDATE equipes SET chave_nome = ? WHERE id = ?",
+            [(normalizar_nome(nome), equipe_id) for equipe_id, nome in cursor.fetchall()]
+        )
+    
+    cursor.execute("PRAGMA table_info(resultados)")
+    if 'equipe_casa_id' not in [coluna[1] for coluna in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE resultados ADD COLUMN equipe_casa_id INTEGER REFERENCES equipes(id)")
+        cursor.execute("ALTER TABLE resultados ADD COLUMN equipe_fora_id INTEGER REFERENCES equipes(id)")
+        # 1 quando o resultado já foi somado na classificação pelo motor (removida em
+        # migracao_resultados_sem_marcador: todos os resultados estão nos totais)
+        cursor.execute("ALTER TABLE resultados ADD COLUMN na_classificacao INTEGER NOT NULL DEFAULT 0")
+    
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_equipes_chave_nome ON equipes (chave_nome)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_equipes_posicao ON equipes (posicao)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_resultados_equipe_casa ON resultados (equipe_casa_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_resultados_equipe_fora ON resultados (equipe_fora_id)")
+
+@migracao
+def migracao_busca_artigos(cursor):
+    # Índice full-text dos artigos (FTS5 com conteúdo externo, mantido por triggers).
+    # remove_diacritics faz "Ferroviario" encontrar "Ferroviário" e vice-versa.
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'artigos_fts'")
+    fts_novo = cursor.fetchone() is None
+    try:
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS artigos_fts USING fts5(
+                titulo, conteudo, autor,
+                content='artigos', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3'
+            )
+        """)
+    except sqlite3.OperationalError as erro:
+        # Sem o índice a busca não funcionaria nem seria criada depois: o passo fica
+        # pendente (user_version não avança) até o SQLite ter FTS5
+        raise RuntimeError(
+            f"O SQLite {sqlite3.sqlite_version} não tem FTS5 ({erro}), necessário para a busca de artigos: "
+            "use um Python/SQLite compilado com FTS5 e rode flask --app main migrar de novo"
+        ) from erro
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_artigos_fts_insert AFTER INSERT ON artigos
+        BEGIN
+            INSERT INTO artigos_fts (rowid, titulo, conteudo, autor)
+            VALUES (new.id, new.titulo, new.conteudo, new.autor);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_artigos_fts_delete AFTER DELETE ON artigos
+        BEGIN
+            INSERT INTO artigos_fts (artigos_fts, rowid, titulo, conteudo, autor)
+            VALUES ('delete', old.id, old.titulo, old.conteudo, old.autor);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_artigos_fts_update AFTER UPDATE OF titulo, conteudo, autor ON artigos
+        BEGIN
+            INSERT INTO artigos_fts (artigos_fts, rowid, titulo, conteudo, autor)
+            VALUES ('delete', old.id, old.titulo, old.conteudo, old.autor);
+            INSERT INTO artigos_fts (rowid, titulo, conteudo, autor)
+            VALUES (new.id, new.titulo, new.conteudo, new.autor);
+        END
+    """)
+    if fts_novo:
+        cursor.execute("INSERT INTO artigos_fts (artigos_fts) VALUES ('rebuild')")
+        # Pesos do BM25 gravados na tabela: ORDER BY rank já usa a ponderação
+        cursor.execute(
+            "INSERT INTO artigos_fts (artigos_fts, rank) VALUES ('rank', ?)",
+            (f"bm25({', '.join(str(peso) for peso in BUSCA_PESOS)})",)
+        )
+
+@migracao
+def migracao_uploads(cursor):
+    # Uploads endereçados pelo conteúdo: hash SHA-256 -> arquivo em uploads/
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS uploads (
+            hash TEXT PRIMARY KEY,
+            filename TEXT NOT NULL,
+            tamanho INTEGER NOT NULL,
+            criado_em DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    indexar_uploads_existentes(cursor)
+
+@migracao
+def migracao_tokens_revogados(cursor):
+    # Tokens revogados por /auth/logout até expirarem
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tokens_revogados (
+            jti TEXT PRIMARY KEY,
+            expira_em INTEGER NOT NULL
+        )
+    """)
+    criar_triggers_versao(cursor, 'tokens_revogados')
+
+@migracao
+def migracao_indices_listagens(cursor):
+    # Ordem de GET /resultados e GET /usuarios sem ordenação em B-tree temporária
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_resultados_ronda_data ON resultados (ronda DESC, data_jogo DESC)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_usuarios_data_criacao ON usuarios (data_criacao DESC)")
+    # Releitura da lista de revogados e limpeza dos expirados
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tokens_revogados_expira_em ON tokens_revogados (expira_em)")
+
+@migracao
+def migracao_equipes_dos_resultados(cursor):
+    # Liga os resultados antigos às equipes pelo nome sem acentos ("Ferroviario Beira"
+    # encontra "Ferroviário Beira"); nomes sem equipe cadastrada continuam NULL
+    cursor.execute("SELECT chave_nome, MIN(id) FROM equipes GROUP BY chave_nome")
+    equipes = dict(cursor.fetchall())
+    cursor.execute("""
+        SELECT id, time_casa, time_fora, equipe_casa_id, equipe_fora_id
+        FROM resultados
+        WHERE equipe_casa_id IS NULL OR equipe_fora_id IS NULL
+    """)
+    cursor.executemany(
+        "UPDATE resultados SET equipe_casa_id = ?, equipe_fora_id = ? WHERE id = ?",
+        [(casa_id or equipes.get(normalizar_nome(time_casa or "")),
+          fora_id or equipes.get(normalizar_nome(time_fora or "")),
+          resultado_id)
+         for resultado_id, time_casa, time_fora, casa_id, fora_id in cursor.fetchall()]
+    )
+    # Jogos de uma equipe já na ordem da listagem (GET /resultados?equipe_id=)
+    cursor.execute("DROP INDEX IF EXISTS idx_resultados_equipe_casa")
+    cursor.execute("DROP INDEX IF EXISTS idx_resultados_equipe_fora")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_resultados_equipe_casa_ronda ON resultados (equipe_casa_id, ronda DESC, data_jogo DESC)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_resultados_equipe_fora_ronda ON resultados (equipe_fora_id, ronda DESC, data_jogo DESC)")
+
+@migracao
+def migracao_alteracoes(cursor):
+    # AUTOINCREMENT: a versão nunca é reutilizada, nem depois da poda
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS alteracoes (
+            versao INTEGER PRIMARY KEY AUTOINCREMENT,
+            tabela TEXT NOT NULL,
+            registro_id INTEGER NOT NULL,
+            operacao TEXT NOT NULL CHECK (operacao IN ('I', 'U', 'D')),
+            criado_em DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    for tabela in TABELAS_SINCRONIZADAS:
+        for evento, linha in (('INSERT', 'new'), ('UPDATE', 'new'), ('DELETE', 'old')):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{tabela}_alteracao_{evento.lower()}
+                AFTER {evento} ON {tabela}
+                BEGIN
+                    INSERT INTO alteracoes (tabela, registro_id, operacao)
+                    VALUES ('{tabela}', {linha}.id, '{evento[0]}');
+                END
+            """)
+
+@migracao
+def migracao_indice_data_jogo(cursor):
+    # Jogo mais recente (ronda atual do /bootstrap) sem percorrer a tabela
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_resultados_data_jogo ON resultados (data_jogo)")
+
+@migracao
+def migracao_resultados_sem_marcador(cursor):
+    # Os resultados anteriores ao motor já estavam somados nos totais gravados das
+    # equipes, e editar ou remover sempre desfaz o placar antigo: todo resultado
+    # conta na classificação e no confronto direto, então o marcador sai
+    cursor.execute("PRAGMA table_info(resultados)")
+    if 'na_classificacao' in [coluna[1] for coluna in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE resultados DROP COLUMN na_classificacao")
+
+ESQUEMA_VERSAO = len(MIGRACOES)
+
+def sincronizar_indice_classificacao(cursor):
+    """
+    Índice da ordem da classificação. Depende de CLASSIFICACAO_CRITERIOS, então
+    muda de nome quando os critérios mudam, e nesse caso a tabela inteira
+    precisa ser reordenada uma vez.
+    """
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_equipes_classificacao_%'")
+    indices_classificacao = [linha[0] for linha in cursor.fetchall()]
+    for indice in indices_classificacao:
+        if indice != INDICE_CLASSIFICACAO:
+            cursor.execute(f"DROP INDEX {indice}")
+    if INDICE_CLASSIFICACAO not in indices_classificacao:
+        cursor.execute(f"CREATE INDEX {INDICE_CLASSIFICACAO} ON equipes ({_ORDEM_CLASSIFICACAO})")
+        recalcular_posicoes(cursor)
+
+def migrar(conn):
+    """Aplica as migrações pendentes, cada uma na sua transação; retorna quantas rodaram"""
+    aplicadas = 0
+    for numero, passo in enumerate(MIGRACOES, start=1):
+        # IMMEDIATE: dois processos migrando ao mesmo tempo não aplicam o mesmo passo
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= numero:
+                conn.rollback()
+                continue
+            passo(conn.cursor())
+            conn.execute(f"PRAGMA user_version = {numero}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        aplicadas += 1
+    
+    conn.execute("BEGIN IMMEDIATE")
+    sincronizar_indice_classificacao(conn.cursor())
+    conn.commit()
+    return aplicadas
+
+def semear(conn):
+    """Insere os dados de exemplo nas tabelas que estiverem vazias"""
+    cursor = conn.cursor()
     
-    if count == 0:
+    cursor.execute("SELECT COUNT(*) FROM equipes")
+    if cursor.fetchone()[0] == 0:
         equipes_exemplo = [
             (1, "UD Songo", 18, 15, 2, 1, 40, 10, 30, 47),
             (2, "Ferroviário", 18, 8, 6, 4, 15, 9, 6, 30),
@@ -181,15 +1354,13 @@ def init_db():
         ]
         
         cursor.executemany("""
-            INSERT INTO equipes (posicao, nome, jogos, vitorias, empates, derrotas, gols_pro, gols_contra, diferenca_gols, pontos)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, equipes_exemplo)
+            INSERT INTO equipes (posicao, nome, jogos, vitorias, empates, derrotas, gols_pro, gols_contra, diferenca_gols, pontos, chave_nome)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [equipe + (normalizar_nome(equipe[1]),) for equipe in equipes_exemplo])
+        recalcular_posicoes(cursor)
     
-    # Inserir dados de exemplo de resultados se a tabela estiver vazia
     cursor.execute("SELECT COUNT(*) FROM resultados")
-    count_resultados = cursor.fetchone()[0]
-    
-    if count_resultados == 0:
+    if cursor.fetchone()[0] == 0:
         resultados_exemplo = [
             (19, "Desportivo Matola", "UD Songo", 0, 4, "2024-10-28"),
             (9, "ENH Vilankulo", "Baia de Pemba", 1, 0, "2024-10-28"),
@@ -199,19 +1370,18 @@ def init_db():
             (18, "Nacala", "Ferroviario Lichinga", 2, 2, "2024-10-24"),
         ]
         
+        # Já contados na classificação de exemplo acima
         cursor.executemany("""
-            INSERT INTO resultados (ronda, time_casa, time_fora, gols_casa, gols_fora, data_jogo)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, resultados_exemplo)
+            INSERT INTO resultados (ronda, time_casa, time_fora, gols_casa, gols_fora, data_jogo, equipe_casa_id, equipe_fora_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, [resultado + (equipe_por_nome(cursor, resultado[1]), equipe_por_nome(cursor, resultado[2]))
+              for resultado in resultados_exemplo])
     
-    # Inserir usuários de exemplo
     cursor.execute("SELECT COUNT(*) FROM usuarios")
-    count_usuarios = cursor.fetchone()[0]
-    
-    if count_usuarios == 0:
+    if cursor.fetchone()[0] == 0:
         usuarios_exemplo = [
-            ("admin@mozafut.com", "123456", "Administrador", "+258 84 123 4567", "admin"),
-            ("user@mozafut.com", "123456", "Usuário", "+258 84 123 4567", "user")
+            ("admin@mozafut.com", gerar_hash_senha("123456", _scrypt_local), "Administrador", "+258 84 123 4567", "admin"),
+            ("user@mozafut.com", gerar_hash_senha("123456", _scrypt_local), "Usuário", "+258 84 123 4567", "user")
         ]
         
         cursor.executemany("""
@@ -220,10 +1390,503 @@ def init_db():
         """, usuarios_exemplo)
     
     conn.commit()
+
+@app.cli.command('migrar')
+def comando_migrar():
+    """Aplica as migrações pendentes do esquema do banco"""
+    conn = _abrir_conexao()
+    aplicadas = migrar(conn)
+    conn.close()
+    print(f"Esquema na versão {ESQUEMA_VERSAO} ({aplicadas} migrações aplicadas)")
+
+@app.cli.command('seed')
+def comando_seed():
+    """Migra o banco e insere os dados de exemplo nas tabelas vazias"""
+    conn = _abrir_conexao()
+    migrar(conn)
+    semear(conn)
     conn.close()
+    print("Dados de exemplo inseridos nas tabelas vazias")
 
-# Inicializar banco de dados
-init_db()
+# Auditoria dos planos de consulta: executa as rotas contra uma cópia do banco,
+# captura cada SQL emitido e falha se algum plano cair em SCAN sem índice ou
+# em ordenação por B-tree temporária. Consultas que podem varrer a tabela de
+# propósito ficam nesta lista, com o motivo.
+CONSULTAS_SEM_INDICE_PERMITIDAS = [
+    (r"FROM versoes_tabelas$", "uma linha por tabela versionada"),
+    (r"^SELECT k, v FROM \?\.\?$", "configuração interna do FTS5"),
+]
+
+def _normalizar_sql(sql):
+    """SQL com literais trocados por ?, para agrupar execuções da mesma consulta"""
+    sql = re.sub(r"'(?:[^']|'')*'", "?", " ".join(sql.split()))
+    return re.sub(r"\b\d+(?:\.\d+)?\b", "?", sql)
+
+def _problemas_do_plano(plano):
+    problemas = []
+    for linha in plano:
+        detalhe = linha[3]
+        if detalhe.startswith("USE TEMP B-TREE"):
+            problemas.append(detalhe)
+        elif (detalhe.startswith("SCAN ") and " USING " not in detalhe
+              and "VIRTUAL TABLE" not in detalhe and detalhe != "SCAN CONSTANT ROW"):
+            problemas.append(detalhe)
+    return problemas
+
+def _exercitar_rotas(cliente):
+    """Chama todas as rotas da API, de leitura e de escrita"""
+    def checar(resposta, *esperados):
+        if resposta.status_code not in esperados:
+            raise RuntimeError(f"{resposta.request.method} {resposta.request.path}: {resposta.status_code} {resposta.get_data(as_text=True)[:200]}")
+        return resposta
+    
+    for rota in ("/", "/cache/stats", "/artigos", "/artigos?modo=resumo", "/equipes", "/resultados",
+                 "/resultados?formato=compacto", "/resultados?equipe_id=1", "/usuarios",
+                 "/bootstrap", "/bootstrap?campos=artigos.titulo,equipes.nome", "/sync",
+                 "/artigos/busca?q=futebol", "/artigos/busca?q=fe&limit=5&offset=5"):
+        checar(cliente.get(rota), 200)
+    checar(cliente.get("/metrics"), 200 if metricas is not None else 404)
+    pagina = checar(cliente.get("/artigos?modo=resumo&limit=1"), 200)
+    if pagina.headers.get("X-Next-Cursor"):
+        checar(cliente.get(f"/artigos?modo=resumo&limit=1&cursor={pagina.headers['X-Next-Cursor']}"), 200)
+    
+    artigo = checar(cliente.post("/artigos", json={"titulo": "Auditoria", "conteudo": "Texto da auditoria", "autor": "Auditor"}), 201).json
+    checar(cliente.get(f"/artigos/{artigo['id']}"), 200)
+    checar(cliente.put(f"/artigos/{artigo['id']}", json={"titulo": "Auditoria 2", "conteudo": "Texto", "autor": "Auditor"}), 200)
+    checar(cliente.delete(f"/artigos/{artigo['id']}"), 200)
+    
+    equipe = {"nome": "Auditoria FC", "jogos": 1, "vitorias": 1, "empates": 0, "derrotas": 0, "gols_pro": 2, "gols_contra": 0}
+    equipe_id = checar(cliente.post("/equipes", json=equipe), 201).json["id"]
+    checar(cliente.put(f"/equipes/{equipe_id}", json={**equipe, "gols_pro": 3}), 200)
+    
+    jogo = {"ronda": 1, "time_casa": "Auditoria FC", "time_fora": "Auditoria FC B", "gols_casa": 1, "gols_fora": 1, "data_jogo": "2024-01-01"}
+    resultado_id = checar(cliente.post("/resultados", json=jogo), 201).json["id"]
+    checar(cliente.put(f"/resultados/{resultado_id}", json={"gols_casa": 2}), 200)
+    checar(cliente.delete(f"/resultados/{resultado_id}"), 200)
+    csv_lote = "ronda,time_casa,time_fora,gols_casa,gols_fora,data_jogo\n2,Auditoria FC,Auditoria FC B,0,3,2024-01-08\n"
+    checar(cliente.post("/resultados/importar", data=csv_lote, content_type="text/csv"), 200)
+    checar(cliente.delete(f"/equipes/{equipe_id}"), 200)
+    checar(cliente.get("/sync?desde=1"), 200)
+    # O stream não termina: só os bytes iniciais (retomada pelo Last-Event-ID) são lidos
+    checar(cliente.get("/resultados/stream"), 503)
+    stream = checar(cliente.get("/resultados/stream", headers={"Last-Event-ID": "1"}, buffered=False,
+                                environ_overrides={"wsgi.multithread": True}), 200)
+    next(stream.response)
+    stream.close()
+    
+    email = f"auditoria-{secrets.token_hex(4)}@revista.local"
+    usuario = checar(cliente.post("/auth/register", json={"email": email, "password": "auditoria", "name": "Auditoria"}), 200).json
+    checar(cliente.post("/auth/login", json={"email": email, "password": "auditoria"}), 200)
+    checar(cliente.post("/auth/login", json={"email": email, "password": "errada"}), 401)
+    cabecalho = {"Authorization": f"Bearer {usuario['token']}"}
+    carga = ler_token(usuario["token"])
+    checar(cliente.get(f"/usuarios/{carga['sub']}"), 200)
+    checar(cliente.put("/auth/profile", json={"id": carga["sub"], "name": "Auditoria", "email": email}, headers=cabecalho), 200)
+    checar(cliente.post("/auth/logout", headers=cabecalho), 200)
+    _tokens_revogados["verificado_em"] = 0.0  # força a releitura da lista
+    checar(cliente.put("/auth/profile", json={"id": carga["sub"]}, headers=cabecalho), 401)
+    
+    if Image is not None:
+        imagem = io.BytesIO()
+        Image.new("RGB", (4, 4), (200, 30, 30)).save(imagem, format="PNG")
+        imagem.seek(0)
+        upload = checar(cliente.post("/upload", data={"file": (imagem, "auditoria.png")},
+                                     content_type="multipart/form-data"), 200).json
+        checar(cliente.get(upload["image_url"].replace(BASE_URL, "")), 200)
+
+@app.cli.command('auditar-consultas')
+def comando_auditar_consultas():
+    """Roda EXPLAIN QUERY PLAN em todo SQL emitido pelas rotas e falha em SCAN/TEMP B-TREE"""
+    global DATABASE_URL, UPLOAD_FOLDER, VARIANTES_FOLDER
+    originais = (DATABASE_URL, UPLOAD_FOLDER, VARIANTES_FOLDER)
+    # Cópia do banco e uploads (com as variantes) numa pasta temporária, apagada
+    # no final: a auditoria não deixa nada no banco nem em uploads/ do projeto
+    pasta = tempfile.mkdtemp(prefix='revista-auditoria-')
+    copia = os.path.join(pasta, 'revista.db')
+    origem = _abrir_conexao()
+    destino = sqlite3.connect(copia)
+    origem.backup(destino)
+    origem.close()
+    destino.close()
+    DATABASE_URL = copia
+    UPLOAD_FOLDER = app.config['UPLOAD_FOLDER'] = os.path.join(pasta, 'uploads')
+    VARIANTES_FOLDER = os.path.join(UPLOAD_FOLDER, 'variantes')
+    os.makedirs(VARIANTES_FOLDER)
+    _conexoes.conn = None
+    try:
+        falhas = _auditar_copia(copia)
+    finally:
+        DATABASE_URL, UPLOAD_FOLDER, VARIANTES_FOLDER = originais
+        app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+        _conexoes.conn = None
+        shutil.rmtree(pasta, ignore_errors=True)
+    if falhas:
+        raise SystemExit(1)
+
+def _auditar_copia(copia):
+    """Exercita as rotas contra a cópia, imprime o plano de cada SQL e retorna quantos falharam"""
+    conn = _abrir_conexao()
+    migrar(conn)
+    semear(conn)
+    admin_id = conn.execute("SELECT id FROM usuarios WHERE tipo_usuario = 'admin' ORDER BY id LIMIT 1").fetchone()[0]
+    conn.close()
+    
+    capturadas = {}
+    _rastreador_sql["callback"] = lambda sql: capturadas.setdefault(_normalizar_sql(sql), sql)
+    cliente = app.test_client()
+    cliente.environ_base["HTTP_AUTHORIZATION"] = f"Bearer {emitir_token(admin_id, 'admin')[0]}"
+    try:
+        _exercitar_rotas(cliente)
+    finally:
+        _rastreador_sql["callback"] = None
+        # As variantes agendadas terminam antes de a pasta temporária ser apagada
+        _pool_imagens["executor"] and _pool_imagens["executor"].shutdown(wait=True)
+        _pool_imagens["pid"] = None
+    
+    auditoria = sqlite3.connect(copia)
+    falhas = 0
+    # Comandos sem plano e SQL interno do SQLite (comentários "--", como as escritas do FTS5)
+    ignorar = re.compile(r"^(--|(PRAGMA|BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE|CREATE|DROP|ALTER)\b)", re.IGNORECASE)
+    for normalizada, sql in sorted(capturadas.items()):
+        if ignorar.match(normalizada):
+            continue
+        plano = auditoria.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+        problemas = _problemas_do_plano(plano)
+        permitida = next((motivo for padrao, motivo in CONSULTAS_SEM_INDICE_PERMITIDAS
+                          if re.search(padrao, normalizada)), None)
+        if problemas and permitida is None:
+            falhas += 1
+            situacao = "FALHA"
+        else:
+            situacao = "ok" if not problemas else f"permitida ({permitida})"
+        print(f"[{situacao}] {normalizada}")
+        for linha in plano:
+            print(f"    {linha[3]}")
+    auditoria.close()
+    
+    print(f"\n{len(capturadas)} consultas distintas, {falhas} com plano sem índice")
+    return falhas
+
+def versoes_tabelas():
+    """
+    Retorna {tabela: (versao, atualizado_em)} das tabelas versionadas.
+    
+    A tabela versoes_tabelas só é relida quando o banco mudou: PRAGMA data_version
+    muda quando outra conexão (outro worker) faz commit e total_changes quando
+    esta própria conexão escreve.
+    """
+    conn = get_db()
+    marca = (conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes)
+    if _conexoes.marca_versoes != marca:
+        cursor = conn.execute("SELECT tabela, versao, atualizado_em FROM versoes_tabelas")
+        _conexoes.versoes = {tabela: (versao, atualizado_em) for tabela, versao, atualizado_em in cursor}
+        _conexoes.marca_versoes = marca
+    return _conexoes.versoes
+
+class CacheRespostas:
+    """Cache LRU de respostas já serializadas, limitado por entradas e por bytes"""
+    
+    def __init__(self, max_entradas, max_bytes):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.entradas = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+    
+    def obter(self, chave, geracao):
+        """Retorna a entrada guardada se ela ainda for da geração atual dos dados"""
+        with self.lock:
+            entrada = self.entradas.get(chave)
+            if entrada is None or entrada['geracao'] != geracao:
+                self.misses += 1
+                return None
+            self.entradas.move_to_end(chave)
+            self.hits += 1
+            return entrada
+    
+    @staticmethod
+    def _tamanho(entrada):
+        return len(entrada['corpo']) + sum(len(corpo) for corpo in entrada['variantes'].values())
+    
+    def _liberar_espaco(self):
+        while len(self.entradas) > self.max_entradas or self.bytes > self.max_bytes:
+            _, removida = self.entradas.popitem(last=False)
+            self.bytes -= self._tamanho(removida)
+            self.evictions += 1
+    
+    def guardar(self, chave, geracao, corpo, headers):
+        """Guarda a resposta e retorna a entrada (None se o corpo não couber no cache)"""
+        if len(corpo) > self.max_bytes:
+            return None
+        entrada = {"chave": chave, "geracao": geracao, "corpo": corpo, "headers": headers, "variantes": {}}
+        with self.lock:
+            anterior = self.entradas.pop(chave, None)
+            if anterior is not None:
+                self.bytes -= self._tamanho(anterior)
+            self.entradas[chave] = entrada
+            self.bytes += len(corpo)
+            self._liberar_espaco()
+        return entrada
+    
+    def guardar_variante(self, entrada, codificacao, corpo):
+        """Guarda o corpo comprimido junto da entrada, contando seus bytes no limite do cache"""
+        with self.lock:
+            if codificacao in entrada['variantes']:
+                return
+            entrada['variantes'][codificacao] = corpo
+            if self.entradas.get(entrada['chave']) is entrada:
+                self.bytes += len(corpo)
+                self._liberar_espaco()
+    
+    def estatisticas(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "entradas": len(self.entradas),
+                "bytes": self.bytes,
+                "max_entradas": self.max_entradas,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0
+            }
+
+cache_respostas = CacheRespostas(RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_MAX_BYTES)
+
+class EstatisticasCompressao:
+    """Respostas comprimidas, bytes economizados e CPU gasta, por codificação"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.codificacoes = {
+            codificacao: {"comprimidas": 0, "reaproveitadas": 0, "bytes_entrada": 0, "bytes_saida": 0, "segundos_cpu": 0.0}
+            for codificacao in COMPRESSAO_CODIFICACOES
+        }
+    
+    def registrar(self, codificacao, bytes_entrada, bytes_saida, segundos_cpu=None):
+        """segundos_cpu None indica uma variante reaproveitada do cache"""
+        with self.lock:
+            contadores = self.codificacoes[codificacao]
+            if segundos_cpu is None:
+                contadores["reaproveitadas"] += 1
+            else:
+                contadores["comprimidas"] += 1
+                contadores["segundos_cpu"] += segundos_cpu
+            contadores["bytes_entrada"] += bytes_entrada
+            contadores["bytes_saida"] += bytes_saida
+        if metricas is not None:
+            metricas.compressao_bytes.labels(codificacao, 'entrada').inc(bytes_entrada)
+            metricas.compressao_bytes.labels(codificacao, 'saida').inc(bytes_saida)
+            if segundos_cpu is not None:
+                metricas.compressao_cpu.labels(codificacao).inc(segundos_cpu)
+    
+    def estatisticas(self):
+        with self.lock:
+            return {
+                codificacao: {**contadores, "segundos_cpu": round(contadores["segundos_cpu"], 6),
+                              "taxa": round(contadores["bytes_saida"] / contadores["bytes_entrada"], 4)
+                              if contadores["bytes_entrada"] else 0.0}
+                for codificacao, contadores in self.codificacoes.items()
+            }
+
+estatisticas_compressao = EstatisticasCompressao()
+
+def comprimir(corpo, codificacao, para_cache=False):
+    nivel = COMPRESSAO_NIVEIS[codificacao][1 if para_cache and len(corpo) <= COMPRESSAO_NIVEL_ALTO_MAX_BYTES else 0]
+    if codificacao == 'br':
+        return brotli.compress(corpo, quality=nivel)
+    return gzip.compress(corpo, compresslevel=nivel, mtime=0)
+
+@app.after_request
+def comprimir_resposta(response):
+    """
+    Comprime respostas 200 a partir de COMPRESSAO_MIN_BYTES com a codificação
+    preferida do cliente. Arquivos servidos direto do disco, streams e tipos de
+    COMPRESSAO_TIPOS_IGNORADOS passam sem alteração.
+    """
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed or
+            'Content-Encoding' in response.headers or
+            (response.mimetype or '').startswith(COMPRESSAO_TIPOS_IGNORADOS)):
+        return response
+    corpo = response.get_data()
+    if len(corpo) < COMPRESSAO_MIN_BYTES:
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    codificacao = request.accept_encodings.best_match(COMPRESSAO_CODIFICACOES)
+    if codificacao is None:
+        return response
+    
+    entrada = g.get('entrada_cache')
+    comprimido = entrada['variantes'].get(codificacao) if entrada is not None else None
+    if comprimido is None:
+        inicio = time.thread_time()
+        comprimido = comprimir(corpo, codificacao, para_cache=entrada is not None)
+        estatisticas_compressao.registrar(codificacao, len(corpo), len(comprimido), time.thread_time() - inicio)
+        if entrada is not None:
+            cache_respostas.guardar_variante(entrada, codificacao, comprimido)
+    else:
+        estatisticas_compressao.registrar(codificacao, len(corpo), len(comprimido))
+    
+    response.set_data(comprimido)
+    response.headers['Content-Encoding'] = codificacao
+    # Cada variante tem seu próprio ETag; make_conditional responde 304 a quem já a tem
+    etag, fraco = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{codificacao}", weak=fraco)
+        response.make_conditional(request)
+    return response
+
+def resposta_condicional(*tabelas):
+    """
+    Adiciona ETag e Last-Modified derivados das versões das tabelas informadas e
+    responde 304 a If-None-Match / If-Modified-Since sem executar a rota.
+    """
+    def decorador(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            versoes = versoes_tabelas()
+            assinatura = "|".join(
+                [request.path, request.query_string.decode('latin-1')] +
+                [f"{tabela}:{versoes[tabela][0]}" for tabela in tabelas]
+            )
+            etag = hashlib.sha1(assinatura.encode()).hexdigest()[:24]
+            ultima_alteracao = max(
+                datetime.strptime(versoes[tabela][1], "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+                for tabela in tabelas
+            )
+            
+            # If-Modified-Since só é considerado quando não há If-None-Match (RFC 9110).
+            # O cliente pode devolver o ETag de uma variante comprimida (etag-gzip...)
+            etag_recebido = None
+            if request.if_none_match:
+                etag_recebido = next((
+                    candidato for candidato in [etag] + [f"{etag}-{codificacao}" for codificacao in COMPRESSAO_CODIFICACOES]
+                    if request.if_none_match.contains(candidato)
+                ), None)
+                nao_modificado = etag_recebido is not None
+            else:
+                nao_modificado = (request.if_modified_since is not None and
+                                  ultima_alteracao <= request.if_modified_since)
+            
+            if nao_modificado:
+                response = app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            
+            response.set_etag(etag_recebido if nao_modificado and etag_recebido else etag)
+            # Last-Modified tem resolução de um segundo: outra escrita ainda neste
+            # segundo manteria o mesmo valor e um cliente só com If-Modified-Since
+            # receberia 304 com dados velhos. Até o segundo terminar, o validador
+            # enviado é o segundo anterior, e o próximo If-Modified-Since recebe 200
+            agora = datetime.now(timezone.utc).replace(microsecond=0)
+            response.last_modified = min(ultima_alteracao, agora - timedelta(seconds=1))
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorador
+
+def cache_resposta(*tabelas, chave_args=None):
+    """
+    Guarda a resposta 200 da rota GET, por caminho e query string, até que a
+    versão de alguma das tabelas informadas mude. chave_args(request.args)
+    substitui a query string na chave quando parâmetros diferentes pedem a
+    mesma resposta.
+    """
+    def decorador(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            versoes = versoes_tabelas()
+            geracao = tuple(versoes[tabela][0] for tabela in tabelas)
+            argumentos = chave_args(request.args) if chave_args else tuple(sorted(request.args.items(multi=True)))
+            chave = (request.path, argumentos)
+            
+            entrada = cache_respostas.obter(chave, geracao)
+            if entrada is not None:
+                g.entrada_cache = entrada  # comprimir_resposta reaproveita as variantes comprimidas
+                return app.response_class(entrada['corpo'], status=200, headers=entrada['headers'])
+            
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                headers = [(nome, valor) for nome, valor in response.headers if nome != 'Content-Length']
+                g.entrada_cache = cache_respostas.guardar(chave, geracao, response.get_data(), headers)
+            return response
+        return wrapper
+    return decorador
+
+def _b64url(dados):
+    return base64.urlsafe_b64encode(dados).decode().rstrip("=")
+
+def _assinar(corpo):
+    return _b64url(hmac.new(CHAVE_SECRETA, corpo.encode(), hashlib.sha256).digest())
+
+def emitir_token(usuario_id, tipo_usuario):
+    """Retorna (token, expira_em) para o usuário"""
+    expira_em = int(time.time()) + TOKEN_VALIDADE
+    carga = {"sub": usuario_id, "tipo": tipo_usuario, "exp": expira_em, "jti": secrets.token_hex(8)}
+    corpo = _b64url(json.dumps(carga, separators=(',', ':')).encode())
+    return f"{corpo}.{_assinar(corpo)}", expira_em
+
+def ler_token(token):
+    """Retorna a carga do token se a assinatura e a validade conferirem, senão None"""
+    try:
+        corpo, assinatura = token.split('.')
+        if not hmac.compare_digest(assinatura, _assinar(corpo)):
+            return None
+        carga = json.loads(base64.urlsafe_b64decode(corpo + "=" * (-len(corpo) % 4)))
+    except (ValueError, UnicodeError):
+        return None
+    if carga.get("exp", 0) <= time.time():
+        return None
+    return carga
+
+_tokens_revogados = {"jtis": {}, "versao": None, "verificado_em": 0.0}
+
+def token_revogado(jti):
+    """Consulta a lista em memória, relendo-a só quando a tabela mudou"""
+    agora = time.monotonic()
+    if agora - _tokens_revogados["verificado_em"] >= TOKEN_REVOGACAO_INTERVALO:
+        _tokens_revogados["verificado_em"] = agora
+        versao = versoes_tabelas()['tokens_revogados'][0]
+        if versao != _tokens_revogados["versao"]:
+            cursor = get_db().execute(
+                "SELECT jti, expira_em FROM tokens_revogados WHERE expira_em > ?", (int(time.time()),)
+            )
+            _tokens_revogados["jtis"] = dict(cursor.fetchall())
+            _tokens_revogados["versao"] = versao
+    return jti in _tokens_revogados["jtis"]
+
+def token_da_requisicao():
+    """Carga do token Authorization: Bearer da requisição, ou None se ausente, inválido, expirado ou revogado"""
+    esquema, _, token = request.headers.get('Authorization', '').partition(' ')
+    carga = ler_token(token.strip()) if esquema.lower() == 'bearer' else None
+    if carga is None or token_revogado(carga["jti"]):
+        return None
+    return carga
+
+def requer_token(admin=False):
+    """
+    Exige um token válido no cabeçalho Authorization: Bearer <token> e guarda a
+    carga em g.usuario. Com admin=True, só aceita tipo_usuario 'admin'.
+    """
+    def decorador(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            carga = token_da_requisicao()
+            if carga is None:
+                return jsonify({"error": "Token ausente, inválido ou expirado"}), 401, {"WWW-Authenticate": "Bearer"}
+            if admin and carga["tipo"] != 'admin':
+                return jsonify({"error": "Acesso restrito a administradores"}), 403
+            g.usuario = carga
+            return view(*args, **kwargs)
+        return wrapper
+    return decorador
 
 # Rotas da API
 @app.route("/", methods=["GET"])
@@ -280,18 +1943,671 @@ def root():
             "root": "/",
             "docs": "/docs",
             "artigos": "/artigos",
+            "busca": "/artigos/busca?q=",
             "equipes": "/equipes",
             "resultados": "/resultados",
+            "ao_vivo": "/resultados/stream",
+            "bootstrap": "/bootstrap",
+            "sync": "/sync?desde=",
             "usuarios": "/usuarios",
             "login": "/auth/login",
-            "register": "/auth/register"
+            "register": "/auth/register",
+            "logout": "/auth/logout",
+            "cache": "/cache/stats",
+            "metricas": "/metrics"
         },
         "database": "SQLite (revista.db)",
         "cors": "Habilitado para todas as origens",
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     })
 
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    """
+    Estatísticas do cache de respostas
+    ---
+    tags:
+      - default
+    summary: Estatísticas do cache de respostas
+    description: >
+      Hits, misses e ocupação do cache de respostas deste worker, e a compressão
+      das respostas por codificação (bytes antes e depois e CPU gasta)
+    produces:
+      - application/json
+    responses:
+      200:
+        description: Estatísticas do cache
+    """
+    return jsonify({"pid": os.getpid(), **cache_respostas.estatisticas(),
+                    "compressao": estatisticas_compressao.estatisticas()})
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """
+    Métricas no formato do Prometheus
+    ---
+    tags:
+      - default
+    summary: Métricas para o Prometheus
+    description: >
+      Latência por rota, método e status, requisições em andamento, tamanhos de
+      requisição e resposta, tempo e linhas de cada comando SQL, clientes do
+      stream ao vivo e compressão. Sob o gunicorn, somadas de todos os workers.
+    produces:
+      - text/plain
+    responses:
+      200:
+        description: Métricas no formato de texto do Prometheus
+      404:
+        description: Métricas desativadas (sem prometheus_client ou com METRICAS=0)
+    """
+    if metricas is None:
+        return jsonify({"error": "Métricas desativadas"}), 404
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registro = prometheus_client.CollectorRegistry()
+        prometheus_multiprocess.MultiProcessCollector(registro)
+    else:
+        registro = prometheus_client.REGISTRY
+    return app.response_class(prometheus_client.generate_latest(registro),
+                              content_type=prometheus_client.CONTENT_TYPE_LATEST)
+
+# Campos que podem ser pedidos em GET /bootstrap?campos= (resultados só por seção inteira)
+BOOTSTRAP_CAMPOS = {
+    'artigos': ('id', 'titulo', 'resumo', 'autor', 'imagem_url', 'data_criacao'),
+    'equipes': ('id', 'posicao', 'nome', 'jogos', 'vitorias', 'empates', 'derrotas',
+                'gols_pro', 'gols_contra', 'diferenca_gols', 'pontos', 'logo_url'),
+    'resultados': (),
+}
+
+def campos_bootstrap(parametro):
+    """
+    Interpreta campos=artigos.titulo,equipes,... em {seção: campos}. Uma seção
+    sem campos vem inteira; sem o parâmetro, todas as seções vêm inteiras.
+    """
+    if not parametro:
+        return dict(BOOTSTRAP_CAMPOS)
+    selecao = {}
+    for item in parametro.split(','):
+        secao, _, campo = item.strip().partition('.')
+        if secao not in BOOTSTRAP_CAMPOS:
+            raise ValueError(f"Seção desconhecida: {secao}")
+        if not campo:
+            selecao[secao] = BOOTSTRAP_CAMPOS[secao]
+        elif campo not in BOOTSTRAP_CAMPOS[secao]:
+            raise ValueError(f"Campo desconhecido: {item.strip()}")
+        elif selecao.get(secao) != BOOTSTRAP_CAMPOS[secao]:
+            selecao.setdefault(secao, ())
+            if campo not in selecao[secao]:
+                selecao[secao] += (campo,)
+    # Ordem canônica: permutações do mesmo pedido geram o mesmo SQL e a mesma entrada no cache
+    return {secao: tuple(campo for campo in campos if campo in selecao[secao])
+            for secao, campos in BOOTSTRAP_CAMPOS.items() if secao in selecao}
+
+def chave_bootstrap(args):
+    """Parte da chave do cache de /bootstrap: a seleção normalizada, não o texto de campos"""
+    try:
+        return tuple(campos_bootstrap(args.get('campos')).items())
+    except ValueError:
+        return tuple(sorted(args.items(multi=True)))  # 400, que não entra no cache
+
+@app.route("/bootstrap", methods=["GET"])
+@resposta_condicional('artigos', 'equipes', 'resultados')
+@cache_resposta('artigos', 'equipes', 'resultados', chave_args=chave_bootstrap)
+def get_bootstrap():
+    """
+    Dados iniciais do app numa única requisição
+    ---
+    tags:
+      - default
+    summary: Dados iniciais do app
+    description: >
+      Primeira página de artigos (com resumo), classificação e resultados da
+      ronda do jogo mais recente (no formato compacto de /resultados), lidos na mesma
+      transação. Com campos é possível escolher seções e campos, por exemplo
+      campos=artigos.id,artigos.titulo,equipes. Responde com ETag e 304.
+    produces:
+      - application/json
+    parameters:
+      - in: query
+        name: campos
+        type: string
+        required: false
+        description: Seções (artigos, equipes, resultados) ou campos (artigos.titulo) separados por vírgula
+    responses:
+      200:
+        description: Seções pedidas
+        schema:
+          type: object
+          properties:
+            artigos:
+              type: object
+              properties:
+                itens:
+                  type: array
+                  items:
+                    type: object
+                proximo_cursor:
+                  type: string
+                  description: Cursor de GET /artigos?modo=resumo para a próxima página
+            equipes:
+              type: array
+              items:
+                type: object
+            resultados:
+              type: object
+              properties:
+                ronda:
+                  type: integer
+                equipes:
+                  type: object
+                resultados:
+                  type: array
+                  items:
+                    type: object
+      304:
+        description: Não modificado desde o ETag informado
+      400:
+        description: Seção ou campo desconhecido
+    """
+    try:
+        selecao = campos_bootstrap(request.args.get('campos'))
+    except ValueError as erro:
+        return jsonify({"error": str(erro)}), 400
+    
+    conn = get_db()
+    cursor = conn.cursor()
+    dados = {}
+    
+    # Uma transação de leitura: as três seções vêm do mesmo instante do banco
+    conn.execute("BEGIN")
+    try:
+        if 'artigos' in selecao:
+            campos = selecao['artigos']
+            # id e data_criacao são lidos sempre para montar o cursor da próxima página
+            lidos = tuple(dict.fromkeys(campos + ('id', 'data_criacao')))
+            cursor.execute(
+                f"SELECT {', '.join(lidos)} FROM artigos ORDER BY data_criacao DESC, id DESC LIMIT ?",
+                (ARTIGOS_POR_PAGINA + 1,)
+            )
+            artigos = linhas_como_dicts(cursor)
+            proximo_cursor = None
+            if len(artigos) > ARTIGOS_POR_PAGINA:
+                artigos = artigos[:ARTIGOS_POR_PAGINA]
+                proximo_cursor = codificar_cursor(artigos[-1]["data_criacao"], artigos[-1]["id"])
+            if lidos != campos:
+                artigos = [{campo: artigo[campo] for campo in campos} for artigo in artigos]
+            dados['artigos'] = {"itens": artigos, "proximo_cursor": proximo_cursor}
+        
+        if 'equipes' in selecao:
+            cursor.execute(f"SELECT {', '.join(selecao['equipes'])} FROM equipes ORDER BY posicao ASC")
+            dados['equipes'] = linhas_como_dicts(cursor)
+        
+        if 'resultados' in selecao:
+            # A ronda do jogo mais recente: MAX(ronda) pegaria uma temporada antiga
+            cursor.execute("SELECT ronda, data_jogo FROM resultados ORDER BY data_jogo DESC, id DESC LIMIT 1")
+            ronda, data_jogo = cursor.fetchone() or (None, None)
+            cursor.execute(
+                f"""SELECT {COLUNAS_RESULTADO_COMPACTO} FROM resultados
+                    WHERE ronda = ? AND data_jogo >= date(?, ?) ORDER BY data_jogo DESC""",
+                (ronda, data_jogo, f"-{RONDA_ATUAL_JANELA_DIAS} days")
+            )
+            dados['resultados'] = {"ronda": ronda, **resultados_compactos(cursor, cursor.fetchall())}
+    finally:
+        conn.rollback()
+    
+    return jsonify(dados)
+
+# Colunas e ordem de cada tabela em GET /sync (as mesmas das listagens)
+SYNC_CONSULTAS = {
+    'artigos': ("id, titulo, resumo, autor, imagem_url, data_criacao", "data_criacao DESC, id DESC"),
+    'equipes': (", ".join(BOOTSTRAP_CAMPOS['equipes']), "posicao ASC"),
+    'resultados': ("id, ronda, time_casa, time_fora, equipe_casa_id, equipe_fora_id, "
+                   "gols_casa, gols_fora, data_jogo, logo_casa, logo_fora", "ronda DESC, data_jogo DESC"),
+}
+SYNC_LOTE_IDS = 500  # ids por consulta IN (...)
+
+def limites_alteracoes(cursor):
+    """(menor versão ainda no log ou None, versão atual)"""
+    # Subconsultas separadas: MIN e MAX juntos no mesmo SELECT varrem a tabela
+    cursor.execute("SELECT (SELECT MIN(versao) FROM alteracoes), (SELECT MAX(versao) FROM alteracoes)")
+    menor, versao = cursor.fetchone()
+    return menor, versao or 0
+
+def delta_disponivel(desde, menor, versao):
+    """Se as alterações entre desde e versao ainda estão no log e cabem num delta"""
+    return (desde <= versao and versao - desde <= SYNC_MAX_ALTERACOES and
+            (menor is None or desde >= menor - 1))
+
+def delta_alteracoes(cursor, desde, ate=None, tabelas=TABELAS_SINCRONIZADAS):
+    """
+    Compacta as alterações posteriores a desde (até a versão ate, inclusive):
+    por tabela, a última operação de cada registro decide se ele vai em
+    alterados (linha atual) ou em removidos
+    """
+    ultimas = {tabela: {} for tabela in tabelas}
+    if ate is None:
+        cursor.execute("SELECT tabela, registro_id, operacao FROM alteracoes WHERE versao > ? ORDER BY versao", (desde,))
+    else:
+        cursor.execute("""
+            SELECT tabela, registro_id, operacao FROM alteracoes
+            WHERE versao > ? AND versao <= ? ORDER BY versao
+        """, (desde, ate))
+    for tabela, registro_id, operacao in cursor.fetchall():
+        if tabela in ultimas:
+            ultimas[tabela][registro_id] = operacao
+    
+    delta = {}
+    for tabela, operacoes in ultimas.items():
+        colunas, ordem = SYNC_CONSULTAS[tabela]
+        ids = [registro_id for registro_id, operacao in operacoes.items() if operacao != 'D']
+        alterados = []
+        for inicio in range(0, len(ids), SYNC_LOTE_IDS):
+            lote = ids[inicio:inicio + SYNC_LOTE_IDS]
+            cursor.execute(f"SELECT {colunas} FROM {tabela} WHERE id IN ({', '.join('?' * len(lote))})", lote)
+            alterados.extend(linhas_como_dicts(cursor))
+        delta[tabela] = {
+            "alterados": alterados,
+            "removidos": sorted(registro_id for registro_id, operacao in operacoes.items() if operacao == 'D'),
+        }
+    return delta
+
+@app.route("/sync", methods=["GET"])
+@resposta_condicional(*TABELAS_SINCRONIZADAS)
+@cache_resposta(*TABELAS_SINCRONIZADAS)
+def get_sync():
+    """
+    Alterações desde a última sincronização do cliente
+    ---
+    tags:
+      - default
+    summary: Sincronização incremental
+    description: >
+      Retorna, para artigos (com resumo), equipes e resultados, as linhas
+      inseridas ou alteradas e os ids removidos depois da versão desde, e a
+      versão atual a ser enviada na próxima chamada. Sem desde, ou quando o
+      cliente está atrasado demais (alterações já podadas do log ou mais de
+      SYNC_MAX_ALTERACOES), a resposta vem com completo=true e todas as
+      linhas, que substituem os dados locais.
+    produces:
+      - application/json
+    parameters:
+      - in: query
+        name: desde
+        type: integer
+        required: false
+        description: Valor de versao da sincronização anterior
+    responses:
+      200:
+        description: Delta ou dados completos
+        schema:
+          type: object
+          properties:
+            versao:
+              type: integer
+            completo:
+              type: boolean
+            artigos:
+              type: object
+              properties:
+                alterados:
+                  type: array
+                  items:
+                    type: object
+                removidos:
+                  type: array
+                  items:
+                    type: integer
+            equipes:
+              type: object
+            resultados:
+              type: object
+      400:
+        description: desde inválido
+    """
+    desde = request.args.get('desde', '0')
+    if not desde.isdigit():
+        return jsonify({"error": "desde deve ser um número inteiro não negativo"}), 400
+    desde = int(desde)
+    
+    conn = get_db()
+    cursor = conn.cursor()
+    
+    # Versão e linhas lidas na mesma transação: nenhuma alteração fica entre as duas
+    conn.execute("BEGIN")
+    try:
+        # Subconsultas separadas: MIN e MAX juntos no mesmo SELECT varrem a tabela
+        menor, versao = limites_alteracoes(cursor)
+        completo = desde == 0 or not delta_disponivel(desde, menor, versao)
+        if completo:
+            dados = {}
+            for tabela, (colunas, ordem) in SYNC_CONSULTAS.items():
+                cursor.execute(f"SELECT {colunas} FROM {tabela} ORDER BY {ordem}")
+                dados[tabela] = {"alterados": linhas_como_dicts(cursor), "removidos": []}
+        else:
+            dados = delta_alteracoes(cursor, desde)
+    finally:
+        conn.rollback()
+    
+    return jsonify({"versao": versao, "completo": completo, **dados})
+
+TABELAS_AO_VIVO = ('resultados', 'equipes')
+SSE_HEARTBEAT_EVENTO = b": ping\n\n"
+
+def evento_sse(versao, nome, dados):
+    """Evento SSE serializado; o id é a versão do log, usada no Last-Event-ID"""
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (versao, nome.encode(), app.json.serializar(dados))
+
+class AssinanteAoVivo:
+    """
+    Fila limitada de eventos de um cliente do stream. Um cliente lento que
+    acumula SSE_FILA_MAX eventos é desligado; ao reconectar, o Last-Event-ID
+    retoma do último evento que ele recebeu.
+    """
+    
+    def __init__(self):
+        self.eventos = deque()
+        self.encerrado = False
+        self.sinal = threading.Event()
+    
+    def entregar(self, evento):
+        """Chamado pela thread do canal; retorna False quando o cliente foi desligado"""
+        if not self.encerrado:
+            if len(self.eventos) >= SSE_FILA_MAX:
+                self.encerrado = True
+            else:
+                self.eventos.append(evento)
+        self._avisar()
+        return not self.encerrado
+    
+    def _avisar(self):
+        self.sinal.set()
+    
+    def proximo(self, espera):
+        """Próximo evento, o heartbeat após espera segundos sem eventos, ou None se encerrado"""
+        while True:
+            if self.encerrado:
+                return None
+            if self.eventos:
+                return self.eventos.popleft()
+            self.sinal.clear()
+            if self.eventos or self.encerrado:
+                continue
+            if not self.sinal.wait(espera):
+                return SSE_HEARTBEAT_EVENTO
+
+class CanalAoVivo:
+    """
+    Distribui as alterações de resultados e equipes aos clientes deste worker.
+    
+    Não há comunicação entre workers: cada um acompanha o log de alterações do
+    SQLite com uma thread própria e uma conexão só de leitura.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.assinantes = set()
+        self.versao = 0
+        self.pid = None
+    
+    def _iniciar(self):
+        # Após um fork a thread do processo pai não existe no filho
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            self.assinantes = set()
+            self.versao = limites_alteracoes(get_db().cursor())[1]
+        threading.Thread(target=self._acompanhar, name='canal-ao-vivo', daemon=True).start()
+    
+    def _acompanhar(self):
+        conn = _abrir_conexao()
+        marca = None
+        while True:
+            time.sleep(SSE_INTERVALO)
+            try:
+                # data_version só muda quando outra conexão faz commit
+                marca_atual = conn.execute("PRAGMA data_version").fetchone()[0]
+                if marca_atual == marca:
+                    continue
+                marca = marca_atual
+                self._publicar(conn)
+            except sqlite3.Error as erro:
+                conn.rollback()
+                app.logger.warning("Canal ao vivo: falha ao ler alterações: %s", erro)
+    
+    def _publicar(self, conn):
+        cursor = conn.cursor()
+        conn.execute("BEGIN")
+        try:
+            menor, versao = limites_alteracoes(cursor)
+            if versao <= self.versao:
+                return
+            evento = self._evento(cursor, self.versao, versao, menor)
+        finally:
+            conn.rollback()
+        
+        # versao e entrega sob o mesmo lock de assinar: cada alteração chega ao
+        # cliente exatamente uma vez, pela entrega ou pelo evento inicial
+        with self.lock:
+            self.versao = versao
+            if evento is not None:
+                for assinante in list(self.assinantes):
+                    if not assinante.entregar(evento):
+                        self.assinantes.discard(assinante)
+                self._contar_clientes()
+    
+    def _evento(self, cursor, desde, versao, menor):
+        """Evento com as alterações entre desde e versao, ou reinicio se não couberem num delta"""
+        if not delta_disponivel(desde, menor, versao):
+            return evento_sse(versao, "reinicio", {"versao": versao})
+        delta = delta_alteracoes(cursor, desde, versao, TABELAS_AO_VIVO)
+        if not any(delta[tabela]["alterados"] or delta[tabela]["removidos"] for tabela in TABELAS_AO_VIVO):
+            return None  # Só artigos mudaram
+        return evento_sse(versao, "alteracoes", {"versao": versao, **delta})
+    
+    def assinar(self, assinante, ultimo_id=None):
+        """
+        Registra o cliente e retorna os bytes iniciais do stream (ou None se o
+        worker já tem SSE_MAX_CLIENTES): as alterações perdidas desde ultimo_id
+        ou, numa conexão nova, um evento versao com a versão atual.
+        """
+        self._iniciar()
+        with self.lock:
+            if len(self.assinantes) >= SSE_MAX_CLIENTES:
+                return None
+            self.assinantes.add(assinante)
+            self._contar_clientes()
+            versao = self.versao
+        
+        inicio = b"retry: %d\n\n" % SSE_RETRY_MS
+        if ultimo_id is None:
+            return inicio + evento_sse(versao, "versao", {"versao": versao})
+        if ultimo_id == versao:
+            return inicio
+        
+        conn = get_db()
+        cursor = conn.cursor()
+        conn.execute("BEGIN")
+        try:
+            menor = limites_alteracoes(cursor)[0]
+            evento = self._evento(cursor, ultimo_id, versao, menor)
+        finally:
+            conn.rollback()
+        return inicio + (evento or evento_sse(versao, "versao", {"versao": versao}))
+    
+    def cancelar(self, assinante):
+        with self.lock:
+            self.assinantes.discard(assinante)
+            self._contar_clientes()
+    
+    def _contar_clientes(self):
+        # Chamado com o lock: o valor de cada worker, somado no /metrics
+        if metricas is not None:
+            metricas.sse_clientes.set(len(self.assinantes))
+    
+    def estatisticas(self):
+        with self.lock:
+            return {"clientes": len(self.assinantes), "versao": self.versao}
+
+canal_ao_vivo = CanalAoVivo()
+
+CABECALHOS_SSE = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no',  # nginx não deve acumular o stream
+}
+
+def ler_ultimo_evento(valor):
+    """Last-Event-ID (ou desde) como inteiro; None se ausente, ValueError se inválido"""
+    if valor is None or valor == '':
+        return None
+    if not valor.isdigit():
+        raise ValueError("Last-Event-ID deve ser um número inteiro não negativo")
+    return int(valor)
+
+@app.route("/resultados/stream", methods=["GET"])
+def stream_resultados():
+    """
+    Alterações de resultados e da classificação em tempo real (Server-Sent Events)
+    ---
+    tags:
+      - Resultados
+    summary: Stream ao vivo de resultados e classificação
+    description: >
+      Mantém a conexão aberta e envia um evento alteracoes a cada commit que
+      mexe em resultados ou equipes, com o mesmo formato de /sync (linhas
+      alteradas e ids removidos). O id de cada evento é a versão do log de
+      alterações. Ao reconectar, o EventSource envia Last-Event-ID e recebe o
+      que perdeu. Se o log já não tem essas alterações, chega um evento
+      reinicio e o cliente deve recarregar via /sync. Sem eventos, um
+      comentário de keep-alive é enviado a cada SSE_HEARTBEAT segundos. Com
+      SERVIDOR_MODO=asgi a conexão não ocupa nenhuma thread enquanto espera.
+      Com workers síncronos (wsgi) a rota responde 503, porque cada cliente
+      conectado prenderia um worker inteiro.
+    produces:
+      - text/event-stream
+    parameters:
+      - in: header
+        name: Last-Event-ID
+        type: integer
+        required: false
+        description: id do último evento recebido
+      - in: query
+        name: desde
+        type: integer
+        required: false
+        description: Alternativa ao Last-Event-ID para clientes que não enviam cabeçalhos
+    responses:
+      200:
+        description: Stream text/event-stream com eventos versao, alteracoes e reinicio
+      400:
+        description: Last-Event-ID inválido
+      503:
+        description: Limite de conexões do worker atingido, ou servidor com workers síncronos
+    """
+    if not request.environ.get('wsgi.multithread'):
+        # Worker síncrono: o stream o ocuparia até o cliente desconectar e as
+        # outras rotas ficariam sem atender. Os clientes sincronizam pelo /sync
+        return jsonify({"error": "Stream ao vivo indisponível neste servidor (use SERVIDOR_MODO=asgi)"}), 503, {"Retry-After": str(SSE_SEM_SUPORTE_RETRY)}
+    
+    try:
+        ultimo_id = ler_ultimo_evento(request.headers.get('Last-Event-ID') or request.args.get('desde'))
+    except ValueError as erro:
+        return jsonify({"error": str(erro)}), 400
+    
+    assinante = AssinanteAoVivo()
+    inicio = canal_ao_vivo.assinar(assinante, ultimo_id)
+    if inicio is None:
+        return jsonify({"error": "Muitas conexões ao vivo, tente novamente"}), 503, {"Retry-After": str(SSE_RETRY_MS // 1000)}
+    
+    def eventos():
+        yield inicio
+        while True:
+            evento = assinante.proximo(SSE_HEARTBEAT)
+            if evento is None:
+                return
+            yield evento
+    
+    response = app.response_class(eventos(), mimetype='text/event-stream', headers=CABECALHOS_SSE)
+    # Também cobre um gerador que nunca chegou a ser iniciado
+    response.call_on_close(lambda: canal_ao_vivo.cancelar(assinante))
+    return response
+
+# Documentação pré-gerada (DOCS_MODO=estatico)
+_apispec = {"corpo": None, "etag": None}
+
+PAGINA_DOCS = """<!DOCTYPE html>
+<html lang="pt">
+<head>
+  <meta charset="UTF-8">
+  <title>Revista API</title>
+  <link rel="stylesheet" href="/flasgger_static/swagger-ui.css">
+  <link rel="icon" type="image/png" href="/flasgger_static/favicon-32x32.png">
+</head>
+<body>
+  <div id="swagger-ui"></div>
+  <script src="/flasgger_static/swagger-ui-bundle.js"></script>
+  <script src="/flasgger_static/swagger-ui-standalone-preset.js"></script>
+  <script>
+    window.ui = SwaggerUIBundle({
+      url: "/apispec.json",
+      dom_id: "#swagger-ui",
+      validatorUrl: null,
+      deepLinking: true,
+      presets: [SwaggerUIBundle.presets.apis, SwaggerUIStandalonePreset],
+      layout: "StandaloneLayout"
+    });
+  </script>
+</body>
+</html>
+"""
+
+def servir_apispec():
+    """apispec.json pré-gerado, carregado do disco na primeira requisição"""
+    if _apispec["corpo"] is None:
+        try:
+            with open(APISPEC_ARQUIVO, 'rb') as arquivo:
+                corpo = arquivo.read()
+        except FileNotFoundError:
+            return jsonify({"error": "apispec.json não gerado: rode flask --app main gerar-apispec"}), 503
+        _apispec["etag"] = hashlib.sha1(corpo).hexdigest()
+        _apispec["corpo"] = corpo
+    response = app.response_class(_apispec["corpo"], mimetype='application/json')
+    response.set_etag(_apispec["etag"])
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def servir_docs():
+    """Swagger UI apontando para o apispec.json pré-gerado"""
+    return app.response_class(PAGINA_DOCS, mimetype='text/html')
+
+def servir_flasgger_static(filename):
+    """Arquivos da Swagger UI que acompanham o pacote flasgger"""
+    return send_from_directory(PASTA_FLASGGER_STATIC, filename, max_age=24 * 60 * 60)
+
+if DOCS_MODO == 'estatico':
+    # Localiza o pacote sem importá-lo
+    PASTA_FLASGGER_STATIC = os.path.join(
+        importlib.util.find_spec('flasgger').submodule_search_locations[0], 'ui3', 'static'
+    )
+    app.add_url_rule('/apispec.json', 'apispec', servir_apispec)
+    app.add_url_rule('/docs', 'docs', servir_docs)
+    app.add_url_rule('/flasgger_static/<path:filename>', 'flasgger_static', servir_flasgger_static)
+
+@app.cli.command('gerar-apispec')
+def gerar_apispec():
+    """Gera o apispec.json a partir das docstrings YAML das rotas"""
+    gerador = swagger if DOCS_MODO == 'dinamico' else criar_swagger()
+    with app.test_request_context('/'):
+        spec = gerador.get_apispecs('apispec')
+    temporario = f"{APISPEC_ARQUIVO}.{os.getpid()}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(spec, arquivo, ensure_ascii=False, separators=(',', ':'))
+    os.replace(temporario, APISPEC_ARQUIVO)
+    print(f"{APISPEC_ARQUIVO} gerado com {len(spec['paths'])} rotas")
+
 @app.route("/artigos", methods=["GET"])
+@resposta_condicional('artigos')
+@cache_resposta('artigos')
 def get_artigos():
     """
     Lista todas as notícias/artigos
@@ -299,12 +2615,37 @@ def get_artigos():
     tags:
       - Artigos
     summary: Lista todas as notícias
-    description: Retorna uma lista de todos os artigos/notícias cadastrados
+    description: >
+      Retorna os artigos/notícias cadastrados, do mais recente para o mais antigo.
+      Com limit ou cursor a lista é paginada por chave e o cursor da próxima
+      página vem no cabeçalho X-Next-Cursor. Com modo=resumo o campo conteudo
+      é substituído pelo resumo armazenado.
     produces:
       - application/json
+    parameters:
+      - in: query
+        name: limit
+        type: integer
+        required: false
+        description: Quantidade de artigos por página (máximo 100)
+      - in: query
+        name: cursor
+        type: string
+        required: false
+        description: Valor de X-Next-Cursor da página anterior
+      - in: query
+        name: modo
+        type: string
+        enum: [completo, resumo]
+        required: false
+        description: resumo devolve apenas o resumo em vez do conteudo completo
     responses:
       200:
         description: Lista de artigos
+        headers:
+          X-Next-Cursor:
+            type: string
+            description: Cursor da próxima página (ausente na última)
         schema:
           type: array
           items:
@@ -316,35 +2657,160 @@ def get_artigos():
                 type: string
               conteudo:
                 type: string
+              resumo:
+                type: string
               autor:
                 type: string
               imagem_url:
                 type: string
               data_criacao:
                 type: string
+      400:
+        description: Parâmetros de paginação inválidos
     """
-    conn = sqlite3.connect(DATABASE_URL)
+    modo_resumo = request.args.get('modo') == 'resumo'
+    cursor_param = request.args.get('cursor')
+    
+    limite = request.args.get('limit', type=int)
+    if limite is None and 'limit' in request.args:
+        # Um limit inválido não pode virar "sem limite" e devolver o arquivo inteiro
+        return jsonify({"error": "limit deve ser um número inteiro"}), 400
+    if limite is None and cursor_param:
+        limite = ARTIGOS_POR_PAGINA
+    if limite is not None and not 1 <= limite <= ARTIGOS_POR_PAGINA_MAX:
+        return jsonify({"error": f"limit deve estar entre 1 e {ARTIGOS_POR_PAGINA_MAX}"}), 400
+    
+    campo_texto = "resumo" if modo_resumo else "conteudo"
+    sql = f"SELECT id, titulo, {campo_texto}, autor, imagem_url, data_criacao FROM artigos"
+    params = []
+    
+    if cursor_param:
+        posicao = decodificar_cursor(cursor_param)
+        if posicao is None:
+            return jsonify({"error": "Cursor inválido"}), 400
+        sql += " WHERE (data_criacao, id) < (?, ?)"
+        params.extend(posicao)
+    
+    sql += " ORDER BY data_criacao DESC, id DESC"
+    if limite is not None:
+        # Uma linha a mais indica se existe próxima página
+        sql += " LIMIT ?"
+        params.append(limite + 1)
+    
+    conn = get_db()
     cursor = conn.cursor()
     
-    cursor.execute("SELECT id, titulo, conteudo, autor, imagem_url, data_criacao FROM artigos ORDER BY data_criacao DESC")
-    artigos = cursor.fetchall()
+    cursor.execute(sql, params)
+    artigos = linhas_como_dicts(cursor)
     
-    conn.close()
+    proximo_cursor = None
+    if limite is not None and len(artigos) > limite:
+        artigos = artigos[:limite]
+        proximo_cursor = codificar_cursor(artigos[-1]["data_criacao"], artigos[-1]["id"])
     
-    artigos_list = []
-    for artigo in artigos:
-        artigos_list.append({
-            "id": artigo[0],
-            "titulo": artigo[1],
-            "conteudo": artigo[2],
-            "autor": artigo[3],
-            "imagem_url": artigo[4],
-            "data_criacao": artigo[5]
-        })
+    response = jsonify(artigos)
+    if proximo_cursor:
+        response.headers['X-Next-Cursor'] = proximo_cursor
+    return response
+
+def consulta_fts(texto):
+    """Converte o texto digitado numa consulta FTS5 segura: termos com prefixo, todos obrigatórios"""
+    termos = re.findall(r"\w+", texto)
+    return " ".join(f'"{termo}"*' for termo in termos)
+
+@app.route("/artigos/busca", methods=["GET"])
+@resposta_condicional('artigos')
+@cache_resposta('artigos')
+def buscar_artigos():
+    """
+    Busca notícias por texto
+    ---
+    tags:
+      - Artigos
+    summary: Busca full-text nas notícias
+    description: >
+      Busca em titulo, conteudo e autor, sem diferenciar acentos e com
+      correspondência por prefixo ("ferrov" encontra "Ferroviário"). Os
+      resultados vêm ordenados por relevância (BM25) com um trecho destacado
+      entre <mark> e </mark>.
+    produces:
+      - application/json
+    parameters:
+      - in: query
+        name: q
+        type: string
+        required: true
+        description: Texto a buscar
+      - in: query
+        name: limit
+        type: integer
+        required: false
+        description: Quantidade de resultados (máximo 100)
+      - in: query
+        name: offset
+        type: integer
+        required: false
+        description: Quantidade de resultados a pular
+    responses:
+      200:
+        description: Artigos encontrados, do mais relevante para o menos relevante
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              id:
+                type: integer
+              titulo:
+                type: string
+              titulo_destacado:
+                type: string
+              trecho:
+                type: string
+              autor:
+                type: string
+              imagem_url:
+                type: string
+              data_criacao:
+                type: string
+      400:
+        description: Consulta vazia ou parâmetros inválidos
+      503:
+        description: Busca full-text indisponível neste servidor
+    """
+    consulta = consulta_fts(request.args.get('q', ''))
+    if not consulta:
+        return jsonify({"error": "Informe o texto da busca em q"}), 400
+    
+    limite = request.args.get('limit', ARTIGOS_POR_PAGINA, type=int)
+    deslocamento = request.args.get('offset', 0, type=int)
+    for parametro in ('limit', 'offset'):
+        if parametro in request.args and request.args.get(parametro, type=int) is None:
+            return jsonify({"error": f"{parametro} deve ser um número inteiro"}), 400
+    if not 1 <= limite <= ARTIGOS_POR_PAGINA_MAX or deslocamento < 0:
+        return jsonify({"error": f"limit deve estar entre 1 e {ARTIGOS_POR_PAGINA_MAX}"}), 400
+    
+    conn = get_db()
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("""
+            SELECT a.id, a.titulo, highlight(artigos_fts, 0, ?, ?) AS titulo_destacado,
+                   snippet(artigos_fts, 1, ?, ?, '…', 16) AS trecho,
+                   a.autor, a.imagem_url, a.data_criacao
+            FROM artigos_fts
+            JOIN artigos a ON a.id = artigos_fts.rowid
+            WHERE artigos_fts MATCH ?
+            ORDER BY rank
+            LIMIT ? OFFSET ?
+        """, (BUSCA_MARCA_INICIO, BUSCA_MARCA_FIM, BUSCA_MARCA_INICIO, BUSCA_MARCA_FIM, consulta, limite, deslocamento))
+    except sqlite3.OperationalError:
+        return jsonify({"error": "Busca indisponível"}), 503
     
-    return jsonify(artigos_list)
+    return jsonify(linhas_como_dicts(cursor))
 
 @app.route("/artigos/<int:artigo_id>", methods=["GET"])
+@resposta_condicional('artigos')
 def get_artigo(artigo_id):
     """
     Busca uma notícia específica por ID
@@ -382,33 +2848,27 @@ def get_artigo(artigo_id):
       404:
         description: Artigo não encontrado
     """
-    conn = sqlite3.connect(DATABASE_URL)
+    conn = get_db()
     cursor = conn.cursor()
     
     cursor.execute("SELECT id, titulo, conteudo, autor, imagem_url, data_criacao FROM artigos WHERE id = ?", (artigo_id,))
-    artigo = cursor.fetchone()
-    
-    conn.close()
+    artigo = linha_como_dict(cursor)
     
     if not artigo:
         return jsonify({"error": "Artigo não encontrado"}), 404
     
-    return jsonify({
-        "id": artigo[0],
-        "titulo": artigo[1],
-        "conteudo": artigo[2],
-        "autor": artigo[3],
-        "imagem_url": artigo[4],
-        "data_criacao": artigo[5]
-    })
+    return jsonify(artigo)
 
 @app.route("/artigos", methods=["POST"])
+@requer_token(admin=True)
 def create_artigo():
     """
     Cria um novo artigo/notícia
     ---
     tags:
       - Artigos
+    security:
+      - Bearer: []
     summary: Adiciona uma nova notícia
     description: Cria um novo artigo (notícia) no sistema
     consumes:
@@ -469,41 +2929,32 @@ def create_artigo():
     if not data or not all(key in data for key in ['titulo', 'conteudo', 'autor']):
         return jsonify({"error": "Dados incompletos"}), 400
     
-    conn = sqlite3.connect(DATABASE_URL)
+    conn = get_db()
     cursor = conn.cursor()
     
     cursor.execute(
-        "INSERT INTO artigos (titulo, conteudo, autor, imagem_url) VALUES (?, ?, ?, ?)",
-        (data['titulo'], data['conteudo'], data['autor'], data.get('imagem_url'))
+        "INSERT INTO artigos (titulo, conteudo, resumo, autor, imagem_url) VALUES (?, ?, ?, ?, ?)",
+        (data['titulo'], data['conteudo'], gerar_resumo(data['conteudo']), data['autor'], data.get('imagem_url'))
     )
     
     artigo_id = cursor.lastrowid
     conn.commit()
-    conn.close()
     
-    # Buscar o artigo criado
-    conn = sqlite3.connect(DATABASE_URL)
-    cursor = conn.cursor()
+    # Buscar o artigo criado (mesma conexão)
     cursor.execute("SELECT id, titulo, conteudo, autor, imagem_url, data_criacao FROM artigos WHERE id = ?", (artigo_id,))
-    novo_artigo = cursor.fetchone()
-    conn.close()
     
-    return jsonify({
-        "id": novo_artigo[0],
-        "titulo": novo_artigo[1],
-        "conteudo": novo_artigo[2],
-        "autor": novo_artigo[3],
-        "imagem_url": novo_artigo[4],
-        "data_criacao": novo_artigo[5]
-    }), 201
+    return jsonify(linha_como_dict(cursor)), 201
 
 @app.route("/artigos/<int:artigo_id>", methods=["PUT"])
+@requer_token(admin=True)
 def update_artigo(artigo_id):
     """
     Atualiza uma notícia existente
     ---
     tags:
       - Artigos
+    security:
+      - Bearer: []
     summary: Atualiza uma notícia
     description: Atualiza os dados de uma notícia existente
     consumes:
@@ -549,45 +3000,36 @@ def update_artigo(artigo_id):
     if not data or not all(key in data for key in ['titulo', 'conteudo', 'autor']):
         return jsonify({"error": "Dados incompletos"}), 400
     
-    conn = sqlite3.connect(DATABASE_URL)
+    conn = get_db()
     cursor = conn.cursor()
     
     # Verificar se o artigo existe
     cursor.execute("SELECT id FROM artigos WHERE id = ?", (artigo_id,))
     if not cursor.fetchone():
-        conn.close()
         return jsonify({"error": "Artigo não encontrado"}), 404
     
     cursor.execute(
-        "UPDATE artigos SET titulo = ?, conteudo = ?, autor = ? WHERE id = ?",
-        (data['titulo'], data['conteudo'], data['autor'], artigo_id)
+        "UPDATE artigos SET titulo = ?, conteudo = ?, resumo = ?, autor = ? WHERE id = ?",
+        (data['titulo'], data['conteudo'], gerar_resumo(data['conteudo']), data['autor'], artigo_id)
     )
     
     conn.commit()
-    conn.close()
     
-    # Buscar o artigo atualizado
-    conn = sqlite3.connect(DATABASE_URL)
-    cursor = conn.cursor()
+    # Buscar o artigo atualizado (mesma conexão)
     cursor.execute("SELECT id, titulo, conteudo, autor, data_criacao FROM artigos WHERE id = ?", (artigo_id,))
-    artigo_atualizado = cursor.fetchone()
-    conn.close()
     
-    return jsonify({
-        "id": artigo_atualizado[0],
-        "titulo": artigo_atualizado[1],
-        "conteudo": artigo_atualizado[2],
-        "autor": artigo_atualizado[3],
-        "data_criacao": artigo_atualizado[4]
-    })
+    return jsonify(linha_como_dict(cursor))
 
 @app.route("/artigos/<int:artigo_id>", methods=["DELETE"])
+@requer_token(admin=True)
 def delete_artigo(artigo_id):
     """
     Deleta uma notícia
     ---
     tags:
       - Artigos
+    security:
+      - Bearer: []
     summary: Deleta uma notícia
     description: Remove uma notícia do sistema
     produces:
@@ -609,28 +3051,87 @@ def delete_artigo(artigo_id):
       404:
         description: Artigo não encontrado
     """
-    conn = sqlite3.connect(DATABASE_URL)
+    conn = get_db()
     cursor = conn.cursor()
     
     # Verificar se o artigo existe
     cursor.execute("SELECT id FROM artigos WHERE id = ?", (artigo_id,))
     if not cursor.fetchone():
-        conn.close()
         return jsonify({"error": "Artigo não encontrado"}), 404
     
     cursor.execute("DELETE FROM artigos WHERE id = ?", (artigo_id,))
     conn.commit()
-    conn.close()
     
     return jsonify({"message": "Artigo deletado com sucesso"})
 
+# Geração de variantes de imagem (thumb/card/full, no formato original e em WebP)
+_pool_imagens = {"pid": None, "executor": None, "pendentes": set(), "lock": threading.Lock()}
+
+def caminho_variante(filename, tamanho, formato):
+    """Caminho da variante; formato é 'original' ou 'webp'"""
+    base, extensao = os.path.splitext(filename)
+    if formato == 'webp':
+        extensao = '.webp'
+    return os.path.join(VARIANTES_FOLDER, f"{base}_{tamanho}{extensao}")
+
+def gerar_variantes(filename):
+    """Gera todas as variantes de uma imagem enviada (executa no pool de threads)"""
+    try:
+        with Image.open(os.path.join(UPLOAD_FOLDER, filename)) as original:
+            if getattr(original, 'is_animated', False):
+                return  # GIFs animados são servidos apenas no original
+            formato_original = original.format
+            imagem = ImageOps.exif_transpose(original)
+            if formato_original == 'JPEG' and imagem.mode not in ('RGB', 'L'):
+                imagem = imagem.convert('RGB')
+            
+            for tamanho, largura in VARIANTES_IMAGEM.items():
+                variante = imagem.copy()
+                variante.thumbnail((largura, largura * 4), Image.LANCZOS)
+                for formato, opcoes in (
+                    ('original', {'format': formato_original, 'optimize': True, 'quality': 82}),
+                    ('webp', {'format': 'WEBP', 'quality': 80, 'method': 4})
+                ):
+                    destino = caminho_variante(filename, tamanho, formato)
+                    # Grava em arquivo temporário e renomeia: a variante só aparece completa
+                    temporario = f"{destino}.{os.getpid()}.tmp"
+                    if formato == 'original' and variante.size == original.size:
+                        # Já cabe no tamanho: recomprimir só aumentaria o arquivo
+                        shutil.copyfile(os.path.join(UPLOAD_FOLDER, filename), temporario)
+                    else:
+                        variante.save(temporario, **opcoes)
+                    os.replace(temporario, destino)
+    except Exception:
+        app.logger.exception("Falha ao gerar variantes de %s", filename)
+    finally:
+        with _pool_imagens["lock"]:
+            _pool_imagens["pendentes"].discard(filename)
+
+def agendar_variantes(filename):
+    """Coloca a geração das variantes na fila sem bloquear a requisição"""
+    if Image is None:
+        return
+    with _pool_imagens["lock"]:
+        # O pool não sobrevive ao fork dos workers do gunicorn
+        if _pool_imagens["pid"] != os.getpid():
+            _pool_imagens["executor"] = ThreadPoolExecutor(max_workers=IMAGEM_WORKERS, thread_name_prefix='variantes')
+            _pool_imagens["pid"] = os.getpid()
+            _pool_imagens["pendentes"] = set()
+        if filename in _pool_imagens["pendentes"]:
+            return
+        _pool_imagens["pendentes"].add(filename)
+    _pool_imagens["executor"].submit(gerar_variantes, filename)
+
 @app.route("/upload", methods=["POST"])
+@requer_token(admin=True)
 def upload_file():
     """
     Faz upload de uma imagem
     ---
     tags:
       - Upload
+    security:
+      - Bearer: []
     summary: Upload de imagem
     description: Faz upload de uma imagem e retorna a URL
     consumes:
@@ -652,6 +3153,12 @@ def upload_file():
             image_url:
               type: string
               example: "http://localhost:8000/uploads/abc123_image.jpg"
+            variantes:
+              type: object
+              description: URLs das versões redimensionadas (servem o original até ficarem prontas)
+            duplicado:
+              type: boolean
+              description: true quando o mesmo conteúdo já existia e nada foi gravado
       400:
         description: Erro no upload
     """
@@ -664,13 +3171,36 @@ def upload_file():
         return jsonify({"error": "Nenhum arquivo selecionado"}), 400
     
     if file and allowed_file(file.filename):
-        # Gerar nome único para o arquivo
-        filename = secure_filename(file.filename)
-        unique_filename = f"{uuid.uuid4()}_{filename}"
+        # O nome do arquivo é o hash do conteúdo: o mesmo arquivo enviado de novo
+        # reaproveita o que já está salvo. O stream do upload já está em memória
+        # ou em arquivo temporário do Werkzeug, então o hash não escreve nada.
+        conteudo_hash = hash_arquivo(file.stream)
         
-        # Salvar arquivo
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-        file.save(file_path)
+        conn = get_db()
+        cursor = conn.cursor()
+        cursor.execute("SELECT filename FROM uploads WHERE hash = ?", (conteudo_hash,))
+        existente = cursor.fetchone()
+        
+        duplicado = existente is not None and os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], existente[0]))
+        if duplicado:
+            unique_filename = existente[0]
+        else:
+            extensao = file.filename.rsplit('.', 1)[1].lower()
+            unique_filename = f"{conteudo_hash}.{extensao}"
+            
+            # Salvar arquivo (temporário + rename para nunca expor um arquivo incompleto)
+            file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
+            temporario = f"{file_path}.{os.getpid()}.tmp"
+            file.stream.seek(0)
+            file.save(temporario)
+            os.replace(temporario, file_path)
+            
+            cursor.execute(
+                "INSERT OR REPLACE INTO uploads (hash, filename, tamanho) VALUES (?, ?, ?)",
+                (conteudo_hash, unique_filename, os.path.getsize(file_path))
+            )
+            conn.commit()
+            agendar_variantes(unique_filename)
         
         # Retornar URL da imagem
         # Usa BASE_URL se estiver definido (deploy), caso contrário usa o request.host
@@ -681,19 +3211,73 @@ def upload_file():
             scheme = request.scheme
             host = request.host
             image_url = f"{scheme}://{host}/uploads/{unique_filename}"
-        return jsonify({"image_url": image_url}), 200
+        variantes = {tamanho: f"{image_url}?tamanho={tamanho}" for tamanho in VARIANTES_IMAGEM}
+        return jsonify({"image_url": image_url, "variantes": variantes, "duplicado": duplicado}), 200
     
     return jsonify({"error": "Tipo de arquivo não permitido"}), 400
 
 @app.route("/uploads/<filename>")
 def uploaded_file(filename):
-    """Servir arquivos de upload"""
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    """
+    Servir arquivos de upload
+    
+    ?tamanho=thumb|card|full devolve a variante redimensionada, em WebP quando o
+    cliente lista image/webp no Accept (ou pede formato=webp). Enquanto a variante não
+    estiver pronta o original é servido e a geração é agendada.
+    """
+    tamanho = request.args.get('tamanho')
+    if tamanho not in VARIANTES_IMAGEM or Image is None:
+        return servir_upload(app.config['UPLOAD_FOLDER'], filename)
+    
+    # Só um image/webp explícito: */* e image/* também casam com webp no
+    # accept_mimetypes, e navegadores antigos mandam esses curingas
+    quer_webp = request.args.get('formato') == 'webp' or any(
+        tipo == 'image/webp' and qualidade > 0 for tipo, qualidade in request.accept_mimetypes
+    )
+    formatos = ('webp', 'original') if quer_webp else ('original',)
+    for formato in formatos:
+        variante = caminho_variante(secure_filename(filename), tamanho, formato)
+        if os.path.exists(variante):
+            response = servir_upload(VARIANTES_FOLDER, os.path.basename(variante))
+            response.vary.add('Accept')
+            return response
+    
+    # Variante ainda não pronta: o original não pode ficar em cache como se fosse ela
+    response = servir_upload(app.config['UPLOAD_FOLDER'], filename, max_age=UPLOADS_FALLBACK_MAX_AGE)
+    if os.path.isfile(os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(filename))):
+        agendar_variantes(secure_filename(filename))
+    response.vary.add('Accept')
+    return response
+
+def servir_upload(pasta, filename, max_age=UPLOADS_CACHE_MAX_AGE):
+    """
+    Envia um arquivo de /uploads com cache longo. Range/206 e ETag ficam com o
+    send_file do Werkzeug, que sob o gunicorn usa wsgi.file_wrapper (sendfile);
+    com UPLOADS_OFFLOAD=x-accel quem envia os bytes é o nginx.
+    """
+    if UPLOADS_OFFLOAD == 'x-accel':
+        caminho = safe_join(pasta, filename)
+        if caminho is None or not os.path.isfile(caminho):
+            # Response (não uma tupla): quem chamou ainda mexe nos cabeçalhos
+            response = jsonify({"error": "Arquivo não encontrado"})
+            response.status_code = 404
+            return response
+        interno = os.path.relpath(caminho, UPLOAD_FOLDER).replace(os.sep, '/')
+        response = app.response_class(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = f"{UPLOADS_ACCEL_PREFIX}/{interno}"
+    else:
+        response = send_from_directory(pasta, filename, max_age=max_age)
+    
+    imutavel = ", immutable" if max_age == UPLOADS_CACHE_MAX_AGE else ""
+    response.headers['Cache-Control'] = f"public, max-age={max_age}{imutavel}"
+    return response
 
 @app.route("/equipes", methods=["GET"])
+@resposta_condicional('equipes')
+@cache_resposta('equipes')
 def get_equipes():
     """Busca todas as equipes da classificação"""
-    conn = sqlite3.connect(DATABASE_URL)
+    conn = get_db()
     cursor = conn.cursor()
     
     cursor.execute("""
@@ -701,50 +3285,36 @@ def get_equipes():
         FROM equipes 
         ORDER BY posicao ASC
     """)
-    equipes = cursor.fetchall()
-    
-    conn.close()
-    
-    equipes_list = []
-    for equipe in equipes:
-        equipes_list.append({
-            "id": equipe[0],
-            "posicao": equipe[1],
-            "nome": equipe[2],
-            "jogos": equipe[3],
-            "vitorias": equipe[4],
-            "empates": equipe[5],
-            "derrotas": equipe[6],
-            "gols_pro": equipe[7],
-            "gols_contra": equipe[8],
-            "diferenca_gols": equipe[9],
-            "pontos": equipe[10],
-            "logo_url": equipe[11]
-        })
     
-    return jsonify(equipes_list)
+    return jsonify(linhas_como_dicts(cursor))
 
 @app.route("/equipes", methods=["POST"])
+@requer_token(admin=True)
 def create_equipe():
-    """Cria uma nova equipe"""
+    """Cria uma nova equipe (a posição é calculada pelo motor de classificação)"""
     data = request.get_json()
     
-    if not data or not all(key in data for key in ['nome', 'posicao', 'jogos', 'vitorias', 'empates', 'derrotas', 'gols_pro', 'gols_contra']):
+    if not data or not all(key in data for key in ['nome', 'jogos', 'vitorias', 'empates', 'derrotas', 'gols_pro', 'gols_contra']):
         return jsonify({"error": "Dados incompletos"}), 400
     
     # Calcular diferença de gols e pontos
     diferenca_gols = data['gols_pro'] - data['gols_contra']
     pontos = (data['vitorias'] * 3) + (data['empates'] * 1)
     
-    conn = sqlite3.connect(DATABASE_URL)
+    conn = get_db()
     cursor = conn.cursor()
     
+    # A nova equipe entra na última posição e depois sobe até o lugar certo
+    cursor.execute("SELECT COUNT(*) FROM equipes")
+    posicao = cursor.fetchone()[0] + 1
+    
     cursor.execute("""
-        INSERT INTO equipes (nome, posicao, jogos, vitorias, empates, derrotas, gols_pro, gols_contra, diferenca_gols, pontos, logo_url)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        INSERT INTO equipes (nome, chave_nome, posicao, jogos, vitorias, empates, derrotas, gols_pro, gols_contra, diferenca_gols, pontos, logo_url)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """, (
         data['nome'], 
-        data['posicao'], 
+        normalizar_nome(data['nome']),
+        posicao, 
         data['jogos'], 
         data['vitorias'], 
         data['empates'], 
@@ -757,40 +3327,41 @@ def create_equipe():
     ))
     
     equipe_id = cursor.lastrowid
+    atualizar_classificacao(cursor, {equipe_id: posicao})
     conn.commit()
-    conn.close()
     
     return jsonify({"message": "Equipe criada com sucesso", "id": equipe_id}), 201
 
 @app.route("/equipes/<int:equipe_id>", methods=["PUT"])
+@requer_token(admin=True)
 def update_equipe(equipe_id):
-    """Atualiza uma equipe existente"""
+    """Atualiza uma equipe existente (a posição é calculada pelo motor de classificação)"""
     data = request.get_json()
     
-    if not data or not all(key in data for key in ['nome', 'posicao', 'jogos', 'vitorias', 'empates', 'derrotas', 'gols_pro', 'gols_contra']):
+    if not data or not all(key in data for key in ['nome', 'jogos', 'vitorias', 'empates', 'derrotas', 'gols_pro', 'gols_contra']):
         return jsonify({"error": "Dados incompletos"}), 400
     
     # Calcular diferença de gols e pontos
     diferenca_gols = data['gols_pro'] - data['gols_contra']
     pontos = (data['vitorias'] * 3) + (data['empates'] * 1)
     
-    conn = sqlite3.connect(DATABASE_URL)
+    conn = get_db()
     cursor = conn.cursor()
     
     # Verificar se a equipe existe
-    cursor.execute("SELECT id FROM equipes WHERE id = ?", (equipe_id,))
-    if not cursor.fetchone():
-        conn.close()
+    cursor.execute("SELECT posicao FROM equipes WHERE id = ?", (equipe_id,))
+    equipe = cursor.fetchone()
+    if not equipe:
         return jsonify({"error": "Equipe não encontrada"}), 404
     
     cursor.execute("""
         UPDATE equipes 
-        SET nome = ?, posicao = ?, jogos = ?, vitorias = ?, empates = ?, derrotas = ?, 
+        SET nome = ?, chave_nome = ?, jogos = ?, vitorias = ?, empates = ?, derrotas = ?, 
             gols_pro = ?, gols_contra = ?, diferenca_gols = ?, pontos = ?, logo_url = ?
         WHERE id = ?
     """, (
         data['nome'], 
-        data['posicao'], 
+        normalizar_nome(data['nome']),
         data['jogos'], 
         data['vitorias'], 
         data['empates'], 
@@ -803,132 +3374,495 @@ def update_equipe(equipe_id):
         equipe_id
     ))
     
+    atualizar_classificacao(cursor, {equipe_id: equipe[0]})
     conn.commit()
-    conn.close()
     
     return jsonify({"message": "Equipe atualizada com sucesso"})
 
 @app.route("/equipes/<int:equipe_id>", methods=["DELETE"])
+@requer_token(admin=True)
 def delete_equipe(equipe_id):
     """Deleta uma equipe"""
-    conn = sqlite3.connect(DATABASE_URL)
+    conn = get_db()
     cursor = conn.cursor()
     
     # Verificar se a equipe existe
-    cursor.execute("SELECT id FROM equipes WHERE id = ?", (equipe_id,))
-    if not cursor.fetchone():
-        conn.close()
+    cursor.execute("SELECT posicao FROM equipes WHERE id = ?", (equipe_id,))
+    equipe = cursor.fetchone()
+    if not equipe:
         return jsonify({"error": "Equipe não encontrada"}), 404
     
     cursor.execute("DELETE FROM equipes WHERE id = ?", (equipe_id,))
+    # As equipes abaixo sobem uma posição
+    cursor.execute("UPDATE equipes SET posicao = posicao - 1 WHERE posicao > ?", (equipe[0],))
     conn.commit()
-    conn.close()
     
     return jsonify({"message": "Equipe deletada com sucesso"})
 
+def consultar_resultados(cursor, colunas, equipe_id=None):
+    """Resultados na ordem da listagem, opcionalmente só os jogos de uma equipe"""
+    if equipe_id is None:
+        cursor.execute(f"SELECT {colunas} FROM resultados ORDER BY ronda DESC, data_jogo DESC")
+    else:
+        # UNION ALL em vez de OR: cada lado lê um índice já ordenado e o SQLite
+        # só intercala os dois, sem ordenar em B-tree temporária
+        cursor.execute(f"""
+            SELECT {colunas} FROM resultados WHERE equipe_casa_id = ?
+            UNION ALL
+            SELECT {colunas} FROM resultados WHERE equipe_fora_id = ?
+            ORDER BY ronda DESC, data_jogo DESC
+        """, (equipe_id, equipe_id))
+    return cursor
+
+def _lado_compacto(linha, lado, equipe_id, nome, logo, equipes):
+    """
+    Preenche um lado (casa/fora) de um jogo no formato compacto. Nome e logo só
+    aparecem na linha quando não vêm do dicionário de equipes: nome sem equipe
+    cadastrada, ou logo próprio do jogo diferente do logo da equipe.
+    """
+    equipe = equipes.get(equipe_id)
+    linha[f"equipe_{lado}_id"] = equipe_id if equipe else None
+    if equipe is None:
+        linha[f"time_{lado}"] = nome
+    if logo and (equipe is None or logo != equipe["logo_url"]):
+        linha[f"logo_{lado}"] = logo
+
+# Colunas lidas por resultados_compactos, nessa ordem
+COLUNAS_RESULTADO_COMPACTO = """
+    id, ronda, data_jogo, gols_casa, gols_fora,
+    equipe_casa_id, time_casa, logo_casa, equipe_fora_id, time_fora, logo_fora
+"""
+
+def resultados_compactos(cursor, jogos):
+    """
+    Formato compacto: jogos com os ids das equipes e um único dicionário
+    {id: {nome, logo_url}} com as equipes referenciadas
+    """
+    ids = sorted(({jogo[5] for jogo in jogos} | {jogo[8] for jogo in jogos}) - {None})
+    equipes = {}
+    if ids:
+        cursor.execute(f"SELECT id, nome, logo_url FROM equipes WHERE id IN ({', '.join('?' * len(ids))})", ids)
+        equipes = {linha[0]: {"nome": linha[1], "logo_url": linha[2]} for linha in cursor.fetchall()}
+    
+    resultados = []
+    for resultado_id, ronda, data_jogo, gols_casa, gols_fora, casa_id, time_casa, logo_casa, fora_id, time_fora, logo_fora in jogos:
+        linha = {"id": resultado_id, "ronda": ronda, "data_jogo": data_jogo, "gols_casa": gols_casa, "gols_fora": gols_fora}
+        _lado_compacto(linha, "casa", casa_id, time_casa, logo_casa, equipes)
+        _lado_compacto(linha, "fora", fora_id, time_fora, logo_fora, equipes)
+        resultados.append(linha)
+    return {"equipes": equipes, "resultados": resultados}
+
 @app.route("/resultados", methods=["GET"])
+@resposta_condicional('resultados', 'equipes')
+@cache_resposta('resultados', 'equipes')
 def get_resultados():
-    """Busca todos os resultados dos jogos"""
-    conn = sqlite3.connect(DATABASE_URL)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT id, ronda, time_casa, time_fora, gols_casa, gols_fora, data_jogo, logo_casa, logo_fora
-        FROM resultados 
-        ORDER BY ronda DESC, data_jogo DESC
-    """)
-    resultados = cursor.fetchall()
+    """
+    Lista os resultados dos jogos
+    ---
+    tags:
+      - Resultados
+    summary: Lista os resultados dos jogos
+    description: >
+      Retorna os resultados da ronda mais recente para a mais antiga. Com
+      formato=compacto cada jogo traz só os ids das equipes, e nome e logo de
+      cada equipe vêm uma única vez no dicionário equipes (indexado pelo id).
+      Jogos com equipe não cadastrada trazem time_casa/time_fora na própria linha.
+    produces:
+      - application/json
+    parameters:
+      - in: query
+        name: formato
+        type: string
+        enum: [completo, compacto]
+        required: false
+        description: compacto devolve os jogos com ids e um dicionário de equipes
+      - in: query
+        name: equipe_id
+        type: integer
+        required: false
+        description: Apenas os jogos (em casa ou fora) dessa equipe
+    responses:
+      200:
+        description: >
+          Lista de resultados, ou {"equipes", "resultados"} com formato=compacto
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              id:
+                type: integer
+              ronda:
+                type: integer
+              time_casa:
+                type: string
+              time_fora:
+                type: string
+              equipe_casa_id:
+                type: integer
+              equipe_fora_id:
+                type: integer
+              gols_casa:
+                type: integer
+              gols_fora:
+                type: integer
+              data_jogo:
+                type: string
+              logo_casa:
+                type: string
+              logo_fora:
+                type: string
+      400:
+        description: equipe_id inválido
+    """
+    equipe_id = None
+    if 'equipe_id' in request.args:
+        equipe_id = request.args.get('equipe_id', type=int)
+        if equipe_id is None:
+            return jsonify({"error": "equipe_id deve ser um número inteiro"}), 400
     
-    conn.close()
+    conn = get_db()
+    cursor = conn.cursor()
     
-    resultados_list = []
-    for resultado in resultados:
-        resultados_list.append({
-            "id": resultado[0],
-            "ronda": resultado[1],
-            "time_casa": resultado[2],
-            "time_fora": resultado[3],
-            "gols_casa": resultado[4],
-            "gols_fora": resultado[5],
-            "data_jogo": resultado[6],
-            "logo_casa": resultado[7],
-            "logo_fora": resultado[8]
-        })
+    if request.args.get('formato') != 'compacto':
+        consultar_resultados(cursor, """
+            id, ronda, time_casa, time_fora, equipe_casa_id, equipe_fora_id,
+            gols_casa, gols_fora, data_jogo, logo_casa, logo_fora
+        """, equipe_id)
+        return jsonify(linhas_como_dicts(cursor))
     
-    return jsonify(resultados_list)
+    jogos = consultar_resultados(cursor, COLUNAS_RESULTADO_COMPACTO, equipe_id).fetchall()
+    return jsonify(resultados_compactos(cursor, jogos))
 
 @app.route("/resultados", methods=["POST"])
+@requer_token(admin=True)
 def create_resultado():
-    """Cria um novo resultado"""
+    """Cria um novo resultado e atualiza a classificação das duas equipes"""
     data = request.get_json()
     
-    if not data or not all(key in data for key in ['ronda', 'time_casa', 'time_fora', 'gols_casa', 'gols_fora', 'data_jogo']):
+    if not isinstance(data, dict):
         return jsonify({"error": "Dados incompletos"}), 400
     
-    conn = sqlite3.connect(DATABASE_URL)
+    # Mesmas regras da importação em lote
+    try:
+        data = validar_resultado(data)
+    except ValueError as erro:
+        return jsonify({"error": str(erro)}), 400
+    gols_casa, gols_fora = data['gols_casa'], data['gols_fora']
+    
+    conn = get_db()
     cursor = conn.cursor()
     
+    casa_id = equipe_por_nome(cursor, data['time_casa'])
+    fora_id = equipe_por_nome(cursor, data['time_fora'])
+    
     cursor.execute("""
-        INSERT INTO resultados (ronda, time_casa, time_fora, gols_casa, gols_fora, data_jogo, logo_casa, logo_fora)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        INSERT INTO resultados (ronda, time_casa, time_fora, gols_casa, gols_fora, data_jogo, logo_casa, logo_fora,
+                                equipe_casa_id, equipe_fora_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """, (
         data['ronda'],
         data['time_casa'],
         data['time_fora'],
-        data['gols_casa'],
-        data['gols_fora'],
+        gols_casa,
+        gols_fora,
         data['data_jogo'],
-        data.get('logo_casa'),
-        data.get('logo_fora')
+        data['logo_casa'],
+        data['logo_fora'],
+        casa_id,
+        fora_id
     ))
+    resultado_id = cursor.lastrowid
     
+    posicoes_antigas = {}
+    aplicar_resultado(cursor, casa_id, fora_id, gols_casa, gols_fora, 1, posicoes_antigas)
+    atualizar_classificacao(cursor, posicoes_antigas)
     conn.commit()
-    conn.close()
     
-    return jsonify({"message": "Resultado criado com sucesso"}), 201
+    return jsonify({"message": "Resultado criado com sucesso", "id": resultado_id}), 201
+
+@app.route("/resultados/importar", methods=["POST"])
+@requer_token(admin=True)
+def importar_resultados():
+    """
+    Importa resultados em lote (CSV ou NDJSON)
+    ---
+    tags:
+      - Resultados
+    security:
+      - Bearer: []
+    summary: Importação em lote de resultados
+    description: >
+      Lê o corpo em streaming (text/csv com cabeçalho ou application/x-ndjson com
+      um objeto por linha) validando cada linha; depois de lido o corpo inteiro,
+      insere as válidas com executemany numa única transação curta, atualizando a
+      classificação uma vez no final. Com atomico=1 qualquer linha inválida
+      cancela a importação inteira.
+    consumes:
+      - text/csv
+      - application/x-ndjson
+    produces:
+      - application/json
+    parameters:
+      - in: query
+        name: atomico
+        type: integer
+        enum: [0, 1]
+        required: false
+        description: 1 para não importar nada se alguma linha for inválida
+    responses:
+      200:
+        description: Resumo da importação
+        schema:
+          type: object
+          properties:
+            linhas:
+              type: integer
+            importados:
+              type: integer
+            total_erros:
+              type: integer
+            erros:
+              type: array
+              items:
+                type: object
+                properties:
+                  linha:
+                    type: integer
+                  erro:
+                    type: string
+      400:
+        description: Formato não suportado, corpo fora de UTF-8 ou importação atômica com erros
+    """
+    if request.mimetype in ('text/csv', 'application/csv'):
+        texto = io.TextIOWrapper(request.stream, encoding='utf-8-sig', newline='')
+        linhas = enumerate(csv.DictReader(texto), start=2)  # linha 1 é o cabeçalho
+    elif request.mimetype in ('application/x-ndjson', 'application/jsonl', 'application/json-seq'):
+        texto = io.TextIOWrapper(request.stream, encoding='utf-8')
+        linhas = ((numero, linha) for numero, linha in enumerate(texto, start=1) if linha.strip())
+    else:
+        return jsonify({"error": "Use Content-Type text/csv ou application/x-ndjson"}), 400
+    
+    atomico = request.args.get('atomico') == '1'
+    
+    validos = []
+    erros = []
+    total_erros = 0
+    total_linhas = 0
+    
+    # O corpo é lido e validado inteiro antes de tocar no banco: um upload lento
+    # não segura o lock de escrita do SQLite enquanto os dados ainda chegam.
+    # As linhas válidas ficam em memória, limitadas por MAX_CONTENT_LENGTH
+    try:
+        for numero, linha in linhas:
+            total_linhas += 1
+            try:
+                if isinstance(linha, str):
+                    linha = json.loads(linha)
+                    if not isinstance(linha, dict):
+                        raise ValueError("linha deve ser um objeto JSON")
+                resultado = validar_resultado(linha)
+            except ValueError as erro:
+                total_erros += 1
+                if len(erros) < IMPORTACAO_MAX_ERROS:
+                    erros.append({"linha": numero, "erro": str(erro)})
+                continue
+            
+            if not (atomico and total_erros):  # A importação atômica será descartada; só continua validando
+                validos.append(resultado)
+    
+    except UnicodeDecodeError:
+        # O texto é decodificado em streaming: o erro só aparece ao chegar nele
+        return jsonify({"error": f"O corpo deve estar em UTF-8 (erro depois da linha {total_linhas})"}), 400
+    
+    if atomico and total_erros:
+        return jsonify({
+            "linhas": total_linhas,
+            "importados": 0,
+            "total_erros": total_erros,
+            "erros": erros
+        }), 400
+    
+    conn = get_db()
+    cursor = conn.cursor()
+    equipes_por_nome = {}
+    totais_por_equipe = {}
+    lote = []
+    
+    def equipe_id(nome):
+        if nome not in equipes_por_nome:
+            equipes_por_nome[nome] = equipe_por_nome(cursor, nome)
+        return equipes_por_nome[nome]
+    
+    # Inserções e classificação numa única transação curta, com o corpo já lido
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for resultado in validos:
+            casa_id, fora_id = equipe_id(resultado['time_casa']), equipe_id(resultado['time_fora'])
+            lote.append((
+                resultado['ronda'], resultado['time_casa'], resultado['time_fora'],
+                resultado['gols_casa'], resultado['gols_fora'], resultado['data_jogo'],
+                resultado['logo_casa'], resultado['logo_fora'], casa_id, fora_id
+            ))
+            for equipe, pro, contra in ((casa_id, resultado['gols_casa'], resultado['gols_fora']),
+                                        (fora_id, resultado['gols_fora'], resultado['gols_casa'])):
+                if equipe is not None:
+                    acumulado = totais_por_equipe.setdefault(equipe, [0] * 6)
+                    for indice, valor in enumerate(totais_do_jogo(pro, contra)):
+                        acumulado[indice] += valor
+        
+        importados = inserir_lote_resultados(cursor, lote)
+        
+        # A classificação é atualizada uma vez, com os totais somados de todas as linhas
+        posicoes_antigas = {}
+        for equipe, totais in totais_por_equipe.items():
+            somar_na_equipe(cursor, equipe, totais, posicoes_antigas)
+        atualizar_classificacao(cursor, posicoes_antigas)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    
+    return jsonify({
+        "linhas": total_linhas,
+        "importados": importados,
+        "total_erros": total_erros,
+        "erros": erros
+    })
+
+def ler_inteiro(valor):
+    """
+    int de um inteiro JSON ou de um texto só com dígitos; ValueError para o
+    resto. int() aceitaria 1.9 (truncando para 1) e True.
+    """
+    if isinstance(valor, int) and not isinstance(valor, bool):
+        return valor
+    if isinstance(valor, str) and re.fullmatch(r"\s*[+-]?\d+\s*", valor):
+        return int(valor)
+    raise ValueError(f"{valor!r} não é um número inteiro")
+
+def validar_resultado(linha):
+    """Valida e converte um resultado (da importação ou da API); levanta ValueError com o motivo"""
+    faltando = [campo for campo in ('ronda', 'time_casa', 'time_fora', 'gols_casa', 'gols_fora', 'data_jogo')
+                if linha.get(campo) in (None, '')]
+    if faltando:
+        raise ValueError(f"campos obrigatórios ausentes: {', '.join(faltando)}")
+    
+    resultado = {}
+    for campo in ('ronda', 'gols_casa', 'gols_fora'):
+        try:
+            resultado[campo] = ler_inteiro(linha[campo])
+        except ValueError:
+            raise ValueError(f"{campo} deve ser um número inteiro")
+        if resultado[campo] < 0:
+            raise ValueError(f"{campo} não pode ser negativo")
+    
+    resultado['time_casa'] = str(linha['time_casa']).strip()
+    resultado['time_fora'] = str(linha['time_fora']).strip()
+    if normalizar_nome(resultado['time_casa']) == normalizar_nome(resultado['time_fora']):
+        raise ValueError("time_casa e time_fora devem ser diferentes")
+    
+    try:
+        resultado['data_jogo'] = date.fromisoformat(str(linha['data_jogo']).strip()).isoformat()
+    except ValueError:
+        raise ValueError("data_jogo deve estar no formato AAAA-MM-DD")
+    
+    resultado['logo_casa'] = linha.get('logo_casa') or None
+    resultado['logo_fora'] = linha.get('logo_fora') or None
+    return resultado
+
+def inserir_lote_resultados(cursor, lote):
+    cursor.executemany("""
+        INSERT INTO resultados (ronda, time_casa, time_fora, gols_casa, gols_fora, data_jogo, logo_casa, logo_fora,
+                                equipe_casa_id, equipe_fora_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, lote)
+    return len(lote)
 
 @app.route("/resultados/<int:resultado_id>", methods=["PUT"])
+@requer_token(admin=True)
 def update_resultado(resultado_id):
-    """Atualiza um resultado existente"""
+    """Atualiza um resultado existente, desfazendo o antigo na classificação"""
     data = request.get_json()
     
-    if not data:
+    if not data or not isinstance(data, dict):
         return jsonify({"error": "Dados não fornecidos"}), 400
     
-    conn = sqlite3.connect(DATABASE_URL)
+    conn = get_db()
     cursor = conn.cursor()
     
+    cursor.execute("""
+        SELECT ronda, time_casa, time_fora, gols_casa, gols_fora, data_jogo, logo_casa, logo_fora,
+               equipe_casa_id, equipe_fora_id
+        FROM resultados
+        WHERE id = ?
+    """, (resultado_id,))
+    antigo = cursor.fetchone()
+    if not antigo:
+        return jsonify({"error": "Resultado não encontrado"}), 404
+    
+    # Campos ausentes mantêm o valor atual
+    campos = ['ronda', 'time_casa', 'time_fora', 'gols_casa', 'gols_fora', 'data_jogo', 'logo_casa', 'logo_fora']
+    novo = {campo: data.get(campo, antigo[indice]) for indice, campo in enumerate(campos)}
+    try:
+        novo = validar_resultado(novo)
+    except ValueError as erro:
+        return jsonify({"error": str(erro)}), 400
+    
+    casa_id = equipe_por_nome(cursor, novo['time_casa'])
+    fora_id = equipe_por_nome(cursor, novo['time_fora'])
+    
+    # Todo resultado está nos totais gravados das equipes: o placar anterior é sempre desfeito
+    posicoes_antigas = {}
+    aplicar_resultado(cursor, antigo[8], antigo[9], antigo[3], antigo[4], -1, posicoes_antigas)
+    aplicar_resultado(cursor, casa_id, fora_id, novo['gols_casa'], novo['gols_fora'], 1, posicoes_antigas)
+    
     cursor.execute("""
         UPDATE resultados 
         SET ronda = ?, time_casa = ?, time_fora = ?, gols_casa = ?, gols_fora = ?, 
-            data_jogo = ?, logo_casa = ?, logo_fora = ?
+            data_jogo = ?, logo_casa = ?, logo_fora = ?,
+            equipe_casa_id = ?, equipe_fora_id = ?
         WHERE id = ?
     """, (
-        data.get('ronda'),
-        data.get('time_casa'),
-        data.get('time_fora'),
-        data.get('gols_casa'),
-        data.get('gols_fora'),
-        data.get('data_jogo'),
-        data.get('logo_casa'),
-        data.get('logo_fora'),
+        novo['ronda'],
+        novo['time_casa'],
+        novo['time_fora'],
+        novo['gols_casa'],
+        novo['gols_fora'],
+        novo['data_jogo'],
+        novo['logo_casa'],
+        novo['logo_fora'],
+        casa_id,
+        fora_id,
         resultado_id
     ))
     
+    atualizar_classificacao(cursor, posicoes_antigas)
     conn.commit()
-    conn.close()
     
     return jsonify({"message": "Resultado atualizado com sucesso"})
 
 @app.route("/resultados/<int:resultado_id>", methods=["DELETE"])
+@requer_token(admin=True)
 def delete_resultado(resultado_id):
-    """Deleta um resultado"""
-    conn = sqlite3.connect(DATABASE_URL)
+    """Deleta um resultado e o desfaz na classificação"""
+    conn = get_db()
     cursor = conn.cursor()
     
-    cursor.execute("DELETE FROM resultados WHERE id = ?", (resultado_id,))
-    conn.commit()
-    conn.close()
+    cursor.execute("""
+        SELECT equipe_casa_id, equipe_fora_id, gols_casa, gols_fora
+        FROM resultados
+        WHERE id = ?
+    """, (resultado_id,))
+    resultado = cursor.fetchone()
+    
+    if resultado:
+        # Como no PUT: resultados antigos também estão nos totais gravados
+        posicoes_antigas = {}
+        aplicar_resultado(cursor, resultado[0], resultado[1], resultado[2], resultado[3], -1, posicoes_antigas)
+        cursor.execute("DELETE FROM resultados WHERE id = ?", (resultado_id,))
+        atualizar_classificacao(cursor, posicoes_antigas)
+        conn.commit()
     
     return jsonify({"message": "Resultado deletado com sucesso"})
 
@@ -941,7 +3875,7 @@ def login():
     tags:
       - Autenticação
     summary: Fazer login
-    description: Autentica o usuário e retorna os dados do usuário
+    description: Autentica o usuário e retorna os dados do usuário e um token de sessão assinado
     consumes:
       - application/json
     produces:
@@ -973,6 +3907,12 @@ def login():
           properties:
             success:
               type: boolean
+            token:
+              type: string
+              description: "Enviar como Authorization: Bearer <token> nas rotas de escrita"
+            expiresAt:
+              type: integer
+              description: Expiração do token (timestamp Unix)
             user:
               type: object
               properties:
@@ -990,6 +3930,8 @@ def login():
         description: Credenciais inválidas
       400:
         description: Email e senha são obrigatórios
+      503:
+        description: Muitos logins simultâneos, tente novamente
     """
     data = request.get_json()
     email = data.get('email')
@@ -998,21 +3940,34 @@ def login():
     if not email or not senha:
         return jsonify({"error": "Email e senha são obrigatórios"}), 400
     
-    conn = sqlite3.connect(DATABASE_URL)
+    conn = get_db()
     cursor = conn.cursor()
     
     cursor.execute("""
-        SELECT id, email, nome, telefone, tipo_usuario 
+        SELECT id, email, nome, telefone, tipo_usuario, senha
         FROM usuarios 
-        WHERE email = ? AND senha = ?
-    """, (email, senha))
+        WHERE email = ?
+    """, (email,))
     
     user = cursor.fetchone()
-    conn.close()
     
-    if user:
+    # Email desconhecido também calcula um scrypt no pool: pelo tempo de
+    # resposta não dá para saber quais contas existem
+    try:
+        valida, novo_hash = verificar_senha(senha, user[5] if user else HASH_SENHA_FICTICIO)
+    except HashSenhaOcupado:
+        return jsonify({"error": "Servidor ocupado, tente novamente"}), 503, {"Retry-After": "1"}
+    if novo_hash:
+        # Rehash transparente: só grava se a senha não mudou durante o cálculo
+        cursor.execute("UPDATE usuarios SET senha = ? WHERE id = ? AND senha = ?", (novo_hash, user[0], user[5]))
+        conn.commit()
+    
+    if valida:
+        token, expira_em = emitir_token(user[0], user[4])
         return jsonify({
             "success": True,
+            "token": token,
+            "expiresAt": expira_em,
             "user": {
                 "id": user[0],
                 "email": user[1],
@@ -1075,8 +4030,14 @@ def register():
               type: boolean
             message:
               type: string
+            token:
+              type: string
+            expiresAt:
+              type: integer
       400:
         description: Email já cadastrado ou dados incompletos
+      503:
+        description: Muitos cadastros simultâneos, tente novamente
     """
     data = request.get_json()
     email = data.get('email')
@@ -1087,27 +4048,33 @@ def register():
     if not email or not senha or not nome:
         return jsonify({"error": "Email, senha e nome são obrigatórios"}), 400
     
-    conn = sqlite3.connect(DATABASE_URL)
+    conn = get_db()
     cursor = conn.cursor()
     
     # Verificar se email já existe
     cursor.execute("SELECT id FROM usuarios WHERE email = ?", (email,))
     if cursor.fetchone():
-        conn.close()
         return jsonify({"error": "Email já cadastrado"}), 400
     
+    try:
+        senha_hash = gerar_hash_senha(senha)
+    except HashSenhaOcupado:
+        return jsonify({"error": "Servidor ocupado, tente novamente"}), 503, {"Retry-After": "1"}
+    
     # Inserir novo usuário
     cursor.execute("""
         INSERT INTO usuarios (email, senha, nome, telefone, tipo_usuario)
         VALUES (?, ?, ?, ?, 'user')
-    """, (email, senha, nome, telefone))
+    """, (email, senha_hash, nome, telefone))
+    usuario_id = cursor.lastrowid
     
     conn.commit()
-    conn.close()
     
-    return jsonify({"success": True, "message": "Usuário cadastrado com sucesso"})
+    token, expira_em = emitir_token(usuario_id, 'user')
+    return jsonify({"success": True, "message": "Usuário cadastrado com sucesso", "token": token, "expiresAt": expira_em})
 
 @app.route("/auth/profile", methods=["PUT"])
+@requer_token()
 def update_profile():
     """Atualiza perfil do usuário"""
     data = request.get_json()
@@ -1119,7 +4086,10 @@ def update_profile():
     if not user_id:
         return jsonify({"error": "ID do usuário é obrigatório"}), 400
     
-    conn = sqlite3.connect(DATABASE_URL)
+    if str(user_id) != str(g.usuario["sub"]) and g.usuario["tipo"] != 'admin':
+        return jsonify({"error": "Só é possível alterar o próprio perfil"}), 403
+    
+    conn = get_db()
     cursor = conn.cursor()
     
     cursor.execute("""
@@ -1129,12 +4099,30 @@ def update_profile():
     """, (nome, email, telefone, user_id))
     
     conn.commit()
-    conn.close()
     
     return jsonify({"success": True, "message": "Perfil atualizado com sucesso"})
 
+@app.route("/auth/logout", methods=["POST"])
+@requer_token()
+def logout():
+    """Revoga o token da requisição até a expiração dele"""
+    conn = get_db()
+    cursor = conn.cursor()
+    
+    cursor.execute("DELETE FROM tokens_revogados WHERE expira_em <= ?", (int(time.time()),))
+    cursor.execute(
+        "INSERT OR IGNORE INTO tokens_revogados (jti, expira_em) VALUES (?, ?)",
+        (g.usuario["jti"], g.usuario["exp"])
+    )
+    conn.commit()
+    # Vale na hora neste worker; os demais veem na próxima releitura da lista
+    _tokens_revogados["jtis"][g.usuario["jti"]] = g.usuario["exp"]
+    
+    return jsonify({"success": True, "message": "Sessão encerrada"})
+
 # Endpoints de usuários
 @app.route("/usuarios", methods=["GET"])
+@resposta_condicional('usuarios')
 def get_usuarios():
     """
     Lista todos os usuários
@@ -1166,7 +4154,7 @@ def get_usuarios():
               data_criacao:
                 type: string
     """
-    conn = sqlite3.connect(DATABASE_URL)
+    conn = get_db()
     cursor = conn.cursor()
     
     cursor.execute("""
@@ -1174,27 +4162,14 @@ def get_usuarios():
         FROM usuarios 
         ORDER BY data_criacao DESC
     """)
-    usuarios = cursor.fetchall()
-    
-    conn.close()
     
-    usuarios_list = []
-    for usuario in usuarios:
-        usuarios_list.append({
-            "id": usuario[0],
-            "email": usuario[1],
-            "nome": usuario[2],
-            "telefone": usuario[3],
-            "tipo_usuario": usuario[4],
-            "data_criacao": usuario[5]
-        })
-    
-    return jsonify(usuarios_list)
+    return jsonify(linhas_como_dicts(cursor))
 
 @app.route("/usuarios/<int:usuario_id>", methods=["GET"])
+@resposta_condicional('usuarios')
 def get_usuario(usuario_id):
     """Busca um usuário específico por ID (sem senha por segurança)"""
-    conn = sqlite3.connect(DATABASE_URL)
+    conn = get_db()
     cursor = conn.cursor()
     
     cursor.execute("""
@@ -1202,23 +4177,18 @@ def get_usuario(usuario_id):
         FROM usuarios 
         WHERE id = ?
     """, (usuario_id,))
-    usuario = cursor.fetchone()
-    
-    conn.close()
+    usuario = linha_como_dict(cursor)
     
     if not usuario:
         return jsonify({"error": "Usuário não encontrado"}), 404
     
-    return jsonify({
-        "id": usuario[0],
-        "email": usuario[1],
-        "nome": usuario[2],
-        "telefone": usuario[3],
-        "tipo_usuario": usuario[4],
-        "data_criacao": usuario[5]
-    })
+    return jsonify(usuario)
 
 if __name__ == "__main__":
+    conn = _abrir_conexao()
+    migrar(conn)
+    conn.close()
+    
     # Em produção, debug deve ser False
     debug_mode = os.environ.get('FLASK_ENV') == 'development' or os.environ.get('DEBUG') == 'True'
     app.run(host="0.0.0.0", port=PORT, debug=debug_mode)
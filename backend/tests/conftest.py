@@ -0,0 +1,59 @@
+"""
+Fixtures dos testes da API.
+
+    cd backend && python -m pytest tests
+
+Os testes rodam contra uma cópia do revista.db numa pasta temporária, migrada e
+com os dados de exemplo (como o flask --app main seed). O main.py cria uploads/
+e a .secret_key no diretório atual, então o import acontece dentro dessa pasta.
+Todos os testes compartilham o mesmo banco: cada um lê o estado de que depende
+antes de alterá-lo.
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA = tempfile.mkdtemp(prefix='revista-testes-')
+BANCO = os.path.join(PASTA, 'revista.db')
+
+shutil.copy(os.path.join(BACKEND, 'revista.db'), BANCO)
+os.environ['DATABASE_URL'] = BANCO
+os.chdir(PASTA)
+sys.path.insert(0, BACKEND)
+
+import main  # noqa: E402
+
+_conn = main._abrir_conexao()
+main.migrar(_conn)
+main.semear(_conn)
+ADMIN_ID = _conn.execute("SELECT id FROM usuarios WHERE tipo_usuario = 'admin' ORDER BY id LIMIT 1").fetchone()[0]
+_conn.close()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if main._pool_imagens["executor"] is not None:
+        main._pool_imagens["executor"].shutdown(wait=True)
+    shutil.rmtree(PASTA, ignore_errors=True)
+
+
+@pytest.fixture
+def cliente():
+    return main.app.test_client()
+
+
+@pytest.fixture
+def admin():
+    """Cabeçalhos de um administrador"""
+    return {"Authorization": f"Bearer {main.emitir_token(ADMIN_ID, 'admin')[0]}"}
+
+
+@pytest.fixture
+def banco():
+    """Conexão própria com o banco dos testes, para conferir o que as rotas gravaram"""
+    conn = main._abrir_conexao()
+    yield conn
+    conn.close()
@@ -0,0 +1,20 @@
+import pytest
+
+
+@pytest.mark.parametrize("consulta", ["limit=abc", "limit=", "limit=1.5", "limit=0", "limit=101", "limit=-1",
+                                      "cursor=invalido"])
+def test_paginacao_invalida_e_recusada(cliente, consulta):
+    resposta = cliente.get(f"/artigos?modo=resumo&{consulta}")
+    assert resposta.status_code == 400
+    assert "error" in resposta.json
+
+
+def test_limit_valido_pagina(cliente):
+    resposta = cliente.get("/artigos?modo=resumo&limit=1")
+    assert resposta.status_code == 200
+    assert len(resposta.json) == 1
+
+
+@pytest.mark.parametrize("consulta", ["limit=abc", "offset=abc", "limit=0", "offset=-1"])
+def test_busca_com_paginacao_invalida_e_recusada(cliente, consulta):
+    assert cliente.get(f"/artigos/busca?q=futebol&{consulta}").status_code == 400
@@ -0,0 +1,50 @@
+import asyncio
+import json
+
+import asgi
+import main
+
+BLOCO = 1024 * 1024
+
+
+def _chamar(cabecalhos, blocos):
+    """Executa o app ASGI com um POST /upload; retorna (status, corpo, blocos lidos)"""
+    scope = {'type': 'http', 'method': 'POST', 'path': '/upload', 'query_string': b'',
+             'headers': cabecalhos, 'http_version': '1.1'}
+    enviados = iter(blocos)
+    lidos = []
+    respostas = []
+
+    async def receive():
+        bloco = next(enviados, None)
+        if bloco is None:
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        lidos.append(bloco)
+        return {'type': 'http.request', 'body': bloco, 'more_body': True}
+
+    async def send(mensagem):
+        respostas.append(mensagem)
+
+    asyncio.run(asgi.app(scope, receive, send))
+    corpo = b''.join(mensagem.get('body', b'') for mensagem in respostas[1:])
+    return respostas[0]['status'], corpo, len(lidos)
+
+
+def test_content_length_acima_do_limite_e_recusado_sem_ler_o_corpo():
+    limite = main.app.config['MAX_CONTENT_LENGTH']
+    status, corpo, lidos = _chamar([(b'content-length', str(limite + 1).encode())], [b'x' * BLOCO] * 40)
+    assert status == 413
+    assert "error" in json.loads(corpo)
+    assert lidos == 0
+
+
+def test_corpo_sem_content_length_e_interrompido_no_limite():
+    limite = main.app.config['MAX_CONTENT_LENGTH']
+    status, _, lidos = _chamar([], [b'x' * BLOCO] * 40)
+    assert status == 413
+    assert lidos == limite // BLOCO + 1
+
+
+def test_corpo_dentro_do_limite_chega_ao_flask():
+    status, _, _ = _chamar([(b'content-length', b'3')], [b'abc'])
+    assert status == 401  # /upload exige token: a requisição passou pelo Flask
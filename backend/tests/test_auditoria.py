@@ -0,0 +1,22 @@
+import os
+import subprocess
+import sys
+
+from conftest import BACKEND, BANCO, PASTA
+
+
+def _arquivos(pasta):
+    return sorted(os.path.join(raiz, nome) for raiz, _, nomes in os.walk(pasta) for nome in nomes)
+
+
+def test_auditoria_de_consultas_sem_falhas_e_sem_arquivos_sobrando():
+    uploads = os.path.join(PASTA, 'uploads')
+    antes = _arquivos(uploads)
+    resultado = subprocess.run(
+        [sys.executable, '-m', 'flask', '--app', 'main', 'auditar-consultas'],
+        cwd=PASTA, env=dict(os.environ, DATABASE_URL=BANCO, PYTHONPATH=BACKEND),
+        capture_output=True, text=True, timeout=300,
+    )
+    assert resultado.returncode == 0, resultado.stdout[-3000:] + resultado.stderr[-3000:]
+    assert resultado.stdout.rstrip().endswith(", 0 com plano sem índice")
+    assert _arquivos(uploads) == antes
@@ -0,0 +1,15 @@
+import main
+
+
+def test_login_com_email_desconhecido_tambem_calcula_o_hash(cliente, monkeypatch):
+    chamadas = []
+    derivar = main.derivar_chave
+
+    def contar(*args):
+        chamadas.append(args[2:])  # n, r, p
+        return derivar(*args)
+
+    monkeypatch.setattr(main, "derivar_chave", contar)
+    resposta = cliente.post("/auth/login", json={"email": "ninguem@revista.local", "password": "qualquer"})
+    assert resposta.status_code == 401
+    assert chamadas == [(main.SENHA_SCRYPT_N, main.SENHA_SCRYPT_R, main.SENHA_SCRYPT_P)]
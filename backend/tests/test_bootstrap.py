@@ -0,0 +1,32 @@
+import main
+
+CABECALHO = "ronda,time_casa,time_fora,gols_casa,gols_fora,data_jogo\n"
+
+
+def test_ronda_atual_e_a_do_jogo_mais_recente(cliente, admin):
+    # A temporada antiga chegou à ronda 30; a atual está na ronda 3
+    csv = CABECALHO + "".join([
+        "30,Temporada Antiga A,Temporada Antiga B,1,0,2029-05-20\n",
+        "3,Temporada Antiga A,Temporada Antiga B,2,2,2028-09-10\n",
+        "2,Temporada Nova A,Temporada Nova B,0,1,2029-09-07\n",
+        "3,Temporada Nova A,Temporada Nova B,3,1,2029-09-14\n",
+        "3,Temporada Nova C,Temporada Nova D,0,0,2029-09-15\n",
+    ])
+    resposta = cliente.post("/resultados/importar", data=csv, content_type="text/csv", headers=admin)
+    assert resposta.json["importados"] == 5
+
+    resultados = cliente.get("/bootstrap?campos=resultados").json["resultados"]
+    assert resultados["ronda"] == 3
+    assert [jogo["data_jogo"] for jogo in resultados["resultados"]] == ["2029-09-15", "2029-09-14"]
+
+
+def test_permutacoes_de_campos_compartilham_a_consulta_e_o_cache(cliente):
+    assert main.campos_bootstrap("equipes.nome,artigos.titulo,equipes.id") == \
+        main.campos_bootstrap("equipes.id,artigos.titulo,equipes.nome") == \
+        {"artigos": ("titulo",), "equipes": ("id", "nome")}
+
+    primeira = cliente.get("/bootstrap?campos=equipes.nome,equipes.id")
+    acertos = main.cache_respostas.hits
+    segunda = cliente.get("/bootstrap?campos=equipes.id,equipes.nome")
+    assert main.cache_respostas.hits == acertos + 1
+    assert segunda.get_data() == primeira.get_data()
@@ -0,0 +1,35 @@
+import main
+
+
+def test_escrita_de_outra_conexao_invalida_o_cache(cliente, banco):
+    primeira = cliente.get("/equipes")
+    segunda = cliente.get("/equipes")
+    assert segunda.get_data() == primeira.get_data()
+    equipe = primeira.json[-1]
+
+    # Outra conexão (como outro worker do gunicorn) altera a tabela por fora das rotas
+    hits, misses = main.cache_respostas.hits, main.cache_respostas.misses
+    banco.execute("UPDATE equipes SET nome = ? WHERE id = ?", (equipe["nome"] + " (externa)", equipe["id"]))
+    banco.commit()
+
+    depois = cliente.get("/equipes", headers={"If-None-Match": primeira.headers["ETag"]})
+    assert depois.status_code == 200
+    assert depois.headers["ETag"] != primeira.headers["ETag"]
+    assert equipe["nome"] + " (externa)" in [linha["nome"] for linha in depois.json]
+    assert (main.cache_respostas.hits, main.cache_respostas.misses) == (hits, misses + 1)
+
+    # A nova resposta volta a ser servida do cache
+    assert cliente.get("/equipes").get_data() == depois.get_data()
+    assert main.cache_respostas.hits == hits + 1
+
+    banco.execute("UPDATE equipes SET nome = ? WHERE id = ?", (equipe["nome"], equipe["id"]))
+    banco.commit()
+
+
+def test_escrita_em_outra_tabela_mantem_o_cache(cliente, banco):
+    cliente.get("/equipes")
+    hits = main.cache_respostas.hits
+    banco.execute("UPDATE artigos SET titulo = titulo WHERE id = (SELECT MIN(id) FROM artigos)")
+    banco.commit()
+    assert cliente.get("/equipes").status_code == 200
+    assert main.cache_respostas.hits == hits + 1
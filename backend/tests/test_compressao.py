@@ -0,0 +1,57 @@
+import gzip
+import json
+
+import pytest
+
+import main
+
+brotli = pytest.importorskip("brotli") if "br" in main.COMPRESSAO_CODIFICACOES else None
+
+
+def _descomprimir(resposta):
+    codificacao = resposta.headers.get("Content-Encoding")
+    if codificacao == "br":
+        return brotli.decompress(resposta.get_data())
+    if codificacao == "gzip":
+        return gzip.decompress(resposta.get_data())
+    return resposta.get_data()
+
+
+@pytest.fixture
+def original(cliente):
+    resposta = cliente.get("/equipes", headers={"Accept-Encoding": "identity"})
+    assert len(resposta.get_data()) >= main.COMPRESSAO_MIN_BYTES
+    return resposta
+
+
+@pytest.mark.parametrize("accept_encoding, esperado", [
+    ("gzip", "gzip"),
+    ("br", "br"),
+    ("gzip, br", "br"),  # preferência do servidor quando as duas valem o mesmo
+    ("br;q=0, gzip", "gzip"),
+    ("gzip;q=0.5, br;q=0.1", "gzip"),
+])
+def test_negocia_a_codificacao(cliente, original, accept_encoding, esperado):
+    if esperado == "br" and brotli is None:
+        esperado = "gzip"
+    resposta = cliente.get("/equipes", headers={"Accept-Encoding": accept_encoding})
+    assert resposta.status_code == 200
+    assert resposta.headers["Content-Encoding"] == esperado
+    assert "Accept-Encoding" in resposta.vary
+    assert json.loads(_descomprimir(resposta)) == original.json
+    assert resposta.headers["ETag"] == original.headers["ETag"][:-1] + f'-{esperado}"'
+
+
+@pytest.mark.parametrize("cabecalhos", [{}, {"Accept-Encoding": "identity"}, {"Accept-Encoding": "deflate"}])
+def test_sem_codificacao_aceita_vai_sem_compressao(cliente, original, cabecalhos):
+    resposta = cliente.get("/equipes", headers=cabecalhos)
+    assert "Content-Encoding" not in resposta.headers
+    assert "Accept-Encoding" in resposta.vary
+    assert resposta.get_data() == original.get_data()
+
+
+def test_etag_da_variante_comprimida_responde_304(cliente):
+    resposta = cliente.get("/equipes", headers={"Accept-Encoding": "gzip"})
+    repetida = cliente.get("/equipes", headers={"Accept-Encoding": "gzip", "If-None-Match": resposta.headers["ETag"]})
+    assert repetida.status_code == 304
+    assert repetida.headers["ETag"] == resposta.headers["ETag"]
@@ -0,0 +1,26 @@
+import time
+
+EQUIPE = {"nome": "Condicional FC", "jogos": 0, "vitorias": 0, "empates": 0, "derrotas": 0, "gols_pro": 0, "gols_contra": 0}
+
+
+def test_escrita_no_mesmo_segundo_nao_gera_304_velho(cliente, admin):
+    equipe_id = cliente.post("/equipes", json=EQUIPE, headers=admin).json["id"]
+    primeira = cliente.get("/equipes")
+    assert primeira.last_modified is not None
+
+    # Mesmo segundo da resposta anterior (os testes rodam em milissegundos)
+    assert cliente.put(f"/equipes/{equipe_id}", json={**EQUIPE, "nome": "Condicional FC 2"},
+                       headers=admin).status_code == 200
+    segunda = cliente.get("/equipes", headers={"If-Modified-Since": primeira.headers["Last-Modified"]})
+    assert segunda.status_code == 200
+    assert "Condicional FC 2" in [equipe["nome"] for equipe in segunda.json]
+    cliente.delete(f"/equipes/{equipe_id}", headers=admin)
+
+
+def test_depois_do_segundo_da_escrita_if_modified_since_responde_304(cliente, admin):
+    equipe_id = cliente.post("/equipes", json=EQUIPE, headers=admin).json["id"]
+    time.sleep(1.1)
+    primeira = cliente.get("/equipes")
+    segunda = cliente.get("/equipes", headers={"If-Modified-Since": primeira.headers["Last-Modified"]})
+    assert segunda.status_code == 304
+    cliente.delete(f"/equipes/{equipe_id}", headers=admin)
@@ -0,0 +1,100 @@
+import io
+import json
+import sqlite3
+
+import pytest
+
+from conftest import BANCO
+
+CABECALHO = "ronda,time_casa,time_fora,gols_casa,gols_fora,data_jogo\n"
+
+
+def test_csv_fora_de_utf8_e_recusado(cliente, admin, banco):
+    antes = banco.execute("SELECT COUNT(*) FROM resultados").fetchone()[0]
+    corpo = (CABECALHO + "1,Importação A,Importação B,1,0,2024-02-01\n").encode() + b"2,Equipa \xff,Outra,0,0,2024-02-08\n"
+    resposta = cliente.post("/resultados/importar", data=corpo, content_type="text/csv", headers=admin)
+    assert resposta.status_code == 400
+    assert "UTF-8" in resposta.json["error"]
+    assert banco.execute("SELECT COUNT(*) FROM resultados").fetchone()[0] == antes
+
+
+@pytest.mark.parametrize("gols", [1.9, 2.0, True, "1.5", "um"])
+def test_ndjson_rejeita_gols_nao_inteiros(cliente, admin, gols):
+    corpo = ('{"ronda": 1, "time_casa": "Importação A", "time_fora": "Importação B", '
+             f'"gols_casa": {json.dumps(gols)}, "gols_fora": 0, "data_jogo": "2024-02-01"}}\n')
+    resposta = cliente.post("/resultados/importar", data=corpo, content_type="application/x-ndjson", headers=admin)
+    assert resposta.status_code == 200
+    assert resposta.json["importados"] == 0
+    assert resposta.json["erros"] == [{"linha": 1, "erro": "gols_casa deve ser um número inteiro"}]
+
+
+def test_ndjson_aceita_inteiros_e_textos_inteiros(cliente, admin):
+    corpo = ('{"ronda": "3", "time_casa": "Importação A", "time_fora": "Importação B", '
+             '"gols_casa": 2, "gols_fora": " 1 ", "data_jogo": "2024-02-15"}\n')
+    resposta = cliente.post("/resultados/importar", data=corpo, content_type="application/x-ndjson", headers=admin)
+    assert resposta.status_code == 200
+    assert resposta.json["importados"] == 1
+
+
+
+
+class CorpoLento(io.RawIOBase):
+    """Corpo CSV entregue uma linha por leitura; no meio dele outra conexão tenta escrever"""
+
+    def __init__(self, linhas, tentar_na_leitura):
+        super().__init__()
+        self.partes = iter([CABECALHO.encode()] + [linha.encode() for linha in linhas])
+        self.tentar_na_leitura = tentar_na_leitura
+        self.leituras = 0
+        self.escrita_livre = None
+
+    def readable(self):
+        return True
+
+    def readinto(self, destino):
+        self.leituras += 1
+        if self.leituras == self.tentar_na_leitura:
+            conn = sqlite3.connect(BANCO, timeout=0)
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.rollback()
+                self.escrita_livre = True
+            except sqlite3.OperationalError:
+                self.escrita_livre = False
+            finally:
+                conn.close()
+        parte = next(self.partes, b'')
+        destino[:len(parte)] = parte
+        return len(parte)
+
+
+def test_importacao_nao_segura_o_banco_enquanto_le_o_corpo(cliente, admin, banco):
+    linhas = [f"{numero},Importação Lenta A,Importação Lenta B,1,0,2024-02-01\n" for numero in range(1, 1001)]
+    corpo = CorpoLento(linhas, tentar_na_leitura=800)
+    antes = banco.execute("SELECT COUNT(*) FROM resultados").fetchone()[0]
+
+    tamanho = len(CABECALHO.encode()) + sum(len(linha.encode()) for linha in linhas)
+    resposta = cliente.post("/resultados/importar", content_type="text/csv", headers=admin,
+                            environ_overrides={"wsgi.input": corpo, "CONTENT_LENGTH": str(tamanho)})
+    assert resposta.status_code == 200
+    assert resposta.json["importados"] == 1000
+    assert corpo.escrita_livre is True
+    assert banco.execute("SELECT COUNT(*) FROM resultados").fetchone()[0] == antes + 1000
+
+
+@pytest.mark.parametrize("campos, erro", [
+    ({"ronda": "abc"}, "ronda deve ser um número inteiro"),
+    ({"time_fora": "Criação A"}, "time_casa e time_fora devem ser diferentes"),
+    ({"data_jogo": "31/02/2024"}, "data_jogo deve estar no formato AAAA-MM-DD"),
+    ({"gols_fora": -1}, "gols_fora não pode ser negativo"),
+])
+def test_criar_resultado_valida_como_a_importacao(cliente, admin, banco, campos, erro):
+    totais = "SELECT SUM(jogos), SUM(pontos) FROM equipes"
+    antes = banco.execute(totais).fetchone()
+    dados = dict({"ronda": 1, "time_casa": "Criação A", "time_fora": "Criação B",
+                  "gols_casa": 1, "gols_fora": 0, "data_jogo": "2024-02-01"}, **campos)
+
+    resposta = cliente.post("/resultados", json=dados, headers=admin)
+    assert resposta.status_code == 400
+    assert resposta.json["error"] == erro
+    assert banco.execute(totais).fetchone() == antes
@@ -0,0 +1,34 @@
+import itertools
+
+import pytest
+
+import main
+
+pytestmark = pytest.mark.skipif(main.metricas is None, reason="métricas desligadas")
+
+
+def _rotulos_sql():
+    return {amostra.labels['consulta'] for metrica in main.metricas.sql_duracao.collect()
+            for amostra in metrica.samples}
+
+
+def test_campos_do_bootstrap_nao_criam_rotulos_novos(cliente):
+    campos = ("equipes.nome", "equipes.pontos", "equipes.logo_url", "artigos.titulo", "artigos.autor")
+    cliente.get("/bootstrap?campos=equipes.id,artigos.id")
+    antes = _rotulos_sql()
+    for quantidade in range(1, len(campos) + 1):
+        for selecao in itertools.combinations(campos, quantidade):
+            assert cliente.get(f"/bootstrap?campos={','.join(selecao)}").status_code == 200
+    assert _rotulos_sql() == antes
+
+
+def test_rotulos_de_sql_sao_limitados(monkeypatch):
+    monkeypatch.setattr(main, "_rotulos_consultas", set())
+    monkeypatch.setattr(main, "METRICAS_MAX_CONSULTAS", 3)
+    main.rotulo_consulta.cache_clear()
+    try:
+        rotulos = [main.rotulo_consulta(f"SELECT id FROM tabela_{numero}") for numero in range(5)]
+    finally:
+        main.rotulo_consulta.cache_clear()
+    assert rotulos[:3] == [f"SELECT ... FROM tabela_{numero}" for numero in range(3)]
+    assert rotulos[3:] == ["outras", "outras"]
@@ -0,0 +1,36 @@
+import sqlite3
+
+import pytest
+
+import main
+
+
+class CursorSemFts(sqlite3.Cursor):
+    def execute(self, sql, *args):
+        if "USING fts5" in sql:
+            raise sqlite3.OperationalError("no such module: fts5")
+        return super().execute(sql, *args)
+
+
+class ConexaoSemFts(sqlite3.Connection):
+    """Simula um SQLite compilado sem FTS5"""
+
+    def cursor(self, factory=CursorSemFts):
+        return super().cursor(factory)
+
+
+def test_sem_fts5_a_migracao_da_busca_fica_pendente(tmp_path):
+    caminho = str(tmp_path / "novo.db")
+    conn = sqlite3.connect(caminho, factory=ConexaoSemFts)
+    with pytest.raises(RuntimeError, match="FTS5"):
+        main.migrar(conn)
+    anterior = main.MIGRACOES.index(main.migracao_busca_artigos)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == anterior
+    conn.close()
+
+    # Com FTS5 disponível o passo pendente é aplicado normalmente
+    conn = sqlite3.connect(caminho)
+    main.migrar(conn)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == main.ESQUEMA_VERSAO
+    assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'artigos_fts'").fetchone()
+    conn.close()
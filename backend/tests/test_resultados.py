@@ -0,0 +1,130 @@
+import uuid
+
+import pytest
+
+COLUNAS_TOTAIS = "jogos, vitorias, empates, derrotas, gols_pro, gols_contra, diferenca_gols, pontos"
+
+
+def _totais(banco, equipe_id):
+    return banco.execute(f"SELECT {COLUNAS_TOTAIS} FROM equipes WHERE id = ?", (equipe_id,)).fetchone()
+
+
+def _criar_equipes(cliente, admin, *sufixos):
+    """Equipes novas, sem jogos, com nomes únicos no banco compartilhado; retorna {sufixo: (id, nome)}"""
+    prefixo = f"Motor {uuid.uuid4().hex[:8]}"
+    equipes = {}
+    for sufixo in sufixos:
+        nome = f"{prefixo} {sufixo}"
+        resposta = cliente.post("/equipes", headers=admin, json={
+            "nome": nome, "jogos": 0, "vitorias": 0, "empates": 0, "derrotas": 0, "gols_pro": 0, "gols_contra": 0,
+        })
+        assert resposta.status_code == 201
+        equipes[sufixo] = (resposta.get_json()["id"], nome)
+    return equipes
+
+
+def _jogo(cliente, admin, casa, fora, gols_casa, gols_fora):
+    resposta = cliente.post("/resultados", headers=admin, json={
+        "ronda": 1, "time_casa": casa[1], "time_fora": fora[1],
+        "gols_casa": gols_casa, "gols_fora": gols_fora, "data_jogo": "2024-03-01",
+    })
+    assert resposta.status_code == 201
+    return resposta.get_json()["id"]
+
+
+def _posicoes(banco, equipes):
+    return {sufixo: banco.execute("SELECT posicao FROM equipes WHERE id = ?", (equipe_id,)).fetchone()[0]
+            for sufixo, (equipe_id, _) in equipes.items()}
+
+
+@pytest.fixture
+def resultado_de_exemplo(banco):
+    """Um resultado dos dados de exemplo (anterior ao motor), já somado nos totais gravados"""
+    linha = banco.execute("""
+        SELECT id, equipe_fora_id, gols_casa, gols_fora FROM resultados
+        WHERE data_jogo BETWEEN '2024-10-24' AND '2024-10-28' AND equipe_fora_id IS NOT NULL ORDER BY id LIMIT 1
+    """).fetchone()
+    if linha is None:
+        pytest.skip("sem resultados de exemplo restantes")
+    return linha
+
+
+def test_posicoes_seguem_pontos_saldo_e_gols(cliente, admin, banco):
+    equipes = _criar_equipes(cliente, admin, "A", "B", "C")
+    _jogo(cliente, admin, equipes["A"], equipes["B"], 3, 0)
+    _jogo(cliente, admin, equipes["C"], equipes["B"], 1, 0)
+    _jogo(cliente, admin, equipes["A"], equipes["C"], 1, 1)
+
+    posicoes = _posicoes(banco, equipes)
+    assert posicoes["A"] < posicoes["C"] < posicoes["B"]
+    assert _totais(banco, equipes["A"][0]) == (2, 1, 1, 0, 4, 1, 3, 4)
+    assert _totais(banco, equipes["C"][0]) == (2, 1, 1, 0, 2, 1, 1, 4)
+    assert _totais(banco, equipes["B"][0]) == (2, 0, 0, 2, 0, 4, -4, 0)
+
+
+def test_empate_nos_totais_e_decidido_pelo_confronto_direto(cliente, admin, banco):
+    # "A" vem antes de "B" no desempate por nome: só o confronto direto põe B na frente
+    equipes = _criar_equipes(cliente, admin, "A", "B", "C", "D")
+    _jogo(cliente, admin, equipes["B"], equipes["A"], 1, 0)
+    _jogo(cliente, admin, equipes["A"], equipes["C"], 1, 0)
+    _jogo(cliente, admin, equipes["D"], equipes["B"], 1, 0)
+
+    assert _totais(banco, equipes["A"][0]) == _totais(banco, equipes["B"][0]) == (2, 1, 0, 1, 1, 1, 0, 3)
+    posicoes = _posicoes(banco, equipes)
+    assert posicoes["B"] < posicoes["A"]
+
+    nomes = [equipe["nome"] for equipe in cliente.get("/equipes").get_json()]
+    assert nomes.index(equipes["B"][1]) < nomes.index(equipes["A"][1])
+
+
+def test_totais_apos_editar_e_remover(cliente, admin, banco):
+    equipes = _criar_equipes(cliente, admin, "A", "B")
+    resultado_id = _jogo(cliente, admin, equipes["A"], equipes["B"], 2, 1)
+    assert _totais(banco, equipes["A"][0]) == (1, 1, 0, 0, 2, 1, 1, 3)
+    assert _totais(banco, equipes["B"][0]) == (1, 0, 0, 1, 1, 2, -1, 0)
+
+    resposta = cliente.put(f"/resultados/{resultado_id}", json={"gols_casa": 0, "gols_fora": 0}, headers=admin)
+    assert resposta.status_code == 200
+    assert _totais(banco, equipes["A"][0]) == (1, 0, 1, 0, 0, 0, 0, 1)
+    assert _totais(banco, equipes["B"][0]) == (1, 0, 1, 0, 0, 0, 0, 1)
+
+    assert cliente.delete(f"/resultados/{resultado_id}", headers=admin).status_code == 200
+    assert _totais(banco, equipes["A"][0]) == (0, 0, 0, 0, 0, 0, 0, 0)
+    assert _totais(banco, equipes["B"][0]) == (0, 0, 0, 0, 0, 0, 0, 0)
+
+
+def test_editar_resultado_de_exemplo_nao_soma_outro_jogo(cliente, admin, banco, resultado_de_exemplo):
+    resultado_id, fora_id, gols_casa, gols_fora = resultado_de_exemplo
+    antes = _totais(banco, fora_id)
+
+    resposta = cliente.put(f"/resultados/{resultado_id}", json={"gols_casa": gols_casa, "gols_fora": gols_fora},
+                           headers=admin)
+    assert resposta.status_code == 200
+    assert _totais(banco, fora_id) == antes
+
+    # Derrota do visitante por um golo: só o placar muda, o número de jogos não
+    resposta = cliente.put(f"/resultados/{resultado_id}", json={"gols_casa": gols_fora + 1, "gols_fora": gols_fora},
+                           headers=admin)
+    assert resposta.status_code == 200
+    jogos, vitorias, empates, derrotas, gols_pro, gols_contra, _, pontos = _totais(banco, fora_id)
+    assert jogos == antes[0]
+    assert gols_pro == antes[4]
+    assert gols_contra == antes[5] - gols_casa + gols_fora + 1
+    assert vitorias + empates + derrotas == jogos
+    assert pontos == 3 * vitorias + empates
+
+
+def test_remover_resultado_de_exemplo_desfaz_o_jogo(cliente, admin, banco, resultado_de_exemplo):
+    resultado_id, fora_id, gols_casa, gols_fora = resultado_de_exemplo
+    antes = _totais(banco, fora_id)
+
+    assert cliente.delete(f"/resultados/{resultado_id}", headers=admin).status_code == 200
+    depois = _totais(banco, fora_id)
+    assert depois[0] == antes[0] - 1
+    assert depois[4] == antes[4] - gols_fora
+    assert depois[5] == antes[5] - gols_casa
+
+
+def test_marcador_antigo_removido(banco):
+    colunas = [coluna[1] for coluna in banco.execute("PRAGMA table_info(resultados)")]
+    assert 'na_classificacao' not in colunas
@@ -0,0 +1,71 @@
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+from conftest import BACKEND, BANCO, PASTA
+
+
+def _porta_livre():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope='module')
+def gunicorn_sincrono():
+    """gunicorn com um único worker síncrono (o modo padrão do Procfile)"""
+    porta = _porta_livre()
+    ambiente = dict(os.environ, DATABASE_URL=BANCO, PYTHONPATH=BACKEND, METRICAS='0', DOCS_MODO='dinamico')
+    processo = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', os.path.join(BACKEND, 'gunicorn.conf.py'),
+         '--bind', f'127.0.0.1:{porta}', '--workers', '1', '--timeout', '120'],
+        cwd=PASTA, env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    limite = time.monotonic() + 30
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', porta), timeout=1).close()
+            break
+        except OSError:
+            if processo.poll() is not None or time.monotonic() > limite:
+                processo.kill()
+                pytest.fail("gunicorn não iniciou")
+            time.sleep(0.2)
+    yield porta
+    processo.terminate()
+    try:
+        processo.wait(10)
+    except subprocess.TimeoutExpired:
+        processo.kill()
+
+
+def test_stream_em_worker_sincrono_nao_prende_as_outras_rotas(gunicorn_sincrono):
+    abertas = []
+    for _ in range(2):
+        conexao = http.client.HTTPConnection('127.0.0.1', gunicorn_sincrono, timeout=5)
+        conexao.request('GET', '/resultados/stream')
+        resposta = conexao.getresponse()
+        assert resposta.status == 503
+        assert resposta.getheader('Retry-After')
+        abertas.append(conexao)
+
+    conexao = http.client.HTTPConnection('127.0.0.1', gunicorn_sincrono, timeout=5)
+    conexao.request('GET', '/equipes')
+    assert conexao.getresponse().status == 200
+    for aberta in abertas + [conexao]:
+        aberta.close()
+
+
+def test_stream_em_servidor_com_threads(cliente):
+    resposta = cliente.get('/resultados/stream', buffered=False, environ_overrides={'wsgi.multithread': True})
+    try:
+        assert resposta.status_code == 200
+        assert resposta.mimetype == 'text/event-stream'
+        assert next(resposta.response).startswith(b'retry: ')
+    finally:
+        resposta.close()
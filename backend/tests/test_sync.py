@@ -0,0 +1,61 @@
+import main
+
+EQUIPE = {"jogos": 0, "vitorias": 0, "empates": 0, "derrotas": 0, "gols_pro": 0, "gols_contra": 0}
+
+
+def _sync(cliente, desde):
+    resposta = cliente.get(f"/sync?desde={desde}")
+    assert resposta.status_code == 200
+    return resposta.json
+
+
+def test_delta_traz_so_o_que_mudou_desde_a_versao(cliente, admin):
+    versao = _sync(cliente, 0)["versao"]
+
+    criada = cliente.post("/equipes", json={**EQUIPE, "nome": "Sync Criada"}, headers=admin).json["id"]
+    removida = cliente.post("/equipes", json={**EQUIPE, "nome": "Sync Removida"}, headers=admin).json["id"]
+    assert cliente.delete(f"/equipes/{removida}", headers=admin).status_code == 200
+
+    delta = _sync(cliente, versao)
+    assert delta["completo"] is False
+    assert delta["versao"] > versao
+    # A equipe nova pode mudar a posição das últimas colocadas, que também vêm no delta
+    alteradas = [equipe["id"] for equipe in delta["equipes"]["alterados"]]
+    assert criada in alteradas and removida not in alteradas
+    assert len(alteradas) < len(cliente.get("/equipes").json)
+    assert delta["equipes"]["removidos"] == [removida]
+    assert delta["artigos"] == {"alterados": [], "removidos": []}
+    assert delta["resultados"] == {"alterados": [], "removidos": []}
+
+    # Já em dia: delta vazio na mesma versão
+    atual = _sync(cliente, delta["versao"])
+    assert atual["completo"] is False
+    assert atual["versao"] == delta["versao"]
+    assert all(atual[tabela] == {"alterados": [], "removidos": []} for tabela in main.TABELAS_SINCRONIZADAS)
+    cliente.delete(f"/equipes/{criada}", headers=admin)
+
+
+def test_atraso_grande_demais_recebe_snapshot_completo(cliente, admin, monkeypatch):
+    versao = _sync(cliente, 0)["versao"]
+    ids = [cliente.post("/equipes", json={**EQUIPE, "nome": f"Sync Atraso {numero}"}, headers=admin).json["id"]
+           for numero in range(3)]
+    monkeypatch.setattr(main, "SYNC_MAX_ALTERACOES", 2)
+
+    resposta = _sync(cliente, versao)
+    assert resposta["completo"] is True
+    equipes = {equipe["id"] for equipe in resposta["equipes"]["alterados"]}
+    assert set(ids) <= equipes
+    assert len(equipes) == len(cliente.get("/equipes").json)
+    assert resposta["artigos"]["alterados"]
+    for equipe_id in ids:
+        cliente.delete(f"/equipes/{equipe_id}", headers=admin)
+
+
+def test_versao_do_futuro_recebe_snapshot_completo(cliente):
+    versao = _sync(cliente, 0)["versao"]
+    assert _sync(cliente, versao + 1000)["completo"] is True
+
+
+def test_desde_invalido(cliente):
+    assert cliente.get("/sync?desde=-1").status_code == 400
+    assert cliente.get("/sync?desde=abc").status_code == 400
@@ -0,0 +1,76 @@
+import base64
+import json
+import secrets
+
+import pytest
+
+import main
+
+
+def _bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def usuario(cliente):
+    """Usuário comum recém-registrado: (id, email, token)"""
+    email = f"tokens-{secrets.token_hex(4)}@revista.local"
+    resposta = cliente.post("/auth/register", json={"email": email, "password": "segredo123", "name": "Tokens"})
+    assert resposta.status_code == 200
+    token = resposta.json["token"]
+    return main.ler_token(token)["sub"], email, token
+
+
+def test_sem_token_responde_401(cliente):
+    resposta = cliente.post("/artigos", json={})
+    assert resposta.status_code == 401
+    assert resposta.headers["WWW-Authenticate"] == "Bearer"
+
+
+@pytest.mark.parametrize("cabecalho", ["Bearer", "Bearer ", "Basic dXNlcjpzZW5oYQ==", "Bearer nao.e.um.token", "Bearer x.y"])
+def test_cabecalho_malformado_responde_401(cliente, cabecalho):
+    assert cliente.post("/artigos", json={}, headers={"Authorization": cabecalho}).status_code == 401
+
+
+def test_token_de_usuario_comum_em_rota_de_admin_responde_403(cliente, usuario):
+    _, _, token = usuario
+    resposta = cliente.post("/artigos", json={}, headers=_bearer(token))
+    assert resposta.status_code == 403
+    assert resposta.json["error"] == "Acesso restrito a administradores"
+
+
+def test_token_adulterado_e_recusado(cliente, usuario):
+    _, _, token = usuario
+    corpo, assinatura = token.split(".")
+    carga = json.loads(base64.urlsafe_b64decode(corpo + "=" * (-len(corpo) % 4)))
+    # Promove o usuário a admin mantendo a assinatura original
+    carga["tipo"] = "admin"
+    adulterado = base64.urlsafe_b64encode(json.dumps(carga, separators=(",", ":")).encode()).decode().rstrip("=")
+    assert cliente.post("/artigos", json={}, headers=_bearer(f"{adulterado}.{assinatura}")).status_code == 401
+    # Assinatura trocada
+    assert cliente.put("/auth/profile", json={}, headers=_bearer(f"{corpo}.{assinatura[::-1]}")).status_code == 401
+
+
+def test_token_expirado_e_recusado(cliente, usuario, monkeypatch):
+    usuario_id, _, _ = usuario
+    monkeypatch.setattr(main, "TOKEN_VALIDADE", -1)
+    expirado, _ = main.emitir_token(usuario_id, "admin")
+    assert cliente.post("/artigos", json={}, headers=_bearer(expirado)).status_code == 401
+
+
+def test_token_revogado_no_logout_responde_401(cliente, usuario):
+    usuario_id, email, token = usuario
+    perfil = {"id": usuario_id, "name": "Tokens", "email": email}
+    assert cliente.put("/auth/profile", json=perfil, headers=_bearer(token)).status_code == 200
+    assert cliente.post("/auth/logout", headers=_bearer(token)).status_code == 200
+    assert cliente.put("/auth/profile", json=perfil, headers=_bearer(token)).status_code == 401
+
+    # Outro worker não tem o jti em memória: a revogação vem da tabela
+    main._tokens_revogados["jtis"] = {}
+    main._tokens_revogados["versao"] = None
+    main._tokens_revogados["verificado_em"] = 0.0
+    assert cliente.put("/auth/profile", json=perfil, headers=_bearer(token)).status_code == 401
+
+    # Um token novo do mesmo usuário continua valendo
+    novo, _ = main.emitir_token(usuario_id, "user")
+    assert cliente.put("/auth/profile", json=perfil, headers=_bearer(novo)).status_code == 200
@@ -0,0 +1,104 @@
+import io
+import os
+import time
+
+import pytest
+
+import main
+from conftest import ADMIN_ID
+
+pytestmark = pytest.mark.skipif(main.Image is None, reason="Pillow não instalado")
+
+
+@pytest.fixture(scope='module')
+def imagem():
+    """PNG enviado pelo /upload, depois que as variantes ficam prontas"""
+    conteudo = io.BytesIO()
+    main.Image.new("RGB", (600, 400), (20, 120, 60)).save(conteudo, format="PNG")
+    conteudo.seek(0)
+    token = main.emitir_token(ADMIN_ID, 'admin')[0]
+    resposta = main.app.test_client().post("/upload", data={"file": (conteudo, "variantes.png")},
+                                           content_type="multipart/form-data",
+                                           headers={"Authorization": f"Bearer {token}"})
+    nome = os.path.basename(resposta.json["image_url"])
+    # O upload agenda as variantes no pool de imagens
+    limite = time.monotonic() + 10
+    while not all(os.path.exists(main.caminho_variante(nome, tamanho, formato))
+                  for tamanho in main.VARIANTES_IMAGEM for formato in ('webp', 'original')):
+        assert time.monotonic() < limite, "variantes não geradas"
+        time.sleep(0.05)
+    return nome
+
+
+@pytest.mark.parametrize("accept, tipo", [
+    ("image/webp,*/*", "image/webp"),
+    ("image/avif,image/webp;q=0.9,image/*;q=0.8", "image/webp"),
+    ("*/*", "image/png"),
+    ("image/*", "image/png"),
+    ("image/png,image/webp;q=0", "image/png"),
+])
+def test_webp_so_com_accept_explicito(cliente, imagem, accept, tipo):
+    resposta = cliente.get(f"/uploads/{imagem}?tamanho=thumb", headers={"Accept": accept})
+    assert resposta.status_code == 200
+    assert resposta.mimetype == tipo
+    assert "Accept" in resposta.vary
+
+
+@pytest.fixture
+def offload(monkeypatch):
+    """UPLOADS_OFFLOAD=x-accel, registrando as variantes agendadas"""
+    agendadas = []
+    monkeypatch.setattr(main, "UPLOADS_OFFLOAD", "x-accel")
+    monkeypatch.setattr(main, "agendar_variantes", agendadas.append)
+    return agendadas
+
+
+@pytest.mark.parametrize("caminho", ["/uploads/nao-existe.jpg", "/uploads/nao-existe.jpg?tamanho=thumb"])
+def test_offload_de_arquivo_inexistente_responde_404(cliente, offload, caminho):
+    resposta = cliente.get(caminho)
+    assert resposta.status_code == 404
+    assert resposta.json == {"error": "Arquivo não encontrado"}
+    assert offload == []
+
+
+def test_offload_entrega_o_caminho_interno_ao_nginx(cliente, offload, imagem):
+    resposta = cliente.get(f"/uploads/{imagem}?tamanho=card", headers={"Accept": "image/webp"})
+    assert resposta.status_code == 200
+    assert resposta.headers["X-Accel-Redirect"] == \
+        f"{main.UPLOADS_ACCEL_PREFIX}/variantes/{os.path.basename(main.caminho_variante(imagem, 'card', 'webp'))}"
+    assert resposta.get_data() == b""
+    assert "Accept" in resposta.vary
+
+
+def _arquivos_enviados():
+    """Arquivos da pasta de uploads (sem a de variantes), com a data de modificação"""
+    pasta = main.app.config['UPLOAD_FOLDER']
+    return {entrada.name: entrada.stat().st_mtime_ns for entrada in os.scandir(pasta) if entrada.is_file()}
+
+
+def test_mesmo_conteudo_reaproveita_o_arquivo(cliente, admin, banco, monkeypatch):
+    agendadas = []
+    monkeypatch.setattr(main, "agendar_variantes", agendadas.append)
+    conteudo = io.BytesIO()
+    main.Image.new("RGB", (8, 8), tuple(os.urandom(3))).save(conteudo, format="PNG")
+
+    def enviar(nome):
+        return cliente.post("/upload", data={"file": (io.BytesIO(conteudo.getvalue()), nome)},
+                            content_type="multipart/form-data", headers=admin)
+
+    primeiro = enviar("original.png")
+    assert primeiro.status_code == 200
+    assert primeiro.json["duplicado"] is False
+    nome = os.path.basename(primeiro.json["image_url"])
+    caminho = os.path.join(main.app.config['UPLOAD_FOLDER'], nome)
+    arquivos = _arquivos_enviados()
+    registros = banco.execute("SELECT COUNT(*) FROM uploads").fetchone()[0]
+
+    segundo = enviar("copia.png")
+    assert segundo.status_code == 200
+    assert segundo.json["duplicado"] is True
+    assert segundo.json["image_url"] == primeiro.json["image_url"]
+    assert _arquivos_enviados() == arquivos
+    assert banco.execute("SELECT COUNT(*) FROM uploads").fetchone()[0] == registros
+    assert agendadas == [nome]
+    assert os.path.isfile(caminho)
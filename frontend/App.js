@@ -21,6 +21,23 @@ import axios from 'axios';
 
 // Configuração da API - ajuste o IP conforme necessário
 const API_BASE_URL = 'http://10.197.232.123:8000'; // IP da sua máquina na rede
+const ARTIGOS_POR_PAGINA = 20; // artigos por página da lista (o bootstrap traz a primeira)
+const BUSCA_ESPERA_MS = 300; // pausa na digitação antes de consultar a busca
+
+// Monta nome e logo de cada lado do jogo a partir do dicionário de equipes
+// do formato compacto (a linha só traz nome/logo quando não vêm da equipe)
+const expandirResultados = ({ equipes, resultados }) =>
+  resultados.map((resultado) => {
+    const casa = equipes[resultado.equipe_casa_id] || {};
+    const fora = equipes[resultado.equipe_fora_id] || {};
+    return {
+      ...resultado,
+      time_casa: resultado.time_casa || casa.nome,
+      time_fora: resultado.time_fora || fora.nome,
+      logo_casa: resultado.logo_casa || casa.logo_url,
+      logo_fora: resultado.logo_fora || fora.logo_url
+    };
+  });
 
 export default function App() {
   const [artigos, setArtigos] = useState([]);
@@ -88,16 +105,24 @@ export default function App() {
   const [selectedArtigo, setSelectedArtigo] = useState(null);
   const [showArtigoDetail, setShowArtigoDetail] = useState(false);
   const [currentCarouselIndex, setCurrentCarouselIndex] = useState(0);
+  const [temMaisArtigos, setTemMaisArtigos] = useState(false);
   
   const scrollViewRef = useRef(null);
   const artigoCardRefs = useRef({});
-
-
-  // Buscar artigos ao carregar o app
+  // O bootstrap traz só a última ronda; a lista completa é buscada ao abrir a aba
+  const resultadosCompletos = useRef(false);
+  // Artigos vêm uma página por vez, pelo botão "Ver mais" no fim da lista (a lista
+  // fica dentro do ScrollView da tela, onde o onEndReached do FlatList não é confiável)
+  const proximoCursorArtigos = useRef(null);
+  const carregandoMaisArtigos = useRef(false);
+  // A busca vai ao servidor: só a resposta da última consulta digitada é mostrada
+  const buscaAtual = useRef(0);
+  const buscaTimeout = useRef(null);
+
+
+  // Buscar artigos, classificação e resultados ao carregar o app
   useEffect(() => {
-    fetchArtigos();
-    fetchEquipes();
-    fetchResultados();
+    fetchBootstrap();
   }, []);
 
   // Carrossel automático de notícias (muda a cada 5 segundos)
@@ -111,10 +136,58 @@ export default function App() {
     return () => clearInterval(interval);
   }, [artigos.length]);
 
+  // Uma única requisição na abertura do app; os demais artigos vêm sob demanda
+  const fetchBootstrap = async () => {
+    try {
+      setLoading(true);
+      const response = await axios.get(`${API_BASE_URL}/bootstrap`);
+      const { artigos: paginaArtigos, equipes: classificacao, resultados: ultimaRonda } = response.data;
+      setArtigos(paginaArtigos.itens);
+      setEquipes(classificacao);
+      setResultados(expandirResultados(ultimaRonda));
+      proximoCursorArtigos.current = paginaArtigos.proximo_cursor || null;
+      setTemMaisArtigos(Boolean(proximoCursorArtigos.current));
+      setLoading(false);
+    } catch (error) {
+      console.error('Erro ao buscar dados iniciais:', error);
+      setLoading(false);
+      fetchArtigos();
+      fetchEquipes();
+      fetchResultados();
+    }
+  };
+
+  // Próxima página da lista
+  const carregarMaisArtigos = async () => {
+    const cursor = proximoCursorArtigos.current;
+    if (!cursor || carregandoMaisArtigos.current) return;
+    carregandoMaisArtigos.current = true;
+    try {
+      const response = await axios.get(`${API_BASE_URL}/artigos`, {
+        params: { modo: 'resumo', limit: ARTIGOS_POR_PAGINA, cursor }
+      });
+      // Um refresh no meio do caminho recomeça a lista: esta página é descartada
+      if (proximoCursorArtigos.current === cursor) {
+        setArtigos((anteriores) => [...anteriores, ...response.data]);
+        proximoCursorArtigos.current = response.headers['x-next-cursor'] || null;
+        setTemMaisArtigos(Boolean(proximoCursorArtigos.current));
+      }
+    } catch (error) {
+      console.error('Erro ao buscar artigos:', error);
+    } finally {
+      carregandoMaisArtigos.current = false;
+    }
+  };
+
+  // A lista mostra só o resumo; o conteúdo completo é buscado ao abrir o artigo
   const fetchArtigos = async () => {
     try {
       setLoading(true);
-      const response = await axios.get(`${API_BASE_URL}/artigos`);
+      const response = await axios.get(`${API_BASE_URL}/artigos`, {
+        params: { modo: 'resumo', limit: ARTIGOS_POR_PAGINA }
+      });
+      proximoCursorArtigos.current = response.headers['x-next-cursor'] || null;
+      setTemMaisArtigos(Boolean(proximoCursorArtigos.current));
       setArtigos(response.data || []);
     } catch (error) {
       console.error('Erro ao buscar artigos:', error);
@@ -135,32 +208,49 @@ export default function App() {
 
   const fetchResultados = async () => {
     try {
-      const response = await axios.get(`${API_BASE_URL}/resultados`);
-      setResultados(response.data);
+      const response = await axios.get(`${API_BASE_URL}/resultados`, { params: { formato: 'compacto' } });
+      setResultados(expandirResultados(response.data));
+      resultadosCompletos.current = true;
     } catch (error) {
       console.error('Erro ao buscar resultados:', error);
     }
   };
 
+  // Busca full-text no servidor (título, conteúdo completo e autor), não só nos
+  // artigos já carregados; espera uma pausa na digitação antes de consultar
   const handleSearch = (query) => {
     setSearchQuery(query);
     setIsSearching(query.length > 0);
+    clearTimeout(buscaTimeout.current);
+    const numero = ++buscaAtual.current;
     
-    if (query.length === 0) {
+    if (query.trim().length === 0) {
       setFilteredArtigos([]);
       return;
     }
     
-    const filtered = artigos.filter(artigo => 
-      artigo.titulo.toLowerCase().includes(query.toLowerCase()) ||
-      artigo.conteudo.toLowerCase().includes(query.toLowerCase()) ||
-      artigo.autor.toLowerCase().includes(query.toLowerCase())
-    );
-    
-    setFilteredArtigos(filtered);
+    buscaTimeout.current = setTimeout(async () => {
+      try {
+        const response = await axios.get(`${API_BASE_URL}/artigos/busca`, {
+          params: { q: query, limit: ARTIGOS_POR_PAGINA }
+        });
+        if (numero !== buscaAtual.current) return;
+        // O trecho destacado vira o resumo do cartão, sem as marcas de destaque
+        setFilteredArtigos(response.data.map((artigo) => ({
+          ...artigo,
+          resumo: (artigo.trecho || '').replace(/<\/?mark>/g, '')
+        })));
+      } catch (error) {
+        if (numero !== buscaAtual.current) return;
+        console.error('Erro ao pesquisar artigos:', error);
+        setFilteredArtigos([]);
+      }
+    }, BUSCA_ESPERA_MS);
   };
 
   const clearSearch = () => {
+    clearTimeout(buscaTimeout.current);
+    buscaAtual.current += 1;
     setSearchQuery('');
     setFilteredArtigos([]);
     setIsSearching(false);
@@ -168,6 +258,9 @@ export default function App() {
 
   const handleTabChange = (tabName) => {
     setActiveTab(tabName);
+    if (tabName === 'Resultados' && !resultadosCompletos.current) {
+      fetchResultados();
+    }
     // Limpar pesquisa quando sair da aba de pesquisa
     if (tabName !== 'Pesquisa') {
       clearSearch();
@@ -206,6 +299,8 @@ export default function App() {
       });
       
       if (response.data && response.data.success) {
+        // Token enviado em todas as requisições seguintes (rotas de escrita exigem)
+        axios.defaults.headers.common['Authorization'] = `Bearer ${response.data.token}`;
         setIsLoggedIn(true);
         setUserType(response.data.user.userType);
         setCurrentUser(response.data.user);
@@ -315,6 +410,12 @@ export default function App() {
   };
 
   const handleLogout = () => {
+    // Revoga o token no servidor; o logout local não depende da resposta
+    const authorization = axios.defaults.headers.common['Authorization'];
+    delete axios.defaults.headers.common['Authorization'];
+    if (authorization) {
+      axios.post(`${API_BASE_URL}/auth/logout`, null, { headers: { Authorization: authorization } }).catch(() => {});
+    }
     setIsLoggedIn(false);
     setUserType('');
     setCurrentUser(null);
@@ -707,9 +808,15 @@ export default function App() {
     }
   };
 
-  const handleArtigoPress = (artigo) => {
+  const handleArtigoPress = async (artigo) => {
     setSelectedArtigo(artigo);
     setShowArtigoDetail(true);
+    try {
+      const response = await axios.get(`${API_BASE_URL}/artigos/${artigo.id}`);
+      setSelectedArtigo((atual) => (atual && atual.id === artigo.id ? response.data : atual));
+    } catch (error) {
+      console.error('Erro ao buscar artigo:', error);
+    }
   };
 
   const closeArtigoDetail = () => {
@@ -820,7 +927,7 @@ export default function App() {
           )}
           
           <Text style={styles.artigoConteudo} numberOfLines={3}>
-            {item.conteudo}
+            {item.resumo || item.conteudo}
           </Text>
           
           <View style={styles.readMoreContainer}>
@@ -1114,7 +1221,7 @@ export default function App() {
                         style={styles.carouselPreview}
                         numberOfLines={2}
                       >
-                        {artigos[currentCarouselIndex].conteudo}
+                        {artigos[currentCarouselIndex].resumo || artigos[currentCarouselIndex].conteudo}
                       </Animatable.Text>
                     </View>
                   </View>
@@ -1148,6 +1255,13 @@ export default function App() {
               refreshing={loading}
               onRefresh={fetchArtigos}
               showsVerticalScrollIndicator={false}
+              ListFooterComponent={
+                temMaisArtigos ? (
+                  <TouchableOpacity style={styles.verMaisButton} onPress={carregarMaisArtigos}>
+                    <Text style={styles.verMaisText}>Ver mais notícias</Text>
+                  </TouchableOpacity>
+                ) : null
+              }
               ListEmptyComponent={
                 artigos.length === 0 ? (
                   <View style={styles.emptyContainer}>
@@ -2165,7 +2279,7 @@ export default function App() {
                 <View style={styles.artigoDetailConteudoContainer}>
                   <Text style={styles.artigoDetailConteudoLabel}>Conteúdo:</Text>
                   <Text style={[styles.artigoDetailConteudo, { color: isDarkTheme ? '#e0e0e0' : '#333' }]}>
-                    {selectedArtigo.conteudo}
+                    {selectedArtigo.conteudo || selectedArtigo.resumo}
                   </Text>
                 </View>
               </Animatable.View>
@@ -2625,6 +2739,19 @@ const styles = StyleSheet.create({
     color: '#999',
     fontSize: 16,
   },
+  verMaisButton: {
+    marginVertical: 16,
+    paddingVertical: 12,
+    borderRadius: 8,
+    borderWidth: 1,
+    borderColor: '#00D4AA',
+    alignItems: 'center',
+  },
+  verMaisText: {
+    color: '#00D4AA',
+    fontSize: 16,
+    fontWeight: '600',
+  },
 
   // Artigo Detail Modal Styles
   artigoDetailOverlay: {